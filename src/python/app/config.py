@@ -1,4 +1,5 @@
 
+import json
 import os
 from dotenv import load_dotenv
 
@@ -7,6 +8,15 @@ from dotenv import load_dotenv
 dotenv_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.env')
 load_dotenv(dotenv_path)
 
+def merge_engagement_weights(default, overrides):
+    """Per-platform {'likes', 'shares'} weights, each platform's overrides merged over the defaults."""
+    default = {**default, **overrides.get('default', {})}
+    return {
+        'default': default,
+        **{platform.lower(): {**default, **weights} for platform, weights in overrides.items() if platform != 'default'}
+    }
+
+
 class Config:
     """Base configuration."""
     # Application settings
@@ -15,8 +25,18 @@ class Config:
     TESTING = False
     
     # Database settings
-    # Default to an in-memory SQLite DB for simplicity if not set
-    DATABASE_URI = os.environ.get('DATABASE_URI', f"sqlite:///{os.path.join(os.path.dirname(os.path.dirname(__file__)), 'social_media_analytics.db')}")
+    # Default to a SQLite file in the instance directory if not set
+    INSTANCE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance')
+    DATABASE_URI = os.environ.get('DATABASE_URI', f"sqlite:///{os.path.join(INSTANCE_DIR, 'app.db')}")
+    DATABASE_READ_URI = os.environ.get('DATABASE_READ_URI')  # Optional read replica; defaults to DATABASE_URI
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))  # Server databases only
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))  # seconds to wait for a pooled connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # seconds before a connection is replaced
+    SQLITE_BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT', 30))  # seconds a connection waits for a lock
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')  # NORMAL is durable enough under WAL
+    SQLITE_CACHE_SIZE_MB = int(os.environ.get('SQLITE_CACHE_SIZE_MB', 64))  # Page cache per connection
+    SQLITE_MMAP_SIZE_MB = int(os.environ.get('SQLITE_MMAP_SIZE_MB', 256))
     
     # API Keys
     TWITTER_API_KEY = os.environ.get('TWITTER_API_KEY')
@@ -25,7 +45,14 @@ class Config:
     TWITTER_ACCESS_SECRET = os.environ.get('TWITTER_ACCESS_SECRET')
     
     # Data collection settings
-    COLLECTION_INTERVAL = int(os.environ.get('COLLECTION_INTERVAL', 3600))  # seconds
+    COLLECTION_INTERVAL = int(os.environ.get('COLLECTION_INTERVAL', 3600))  # seconds; starting interval of each keyword and source
+    COLLECTION_SOURCES = [source.strip() for source in os.environ.get('COLLECTION_SOURCES', 'twitter').split(',') if source.strip()]
+    COLLECTION_TICK_SECONDS = int(os.environ.get('COLLECTION_TICK_SECONDS', 60))  # How often due scrapes are picked
+    COLLECTION_MIN_INTERVAL = int(os.environ.get('COLLECTION_MIN_INTERVAL', 300))  # seconds; hottest keywords
+    COLLECTION_MAX_INTERVAL = int(os.environ.get('COLLECTION_MAX_INTERVAL', 12 * 3600))  # seconds; coldest keywords
+    COLLECTION_TARGET_FILL = float(os.environ.get('COLLECTION_TARGET_FILL', 0.5))  # Aim for runs returning this share of POST_LIMIT as new posts
+    COLLECTION_JITTER = float(os.environ.get('COLLECTION_JITTER', 0.1))  # +/- share of the interval
+    COLLECTION_BUDGET_PER_HOUR = float(os.environ.get('COLLECTION_BUDGET_PER_HOUR', 0))  # Scrapes per hour; 0 = what the fixed interval used
     DEFAULT_KEYWORDS = ['tech', 'ai', 'machinelearning', 'data']
     POST_LIMIT = int(os.environ.get('POST_LIMIT', 100))
     PROCESSING_INTERVAL_MINUTES = int(os.environ.get('PROCESSING_INTERVAL_MINUTES', 10)) # New
@@ -34,6 +61,75 @@ class Config:
     # Corrected path to be relative to the 'app' directory where config.py is assumed to be.
     # If config.py is in `app/`, and stopwords.txt is in `app/utils/`
     STOPWORDS_FILE = os.path.join(os.path.dirname(__file__), 'utils', 'stopwords.txt')
+    LEMMATIZE_KEYWORDS = os.environ.get('LEMMATIZE_KEYWORDS', 'true').lower() == 'true'
+    
+    # Topic clustering settings
+    TOPIC_MINHASH_PERMUTATIONS = int(os.environ.get('TOPIC_MINHASH_PERMUTATIONS', 64))
+    TOPIC_LSH_BANDS = int(os.environ.get('TOPIC_LSH_BANDS', 32))  # 2 rows per band with 64 permutations
+    TOPIC_SIMILARITY_THRESHOLD = float(os.environ.get('TOPIC_SIMILARITY_THRESHOLD', 0.2))
+    TOPIC_MERGE_THRESHOLD = float(os.environ.get('TOPIC_MERGE_THRESHOLD', 0.5))
+    TOPIC_DECAY_HALF_LIFE_HOURS = float(os.environ.get('TOPIC_DECAY_HALF_LIFE_HOURS', 24))
+    TOPIC_MIN_WEIGHT = float(os.environ.get('TOPIC_MIN_WEIGHT', 0.05))
+    TOPIC_SIGNATURE_KEYWORDS = 20  # Top topic keywords used to build its signature
+    TOPIC_MAX_KEYWORDS = 50  # Keyword counts kept per topic
+    
+    # Response cache settings
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 256))  # In-memory entries per process
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))  # seconds
+    RESPONSE_CACHE_FILE = os.environ.get('RESPONSE_CACHE_FILE')  # Shared on-disk tier, e.g. instance/response_cache.db
+    DATA_VERSION_FILE = os.environ.get('DATA_VERSION_FILE', os.path.join(INSTANCE_DIR, 'data_version'))
+    
+    # Response encoding settings
+    RESPONSE_COMPRESSION = os.environ.get('RESPONSE_COMPRESSION', 'true').lower() == 'true'  # gzip/brotli per Accept-Encoding
+    RESPONSE_COMPRESSION_MIN_SIZE = int(os.environ.get('RESPONSE_COMPRESSION_MIN_SIZE', 1024))  # bytes; smaller bodies go as-is
+    RESPONSE_GZIP_LEVEL = int(os.environ.get('RESPONSE_GZIP_LEVEL', 6))
+    RESPONSE_BROTLI_QUALITY = int(os.environ.get('RESPONSE_BROTLI_QUALITY', 5))  # Used when the brotli package is installed
+    
+    # Engagement scoring: per-platform weights of likes and shares in Post.engagement_score,
+    # e.g. ENGAGEMENT_WEIGHTS='{"reddit": {"likes": 0.5, "shares": 2}}'. The default is the
+    # plain likes + shares sum; platforms override only the weights they name.
+    ENGAGEMENT_WEIGHTS = merge_engagement_weights(
+        {'likes': 1.0, 'shares': 1.0},
+        json.loads(os.environ.get('ENGAGEMENT_WEIGHTS', '{}'))
+    )
+    
+    # Dashboard settings
+    DASHBOARD_WORKERS = int(os.environ.get('DASHBOARD_WORKERS', 8))  # Widget queries run concurrently per request
+    POST_SNIPPET_LENGTH = int(os.environ.get('POST_SNIPPET_LENGTH', 100))  # Characters kept by the 'snippet' field
+    
+    # Query profiling: per-request SQL count and time in a Server-Timing header, slow statements
+    # and their plans at /api/debug/queries (toggled there at runtime, per process)
+    QUERY_PROFILING = os.environ.get('QUERY_PROFILING', 'false').lower() == 'true'  # Enabled at startup
+    QUERY_PROFILING_SLOWEST = int(os.environ.get('QUERY_PROFILING_SLOWEST', 20))  # Distinct slow statements kept
+    QUERY_PROFILING_HISTORY = int(os.environ.get('QUERY_PROFILING_HISTORY', 100))  # Recent request profiles kept
+    QUERY_PROFILING_REPEAT_THRESHOLD = int(os.environ.get('QUERY_PROFILING_REPEAT_THRESHOLD', 5))  # Runs per request flagged as N+1
+    DEBUG_API_TOKEN = os.environ.get('DEBUG_API_TOKEN')  # X-Debug-Token for /api/debug/* outside debug mode
+    
+    # Export settings
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))  # Posts read per query while streaming
+    EXPORT_MAX_CONCURRENT = int(os.environ.get('EXPORT_MAX_CONCURRENT', 2))  # Exports streaming at once per process
+    
+    # Retention settings: posts older than HOT_RETENTION_DAYS move to time partitions in ARCHIVE_DIR
+    HOT_RETENTION_DAYS = int(os.environ.get('HOT_RETENTION_DAYS', 90))  # 0 keeps every post hot
+    ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR', os.path.join(INSTANCE_DIR, 'archive'))
+    ARCHIVE_PARTITION = os.environ.get('ARCHIVE_PARTITION', 'day').lower()  # day, week or month per archive file
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 2000))  # Posts moved per transaction
+    
+    # Import settings
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 5000))  # CSV rows deduped and inserted per transaction
+    
+    # Scheduler settings: one process holds the scheduler lease and runs the jobs
+    SCHEDULER_LEASE_TTL = int(os.environ.get('SCHEDULER_LEASE_TTL', 60))  # seconds a lease stays valid without a heartbeat
+    SCHEDULER_LEASE_HEARTBEAT = int(os.environ.get('SCHEDULER_LEASE_HEARTBEAT', 15))  # seconds between renewals and takeover attempts
+    SCHEDULER_IO_WORKERS = int(os.environ.get('SCHEDULER_IO_WORKERS', 4))  # Threads for scraping and archiving jobs
+    SCHEDULER_CPU_WORKERS = int(os.environ.get('SCHEDULER_CPU_WORKERS', 1))  # Processes for NLP jobs, off the web process's GIL
+    SCHEDULER_MISFIRE_GRACE_SECONDS = int(os.environ.get('SCHEDULER_MISFIRE_GRACE_SECONDS', 300))  # Late runs within this still start
+    
+    # Processing settings: each run works through the backlog in batches until it is empty or the time is up
+    PROCESSING_MIN_BATCH = int(os.environ.get('PROCESSING_MIN_BATCH', 200))  # Posts per transaction with a short backlog
+    PROCESSING_MAX_BATCH = int(os.environ.get('PROCESSING_MAX_BATCH', 5000))  # Posts per transaction with a deep one
+    PROCESSING_MAX_SECONDS = int(os.environ.get('PROCESSING_MAX_SECONDS', PROCESSING_INTERVAL_MINUTES * 60 * 0.8))  # Stops a run before the next is due
     
     # Misc settings
     TIMEZONE = os.environ.get('TIMEZONE', 'UTC')
@@ -48,10 +144,12 @@ class DevelopmentConfig(Config):
 class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
-    DATABASE_URI = f"sqlite:///{os.path.join(os.path.dirname(os.path.dirname(__file__)), 'test.db')}" # In-memory for tests
+    DATABASE_URI = os.environ.get('TEST_DATABASE_URI', f"sqlite:///{os.path.join(os.path.dirname(os.path.dirname(__file__)), 'test.db')}")
     WTF_CSRF_ENABLED = False # If using Flask-WTF
     COLLECTION_INTERVAL = 3600 * 24 # Don't run scheduler frequently during tests
     PROCESSING_INTERVAL_MINUTES = 60 * 24
+    RESPONSE_CACHE_ENABLED = False
+    HOT_RETENTION_DAYS = 0
 
 
 class ProductionConfig(Config):
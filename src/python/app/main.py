@@ -1,28 +1,51 @@
-from flask import Flask, render_template, jsonify, request # Removed send_from_directory
+from flask import Flask, render_template, jsonify, request, Response # Removed send_from_directory
+import contextvars
 import os
+import threading
 # import json # Not used
-from datetime import datetime
+from datetime import datetime, timedelta
 from flask_cors import CORS # Import CORS
 
 from .config import get_config
 from database.db import init_db
 from .services.processor import DataProcessor
 from .services.analyzer import DataAnalyzer
-from scheduler.tasks import init_scheduler
+from .services.exporter import DataExporter, EXPORT_FORMATS
+from .services.importer import CsvImporter
+from scheduler.tasks import init_scheduler_election, queue_processing
 from werkzeug.utils import secure_filename # For file uploads
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from app.services.collector import DataCollector
 from database.db import session_scope
+from app.utils.cache import cached_response
+from app.utils.serialization import FastJSONProvider, compress_response
+from app.utils.time_utils import BUCKET_INTERVALS
+from app.utils.profiling import (profiler, start_query_profile, add_server_timing, finish_query_profile,
+                                 debug_access_allowed)
 
 # Initialize processor and analyzer
 processor = DataProcessor()
 analyzer = DataAnalyzer()
-collector = DataCollector()
+exporter = DataExporter()
+
+# Browser-backed collector for the manual collection endpoints, started on first use
+_collector = None
+_collector_lock = threading.Lock()
+
+# Read pool for the independent widget queries of /api/dashboard-data
+dashboard_executor = ThreadPoolExecutor(max_workers=get_config().DASHBOARD_WORKERS, thread_name_prefix='dashboard')
+
+# Long-running exports may only occupy a few request threads at a time
+export_slots = threading.BoundedSemaphore(get_config().EXPORT_MAX_CONCURRENT)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Columns the dashboard's recent posts table shows (content arrives truncated as 'snippet')
+RECENT_POST_FIELDS = ('id', 'platform', 'author', 'snippet', 'created_at', 'likes', 'shares', 'sentiment_score')
+
 UPLOAD_FOLDER = 'uploads' # Make sure this folder exists or is created
 ALLOWED_EXTENSIONS = {'csv'}
 
@@ -30,11 +53,31 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def get_collector():
+    """Return the shared DataCollector, starting its browser on the first call."""
+    global _collector
+    with _collector_lock:
+        if _collector is None:
+            _collector = DataCollector()
+        return _collector
+
+def submit_widget(func, *args, **kwargs):
+    """Run a widget query on the dashboard pool in a copy of the request's context (keeps its query profile)."""
+    return dashboard_executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+
+def page_response(page):
+    """JSON list of a page's posts; the cursor for the next page goes in X-Next-Cursor."""
+    response = jsonify(page['posts'])
+    if page['next_cursor']:
+        response.headers['X-Next-Cursor'] = page['next_cursor']
+    return response
+
 def create_app():
     """Create and configure the Flask application."""
     app = Flask(__name__,
                 static_folder='../static', # Adjusted static folder path relative to main.py
                 template_folder='../templates') # Adjusted template folder path
+    app.json = FastJSONProvider(app) # orjson encoding with native datetimes
 
     # Load configuration
     current_config = get_config()
@@ -44,7 +87,7 @@ def create_app():
 
     # Enable CORS - Explicitly allow the Next.js dev server origin
     # In production, restrict this to the actual frontend domain
-    CORS(app, resources={r"/api/*": {"origins": ["http://localhost:9002", "http://127.0.0.1:9002"]}}) # Allows requests from Next.js dev server
+    CORS(app, resources={r"/api/*": {"origins": ["http://localhost:9002", "http://127.0.0.1:9002"], "expose_headers": ["X-Next-Cursor", "Server-Timing"]}}) # Allows requests from Next.js dev server
 
     # Initialize database
     with app.app_context():
@@ -53,6 +96,10 @@ def create_app():
 
     # Register routes
     register_routes(app)
+    app.after_request(compress_response) # gzip/brotli per Accept-Encoding
+    app.before_request(start_query_profile) # SQL count and time per /api/* request when profiling is on
+    app.after_request(add_server_timing)
+    app.teardown_request(finish_query_profile)
 
     @app.context_processor
     def inject_now():
@@ -62,8 +109,8 @@ def create_app():
     if not app.config.get('TESTING', False) and os.environ.get('FLASK_ENV') != 'development_no_scheduler':
         # Avoid starting scheduler twice when Flask reloader is active
         if not os.environ.get("WERKZEUG_RUN_MAIN"):
-           logger.info("Initializing scheduler...")
-           init_scheduler()
+           logger.info("Joining scheduler leader election...")
+           init_scheduler_election()
         else:
            logger.info("Scheduler initialization skipped in Werkzeug reloader process.")
     else:
@@ -104,31 +151,48 @@ def register_routes(app):
         return render_template('index.html', title="Settings (Coming Soon)") # Or a dedicated settings.html
 
     @app.route('/api/summary')
+    @cached_response
     def get_summary():
         """Get dashboard summary statistics."""
         days = request.args.get('days', default=1, type=int)
         return jsonify(analyzer.get_dashboard_summary(days))
 
     @app.route('/api/trending')
+    @cached_response
     def get_trending():
         """Get trending topics."""
         days = request.args.get('days', default=1, type=int)
         limit = request.args.get('limit', default=10, type=int)
         return jsonify(analyzer.get_trending_topics(days, limit))
 
+    @app.route('/api/topics')
+    def get_topics_route():
+        """Get clustered topics with per-topic counts and sentiment."""
+        days = request.args.get('days', default=7, type=int)
+        limit = request.args.get('limit', default=10, type=int)
+        return jsonify(analyzer.get_topics(days, limit))
+
     @app.route('/api/posts/top')
     def get_top_posts_route():
-        """Get top posts by specified metric."""
+        """Get top posts by specified metric (page with cursor=, pick columns with fields=)."""
         days = request.args.get('days', default=1, type=int)
         metric = request.args.get('metric', default='engagement')
         limit = request.args.get('limit', default=10, type=int)
-        return jsonify(analyzer.get_top_posts(days, metric, limit))
+        cursor = request.args.get('cursor')
+        fields = request.args.get('fields')
+        try:
+            page = analyzer.get_top_posts_page(days, metric, limit, cursor, fields)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return page_response(page)
 
     @app.route('/api/activity')
     def get_activity():
         """Get post activity time series."""
         days = request.args.get('days', default=7, type=int)
-        interval = request.args.get('interval', default='day')
+        interval = request.args.get('interval', default='day').lower()
+        if interval not in BUCKET_INTERVALS:
+            return jsonify({'error': f"interval must be one of: {', '.join(BUCKET_INTERVALS)}"}), 400
         return jsonify(analyzer.get_time_series_activity(days, interval))
 
     @app.route('/api/engagement')
@@ -139,6 +203,7 @@ def register_routes(app):
         return jsonify(analyzer.get_time_series_engagement(days, platform))
 
     @app.route('/api/sentiment')
+    @cached_response
     def get_sentiment_distribution_route():
         """Get sentiment distribution."""
         days = request.args.get('days', default=7, type=int)
@@ -154,11 +219,67 @@ def register_routes(app):
 
     @app.route('/api/search')
     def search_posts_route():
-        """Search posts by content."""
+        """Search posts by content (supports "phrases" and prefix* terms; page with cursor=, pick columns with fields=)."""
         query_param = request.args.get('q', default='')
         days = request.args.get('days', default=30, type=int)
         limit = request.args.get('limit', default=50, type=int)
-        return jsonify(analyzer.search_posts(query_param, days, limit))
+        order = request.args.get('order', default='relevance')
+        cursor = request.args.get('cursor')
+        fields = request.args.get('fields')
+        try:
+            page = analyzer.search_posts_page(query_param, days, limit, order, cursor, fields)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return page_response(page)
+
+    @app.route('/api/export')
+    def export_posts_route():
+        """Stream posts with keywords and sentiment as NDJSON, CSV or Parquet."""
+        export_format = request.args.get('format', default='ndjson').lower()
+        days = request.args.get('days', default=None, type=int)
+        since = request.args.get('since')
+        until = request.args.get('until')
+        platform = request.args.get('platform', default=None)
+        try:
+            start = datetime.fromisoformat(since) if since else (datetime.utcnow() - timedelta(days=days) if days else None)
+            end = datetime.fromisoformat(until) if until else None
+            chunks = exporter.stream(export_format, start, end, platform)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if not export_slots.acquire(blocking=False):
+            return jsonify({'error': 'Too many exports in progress, try again later'}), 429
+
+        # Chunks are produced batch by batch while the client reads, so memory stays flat
+        response = Response(chunks, mimetype=EXPORT_FORMATS[export_format])
+        response.headers['Content-Disposition'] = f"attachment; filename={exporter.export_filename(export_format, start, end)}"
+        response.call_on_close(export_slots.release)
+        return response
+
+    @app.route('/api/import', methods=['POST'])
+    def import_posts_route():
+        """Bulk-import posts from an uploaded CSV file."""
+        upload = request.files.get('file')
+        if upload is None or not upload.filename:
+            return jsonify({'error': 'No file provided'}), 400
+        if not allowed_file(upload.filename):
+            return jsonify({'error': f"Only {', '.join(sorted(ALLOWED_EXTENSIONS))} files can be imported"}), 400
+
+        # Spool the upload to disk first so the import reads it in chunks, not from memory
+        filename = f"{datetime.utcnow():%Y%m%d%H%M%S}_{secure_filename(upload.filename)}"
+        path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        upload.save(path)
+        try:
+            importer = CsvImporter(default_platform=request.form.get('platform') or None)
+            stats = importer.import_file(path)
+        except (ValueError, UnicodeDecodeError) as e:
+            return jsonify({'error': str(e)}), 400
+        finally:
+            os.remove(path)
+
+        # Keywords, sentiment and topics for the new posts are computed by the processing job
+        stats['processing_queued'] = queue_processing() if stats['imported'] else False
+        return jsonify(stats)
 
     @app.route('/api/system-stats')
     def system_stats_api():
@@ -183,6 +304,7 @@ def register_routes(app):
         })
 
     @app.route('/api/dashboard-data')
+    @cached_response
     def dashboard_data_api():
         source = request.args.get('source', 'all')
         keyword_filter = request.args.get('keyword', '') # Empty string default instead of 'all'
@@ -190,8 +312,27 @@ def register_routes(app):
 
         logger.info(f"Received dashboard data request: source='{source}', keyword='{keyword_filter}', timeRange='{time_range_days}'")
 
-        # Placeholder data - replace with actual data fetching and processing logic
-        summary = analyzer.get_dashboard_summary(days=time_range_days)
+        # Widgets are independent, so they run concurrently on the read pool (one session each)
+        platform_filter = source if source != 'all' else None
+        widgets = {
+            'summary': submit_widget(analyzer.get_dashboard_summary, days=time_range_days),
+            'activity': submit_widget(analyzer.get_time_series_activity, days=time_range_days, interval='day'), # Assume daily for now
+            'keywords': submit_widget(processor.get_trending_keywords, days=time_range_days, limit=50), # Fetch more for word cloud
+            'hashtags': submit_widget(processor.get_trending_hashtags, days=time_range_days, limit=10),
+            'topics': submit_widget(analyzer.get_topics, days=time_range_days, limit=10),
+            'engagement': submit_widget(analyzer.get_time_series_engagement, days=time_range_days, platform=platform_filter),
+        }
+
+        # Fetch recent posts, apply keyword filter if present
+        if keyword_filter: # Check if keyword_filter is not empty
+            logger.info(f"Searching posts with keyword: {keyword_filter}")
+            widgets['recent_posts'] = submit_widget(analyzer.search_posts, query_string=keyword_filter, days=time_range_days, limit=50, order='recent', fields=RECENT_POST_FIELDS) # Increased limit for filtering
+        else:
+             logger.info("Fetching recent posts (no keyword filter)")
+             # Get latest posts regardless of keyword
+             widgets['recent_posts'] = submit_widget(analyzer.get_top_posts, days=time_range_days, limit=50, metric='created_at_desc', fields=RECENT_POST_FIELDS) # Assuming a metric for recency exists or implemented
+
+        summary = widgets['summary'].result()
         metrics = {
             "totalPosts": summary.get('total_posts', 0),
             "postsChange": 5, # Placeholder
@@ -203,10 +344,11 @@ def register_routes(app):
             "reachChange": 3, # Placeholder
         }
 
-        activity_data_raw = analyzer.get_time_series_activity(days=time_range_days, interval='day') # Assume daily for now
+        activity_data_raw = widgets['activity'].result()
 
         # Aggregate activity data if source is 'all' or transform for specific source
-        activity_labels = sorted(list(set(item['date'] for item in activity_data_raw)))
+        activity_by_date = {item['date']: item for item in activity_data_raw}
+        activity_labels = sorted(activity_by_date)
         activity_datasets = []
 
         platforms_in_data = set()
@@ -225,25 +367,17 @@ def register_routes(app):
 
         if source == 'all':
             for p_name in sorted(list(platforms_in_data)):
-                platform_data = []
-                for label_date in activity_labels:
-                    found_item = next((item for item in activity_data_raw if item['date'] == label_date), None)
-                    platform_data.append(found_item.get(p_name, 0) if found_item else 0)
                 activity_datasets.append({
                     'label': p_name.capitalize(),
-                    'data': platform_data,
+                    'data': [activity_by_date[label_date].get(p_name, 0) for label_date in activity_labels],
                     'borderColor': platform_colors.get(p_name.lower(), default_color),
                     'tension': 0.1,
                     'fill': False
                 })
         elif source in platforms_in_data:
-            platform_data = []
-            for label_date in activity_labels:
-                 found_item = next((item for item in activity_data_raw if item['date'] == label_date), None)
-                 platform_data.append(found_item.get(source, 0) if found_item else 0)
             activity_datasets.append({
                 'label': source.capitalize(),
-                'data': platform_data,
+                'data': [activity_by_date[label_date].get(source, 0) for label_date in activity_labels],
                 'borderColor': platform_colors.get(source.lower(), default_color),
                 'tension': 0.1,
                 'fill': False
@@ -255,23 +389,38 @@ def register_routes(app):
             'datasets': activity_datasets
         }
 
-        sentimentDistribution = processor.get_sentiment_distribution(days=time_range_days, platform=source if source != 'all' else None)
+        # Derive the sentiment breakdown from the summary instead of scanning the window again
+        if source == 'all':
+            sentimentDistribution = dict(summary.get('sentiment', {}))
+        else:
+            source_metrics = summary.get('platform_metrics', {}).get(source, {})
+            sentimentDistribution = {key: source_metrics.get(key, 0) for key in ('positive', 'neutral', 'negative')}
 
-        trending_keywords_raw = processor.get_trending_keywords(days=time_range_days, limit=50) # Fetch more for word cloud
+        trending_keywords_raw = widgets['keywords'].result()
         wordCloudData = [{"text": kw['text'], "value": kw['frequency']} for kw in trending_keywords_raw]
 
 
-        trending_hashtags_raw = processor.get_trending_hashtags(days=time_range_days, limit=10)
+        trending_hashtags_raw = widgets['hashtags'].result()
         topTopics = [{"name": ht['text'], "posts": ht['count'], "engagement": ht['count']*5, "sentiment": 6.5 + (hash(ht['text']) % 30)/10.0 , "trend": "up" if hash(ht['text']) % 2 == 0 else "down"} for ht in trending_hashtags_raw] # Placeholder for engagement/sentiment
 
 
+        topics_raw = widgets['topics'].result()
+        topicClusters = [{
+            "name": t['label'],
+            "keywords": t['keywords'],
+            "posts": t['post_count'],
+            "engagement": t['engagement'],
+            "sentiment": (t['avg_sentiment'] + 1) * 5 if t['avg_sentiment'] is not None else 5.0 # Compound score scaled to 0-10
+        } for t in topics_raw]
+
+
         platform_dist_raw = summary.get('platforms', {})
         platformDistribution = {
             'labels': list(platform_dist_raw.keys()),
             'data': list(platform_dist_raw.values())
         }
 
-        engagement_metrics_raw = analyzer.get_time_series_engagement(days=time_range_days, platform=source if source != 'all' else None)
+        engagement_metrics_raw = widgets['engagement'].result()
         engagementMetrics = { # Assuming daily for now
             'labels': [em['date'] for em in engagement_metrics_raw],
             'datasets': [
@@ -280,39 +429,23 @@ def register_routes(app):
             ]
         }
 
-        # Fetch recent posts, apply keyword filter if present
-        if keyword_filter: # Check if keyword_filter is not empty
-            logger.info(f"Searching posts with keyword: {keyword_filter}")
-            recent_posts_raw = analyzer.search_posts(query_string=keyword_filter, days=time_range_days, limit=50) # Increased limit for filtering
-        else:
-             logger.info("Fetching recent posts (no keyword filter)")
-             # Get latest posts regardless of keyword
-             recent_posts_raw = analyzer.get_top_posts(days=time_range_days, limit=50, metric='created_at_desc') # Assuming a metric for recency exists or implemented
+        recent_posts_raw = widgets['recent_posts'].result()
 
         recentPosts = []
         for p in recent_posts_raw:
              try:
                 # Determine sentiment string
-                score = p.get('sentiment_score', 0)
+                score = p.get('sentiment_score') or 0 # Unscored posts count as neutral
                 sentiment_str = "Positive" if score > 0.05 else "Negative" if score < -0.05 else "Neutral"
 
-                # Ensure created_at is valid before formatting
-                created_at_str = p.get('created_at')
-                formatted_date = ""
-                if created_at_str:
-                     try:
-                        # Handle potential 'Z' for UTC timezone
-                        dt_obj = datetime.fromisoformat(created_at_str.replace('Z', '+00:00'))
-                        # Convert to local time if needed or format directly
-                        formatted_date = dt_obj.strftime('%Y-%m-%d %H:%M')
-                     except ValueError:
-                         logger.warning(f"Could not parse date: {created_at_str}")
-                         formatted_date = created_at_str # Keep original if parsing fails
+                # Rows carry created_at as a datetime
+                created_at = p.get('created_at')
+                formatted_date = created_at.strftime('%Y-%m-%d %H:%M') if created_at else ""
 
                 recentPosts.append({
                     "platform": p.get('platform', 'Unknown'),
-                    "author": p.get('author', 'N/A'),
-                    "content": (p.get('content') or '')[:100] + ("..." if len(p.get('content') or '') > 100 else ""), # Truncate safely
+                    "author": p.get('author') or 'N/A',
+                    "content": p.get('snippet') or '', # Truncated by the query
                     "sentiment": sentiment_str,
                     "sentimentScore": score,
                     "likes": p.get('likes', 0),
@@ -329,6 +462,7 @@ def register_routes(app):
             "sentimentDistribution": sentimentDistribution,
             "wordCloudData": wordCloudData,
             "topTopics": topTopics, # Actually top hashtags in this impl
+            "topicClusters": topicClusters,
             "platformDistribution": platformDistribution,
             "engagementMetrics": engagementMetrics,
             "recentPosts": recentPosts
@@ -336,6 +470,27 @@ def register_routes(app):
         logger.info(f"Returning {len(recentPosts)} recent posts.")
         return jsonify(response_data)
 
+    @app.route('/api/debug/queries', methods=['GET', 'POST', 'DELETE'])
+    def debug_queries_api():
+        """Slowest SQL statements with their plans and recent request profiles of this process.
+
+        POST {"enabled": true|false} toggles profiling; DELETE clears what was recorded.
+        """
+        if not debug_access_allowed():
+            return jsonify({'error': 'Not found'}), 404
+
+        if request.method == 'POST':
+            enabled = (request.get_json(silent=True) or {}).get('enabled')
+            if not isinstance(enabled, bool):
+                return jsonify({'error': 'Expected a JSON body {"enabled": true|false}'}), 400
+            if enabled:
+                profiler.enable()
+            else:
+                profiler.disable()
+        elif request.method == 'DELETE':
+            profiler.reset()
+        return jsonify(profiler.report())
+
     @app.route('/api/collect-data', methods=['POST'])
     def collect_data():
         """Collect data from specified sources."""
@@ -349,14 +504,17 @@ def register_routes(app):
                 return jsonify({'error': 'No keywords provided'}), 400
                 
             # Collect data using the collector
+            collector = get_collector()
             collected_data = collector.collect_all_data(keywords[0], [source], days)
             
             # Save to database
-            collector.save_to_database(collected_data)
+            with session_scope() as session:
+                saved_count = collector.save_to_database(collected_data, session)
             
             return jsonify({
                 'message': 'Data collection completed',
-                'count': len(collected_data)
+                'count': len(collected_data),
+                'saved': saved_count
             })
             
         except Exception as e:
@@ -392,6 +550,7 @@ def register_routes(app):
             logger.info(f"Starting test collection for keyword: {keyword}, source: {source}")
             
             # Collect data
+            collector = get_collector()
             collected_data = collector.collect_all_data(keyword, [source], days)
             logger.info(f"Collected {len(collected_data)} items")
             
@@ -409,8 +568,10 @@ def register_routes(app):
             return jsonify({'error': str(e)}), 500
 
 
-# Create the Flask application instance
-app = create_app()
+# Create the Flask application instance. Worker processes of the scheduler's process pool
+# re-import the main module as __mp_main__ and must not start a second app and election.
+if __name__ != '__mp_main__':
+    app = create_app()
 
 if __name__ == '__main__':
     # Use environment variables for host and port, falling back to defaults
@@ -1,18 +1,44 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Table, Text
+from sqlalchemy import Column, Integer, String, DateTime, Date, Float, ForeignKey, Table, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
 Base = declarative_base()
 
+# Post fields in API payloads, shared by Post.to_dict() and the analyzer's row projections
+POST_SCHEMA = ('id', 'content', 'platform', 'author', 'source_url', 'created_at',
+               'likes', 'shares', 'sentiment_score', 'engagement_score')
+
 # Association table for many-to-many relationship between posts and hashtags
 post_hashtag = Table('post_hashtag', Base.metadata,
     Column('post_id', Integer, ForeignKey('posts.id')),
-    Column('hashtag_id', Integer, ForeignKey('hashtags.id'))
+    Column('hashtag_id', Integer, ForeignKey('hashtags.id')),
+    Index('ix_post_hashtag_post_id_hashtag_id', 'post_id', 'hashtag_id'),
+    Index('ix_post_hashtag_hashtag_id_post_id', 'hashtag_id', 'post_id')
+)
+
+# Association table for topic membership (each post belongs to at most one topic)
+post_topic = Table('post_topic', Base.metadata,
+    Column('post_id', Integer, ForeignKey('posts.id'), primary_key=True),
+    Column('topic_id', Integer, ForeignKey('topics.id')),
+    Index('ix_post_topic_topic_id_post_id', 'topic_id', 'post_id')
 )
 
 class Post(Base):
     __tablename__ = 'posts'
+    __table_args__ = (
+        # Window filters (created_at >= threshold), optionally by platform
+        Index('ix_posts_created_at_platform', 'created_at', 'platform'),
+        # Top posts by engagement: windowed range scans, or walking scores from the top
+        Index('ix_posts_created_at_engagement_score', 'created_at', 'engagement_score'),
+        # Keyset pagination on (sort column, id) seeks straight to the cursor
+        Index('ix_posts_engagement_score_id', 'engagement_score', 'id'),
+        Index('ix_posts_created_at_id', 'created_at', 'id'),
+        # Duplicate detection on ingest and import (not unique: the callers check before inserting)
+        Index('ix_posts_content_hash', 'content_hash'),
+        # Posts still waiting for keyword extraction
+        Index('ix_posts_keywords_extracted_at', 'keywords_extracted_at'),
+    )
 
     id = Column(Integer, primary_key=True)
     content = Column(Text)
@@ -24,28 +50,25 @@ class Post(Base):
     source_url = Column(String(500), nullable=True)
     author = Column(String(200), nullable=True)
     engagement_score = Column(Float, nullable=True)
+    content_hash = Column(String(64), nullable=True)  # sha256 of platform + normalized content
+    keywords_extracted_at = Column(DateTime, nullable=True)  # Set even when the text yields no keywords
 
     # Relationships
     keywords = relationship("Keyword", back_populates="post")
     hashtags = relationship("Hashtag", secondary=post_hashtag, back_populates="posts")
+    topics = relationship("Topic", secondary=post_topic, back_populates="posts")
 
     def to_dict(self):
-        """Convert post to dictionary for API responses."""
-        return {
-            'id': self.id,
-            'content': self.content,
-            'platform': self.platform,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'likes': self.likes,
-            'shares': self.shares,
-            'sentiment_score': self.sentiment_score,
-            'source_url': self.source_url,
-            'author': self.author,
-            'engagement_score': self.engagement_score
-        }
+        """Convert post to dictionary for API responses (datetimes are encoded by the JSON provider)."""
+        return {field: getattr(self, field) for field in POST_SCHEMA}
 
 class Keyword(Base):
     __tablename__ = 'keywords'
+    __table_args__ = (
+        # Keyword -> post joins, and GROUP BY text
+        Index('ix_keywords_post_id_text', 'post_id', 'text'),
+        Index('ix_keywords_text', 'text'),
+    )
 
     id = Column(Integer, primary_key=True)
     post_id = Column(Integer, ForeignKey('posts.id'))
@@ -62,4 +85,65 @@ class Hashtag(Base):
     text = Column(String, unique=True)
 
     # Relationship
-    posts = relationship("Post", secondary=post_hashtag, back_populates="hashtags") 
\ No newline at end of file
+    posts = relationship("Post", secondary=post_hashtag, back_populates="hashtags") 
+
+class Topic(Base):
+    __tablename__ = 'topics'
+
+    id = Column(Integer, primary_key=True)
+    label = Column(String(200))
+    keywords = Column(Text)  # JSON mapping keyword -> frequency
+    signature = Column(Text)  # JSON list of MinHash values
+    post_count = Column(Integer, default=0)
+    sentiment_sum = Column(Float, default=0.0)
+    sentiment_count = Column(Integer, default=0)
+    weight = Column(Float, default=0.0)  # Decayed activity as of updated_at
+    is_active = Column(Boolean, default=True)
+    merged_into_id = Column(Integer, ForeignKey('topics.id'), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationship
+    posts = relationship("Post", secondary=post_topic, back_populates="topics")
+
+class HourlyRollup(Base):
+    __tablename__ = 'rollup_hourly'
+
+    bucket = Column(DateTime, primary_key=True)  # Start of the hour (UTC)
+    platform = Column(String(50), primary_key=True)
+    post_count = Column(Integer, default=0)
+    likes_sum = Column(Integer, default=0)
+    shares_sum = Column(Integer, default=0)
+    positive_count = Column(Integer, default=0)
+    neutral_count = Column(Integer, default=0)
+    negative_count = Column(Integer, default=0)
+
+class KeywordDailyRollup(Base):
+    __tablename__ = 'rollup_keyword_daily'
+
+    day = Column(Date, primary_key=True)
+    platform = Column(String(50), primary_key=True)
+    keyword = Column(String, primary_key=True)
+    frequency = Column(Integer, default=0)  # Sum of per-post keyword frequencies
+    post_count = Column(Integer, default=0)  # Posts mentioning the keyword
+
+class SchedulerLease(Base):
+    __tablename__ = 'scheduler_leases'
+
+    name = Column(String(50), primary_key=True)
+    holder = Column(String(200))  # host:pid:nonce of the process holding the lease
+    acquired_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+    expires_at = Column(DateTime)  # Other processes may take over after this
+
+class CollectionTarget(Base):
+    __tablename__ = 'collection_targets'
+
+    keyword = Column(String(200), primary_key=True)
+    source = Column(String(50), primary_key=True)
+    interval_seconds = Column(Float)  # Adapted to the target's yield after every run
+    next_run_at = Column(DateTime)
+    last_run_at = Column(DateTime, nullable=True)
+    last_new_posts = Column(Integer, default=0)
+    yield_rate = Column(Float, default=0.0)  # Smoothed new posts per hour
+    runs = Column(Integer, default=0)
@@ -1,13 +1,71 @@
+import json
 import pandas as pd
 # import numpy as np # Not explicitly used
-from sqlalchemy import func, desc, or_ # Removed 'and_' as it's not used
+from sqlalchemy import func, desc, asc, or_, and_, select
+from sqlalchemy.orm import aliased
 from datetime import datetime, timedelta
 from collections import Counter
-from sqlalchemy import case
+from sqlalchemy import case, column, table, text, literal_column
 
-from app.models.post import Post, Hashtag, Keyword # Keyword is not directly used here but good for context
-from database.db import session_scope
+from app.models.post import Post, Hashtag, Topic, post_hashtag, post_topic, POST_SCHEMA
+from database.db import read_session_scope, read_engine
+from database.reads import fetch_rows
+from database.schema import has_search_index
 from app.services.processor import DataProcessor
+from app.services.rollups import RollupService
+from app.services.timeseries import TimeSeriesEngine, ALL_PLATFORMS
+from app.config import get_config
+from app.utils.search import build_fts_query, build_tsquery
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_after
+
+# Bucket label formats used by the activity endpoints
+ACTIVITY_LABEL_FORMATS = {
+    'hour': '%Y-%m-%d %H:00',
+    'day': '%Y-%m-%d',
+    'week': '%Y-%W',
+    'month': '%Y-%m',
+}
+
+# Post fields selectable with a fields= projection ('snippet' is content truncated in SQL)
+POST_FIELDS = POST_SCHEMA + ('snippet',)
+SEARCH_POST_FIELDS = ('id', 'content', 'platform', 'created_at', 'likes', 'shares', 'sentiment_score')
+TOP_POST_FIELDS = SEARCH_POST_FIELDS + ('engagement_score',)
+
+# Top-post metric -> column its keyset cursor pages over
+TOP_POST_ORDERINGS = {
+    'engagement': Post.engagement_score,
+    'sentiment': Post.sentiment_score,
+    'created_at_desc': Post.created_at,
+}
+
+MAX_PAGE_SIZE = 500
+
+
+def resolve_post_fields(fields, default):
+    """Validate a fields= projection given as a comma-separated string or a sequence."""
+    if not fields:
+        return tuple(default)
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    fields = tuple(dict.fromkeys(field.strip() for field in fields if field.strip()))
+    unknown = [field for field in fields if field not in POST_FIELDS]
+    if unknown:
+        raise ValueError(f"Unsupported fields: {', '.join(unknown)}")
+    return fields or tuple(default)
+
+
+def post_columns(fields, snippet_length):
+    """Labelled columns selecting only the requested post fields (plus id, used by cursors)."""
+    columns = [Post.id.label('id')]
+    for field in fields:
+        if field == 'id':
+            continue
+        if field == 'snippet':
+            truncated = func.substr(Post.content, 1, snippet_length).concat('...')
+            columns.append(case((func.length(Post.content) > snippet_length, truncated), else_=Post.content).label('snippet'))
+        else:
+            columns.append(getattr(Post, field).label(field))
+    return columns
 
 
 class DataAnalyzer:
@@ -16,251 +74,283 @@ class DataAnalyzer:
     def __init__(self):
         """Initialize data analyzer."""
         self.processor = DataProcessor()
+        self.rollups = RollupService()
+        self.timeseries = TimeSeriesEngine()
+        self._search_index = None  # Resolved on first search
+        self.snippet_length = get_config().POST_SNIPPET_LENGTH
     
     def get_dashboard_summary(self, days=7):
         """Get summary statistics for the dashboard."""
-        with session_scope() as session:
+        with read_session_scope() as session:
             threshold_date = datetime.utcnow() - timedelta(days=days)
             
-            # Get total posts
-            total_posts = session.query(func.count(Post.id)).filter(
-                Post.created_at >= threshold_date
-            ).scalar() or 0
+            # One grouped scan per platform (whole hours from rollups, edge hours from
+            # raw posts) yields every metric; totals are derived below
+            platform_totals = self.rollups.platform_totals(session, threshold_date)
             
-            # Get engagement metrics
-            engagement = session.query(
-                func.sum(Post.likes).label('total_likes'),
-                func.sum(Post.shares).label('total_shares')
-            ).filter(
-                Post.created_at >= threshold_date
-            ).first()
-            
-            # Sentiment distribution
-            sentiment_distribution = session.query(
-                func.sum(case((Post.sentiment_score < -0.05, 1), else_=0)).label('negative'),
-                func.sum(case((Post.sentiment_score >= -0.05, 1), else_=0)).label('neutral'),
-                func.sum(case((Post.sentiment_score > 0.05, 1), else_=0)).label('positive')
-            ).filter(
-                Post.created_at >= threshold_date
-            ).first()
-            
-            # Get platform distribution
-            platform_dist = session.query(
-                Post.platform,
-                func.count(Post.id)
-            ).filter(
-                Post.created_at >= threshold_date
-            ).group_by(
-                Post.platform
-            ).all()
+            def total(metric):
+                return sum(metrics[metric] for metrics in platform_totals.values())
             
             return {
-                'total_posts': total_posts,
+                'total_posts': total('post_count'),
                 'engagement': {
-                    'total_likes': engagement.total_likes or 0,
-                    'total_shares': engagement.total_shares or 0
+                    'total_likes': total('likes_sum'),
+                    'total_shares': total('shares_sum')
                 },
                 'sentiment': {
-                    'positive': sentiment_distribution.positive or 0,
-                    'negative': sentiment_distribution.negative or 0,
-                    'neutral': sentiment_distribution.neutral or 0
+                    'positive': total('positive_count'),
+                    'negative': total('negative_count'),
+                    'neutral': total('neutral_count')
                 },
-                'platforms': dict(platform_dist)
+                'platforms': {platform: metrics['post_count'] for platform, metrics in platform_totals.items()},
+                'platform_metrics': {platform: {
+                    'posts': metrics['post_count'],
+                    'likes': metrics['likes_sum'],
+                    'shares': metrics['shares_sum'],
+                    'positive': metrics['positive_count'],
+                    'neutral': metrics['neutral_count'],
+                    'negative': metrics['negative_count']
+                } for platform, metrics in platform_totals.items()}
             }
     
     def get_trending_topics(self, days=7, limit=10):
         """Get trending topics based on keyword frequency."""
-        with session_scope() as session:
+        with read_session_scope() as session:
             threshold_date = datetime.utcnow() - timedelta(days=days)
             
-            keywords = session.query(
-                Keyword.text,
-                func.sum(Keyword.frequency).label('total_frequency')
+            return {
+                'keywords': self.rollups.top_keywords(session, threshold_date, limit)
+            }
+    
+    def get_topics(self, days=7, limit=10):
+        """Get the most active stored topic clusters with per-topic counts and sentiment."""
+        with read_session_scope() as session:
+            threshold_date = datetime.utcnow() - timedelta(days=days)
+            
+            topics = session.query(
+                Topic.id,
+                Topic.label,
+                Topic.keywords,
+                func.count(Post.id).label('post_count'),
+                func.avg(Post.sentiment_score).label('avg_sentiment'),
+                func.sum(Post.likes + Post.shares).label('engagement')
+            ).join(
+                post_topic, post_topic.c.topic_id == Topic.id
             ).join(
-                Post, Keyword.post_id == Post.id
+                Post, Post.id == post_topic.c.post_id
             ).filter(
                 Post.created_at >= threshold_date
             ).group_by(
-                Keyword.text
+                Topic.id, Topic.label, Topic.keywords
             ).order_by(
-                desc('total_frequency')
+                desc('post_count')
             ).limit(limit).all()
             
-            return {
-                'keywords': [{'text': k.text, 'frequency': int(k.total_frequency)} for k in keywords]
-            }
+            return [{
+                'id': t.id,
+                'label': t.label,
+                'keywords': list(json.loads(t.keywords or '{}'))[:5],
+                'post_count': int(t.post_count),
+                'avg_sentiment': float(t.avg_sentiment) if t.avg_sentiment is not None else None,
+                'engagement': int(t.engagement or 0)
+            } for t in topics]
     
-    def get_top_posts(self, days=7, metric='engagement', limit=10):
+    def get_top_posts(self, days=7, metric='engagement', limit=10, fields=None):
         """Get top posts by specified metric."""
-        with session_scope() as session:
-            threshold_date = datetime.utcnow() - timedelta(days=days)
-            
-            query = session.query(Post).filter(
-                Post.created_at >= threshold_date
-            )
-            
-            if metric == 'engagement':
-                query = query.order_by(desc(Post.likes + Post.shares))
-            elif metric == 'sentiment':
-                query = query.order_by(desc(Post.sentiment_score))
-            elif metric == 'created_at_desc':
-                query = query.order_by(desc(Post.created_at))
-            
-            posts = query.limit(limit).all()
-            
-            return [{
-                'id': post.id,
-                'content': post.content,
-                'platform': post.platform,
-                'created_at': post.created_at.isoformat(),
-                'likes': post.likes,
-                'shares': post.shares,
-                'sentiment_score': post.sentiment_score
-            } for post in posts]
+        return self.get_top_posts_page(days, metric, limit, fields=fields)['posts']
+    
+    def get_top_posts_page(self, days=7, metric='engagement', limit=10, cursor=None, fields=None):
+        """Get one page of top posts by metric as {'posts': [...], 'next_cursor': str or None}.
+        
+        Pages by keyset on (metric, id), so each page costs the same however deep it is.
+        """
+        if metric not in TOP_POST_ORDERINGS:
+            raise ValueError(f"Unsupported metric: {metric}")
+        fields = resolve_post_fields(fields, TOP_POST_FIELDS)
+        sort_column = TOP_POST_ORDERINGS[metric]
+        threshold_date = datetime.utcnow() - timedelta(days=days)
+        
+        query = select(
+            *post_columns(fields, self.snippet_length),
+            sort_column.label('sort_value')
+        ).where(
+            Post.created_at >= threshold_date
+        )
+        
+        if metric != 'created_at_desc':
+            # Unscored posts have no rank (and no position a cursor could point at)
+            query = query.where(sort_column.isnot(None))
+        
+        return self._keyset_page(query, sort_column, metric, fields, limit, cursor,
+                                 is_datetime=metric == 'created_at_desc')
+    
+    def _keyset_page(self, query, sort_column, sort_name, fields, limit, cursor, descending=True, is_datetime=False):
+        """Fetch one page of a projected post select ordered by (sort_column, id)."""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        
+        if cursor:
+            sort_value, row_id = decode_cursor(cursor, sort_name, is_datetime)
+            query = query.where(keyset_after(sort_column, Post.id, sort_value, row_id, descending))
+        
+        direction = desc if descending else asc
+        rows = fetch_rows(query.order_by(direction(sort_column), direction(Post.id)).limit(limit + 1), 'PostRow')
+        
+        # One extra row tells whether there is a next page
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(sort_name, rows[-1].sort_value, rows[-1].id)
+        
+        # created_at stays a datetime; the JSON provider encodes it
+        posts = [{field: getattr(row, field) for field in fields} for row in rows]
+        
+        return {'posts': posts, 'next_cursor': next_cursor}
     
     def get_time_series_activity(self, days=7, interval='day'):
         """Get post activity over time."""
-        with session_scope() as session:
+        with read_session_scope() as session:
             end_date = datetime.utcnow()
             threshold_date = end_date - timedelta(days=days)
             
-            posts = session.query(
-                Post.created_at,
-                Post.platform
-            ).filter(
-                Post.created_at >= threshold_date,
-                Post.created_at <= end_date
-            ).all()
-            
-            # Group by platform and time interval
-            activity_data = {}
-            for post in posts:
-                platform = post.platform
-                if platform not in activity_data:
-                    activity_data[platform] = {}
-                
-                # Format date based on interval
-                if interval == 'hour':
-                    date_key = post.created_at.strftime('%Y-%m-%d %H:00')
-                elif interval == 'day':
-                    date_key = post.created_at.strftime('%Y-%m-%d')
-                else:  # week
-                    date_key = post.created_at.strftime('%Y-%W')
-                
-                activity_data[platform][date_key] = activity_data[platform].get(date_key, 0) + 1
-            
-            # Convert to list format
-            result = []
-            all_dates = sorted(set(
-                date for platform_data in activity_data.values()
-                for date in platform_data.keys()
-            ))
-            
-            for date in all_dates:
-                entry = {'date': date}
-                for platform in activity_data:
-                    entry[platform] = activity_data[platform].get(date, 0)
-                result.append(entry)
+            activity = self.timeseries.query(
+                session, threshold_date, end_date, interval, metrics=('posts',), by_platform=True
+            )
             
-            return result
+            # Convert columns to one entry per bucket with a count per platform
+            date_format = ACTIVITY_LABEL_FORMATS.get(interval, '%Y-%m-%d')
+            return [
+                {'date': bucket.strftime(date_format),
+                 **{platform: columns['posts'][index] for platform, columns in activity['series'].items()}}
+                for index, bucket in enumerate(activity['buckets'])
+            ]
     
     def get_time_series_engagement(self, days=7, platform=None):
         """Get engagement metrics over time."""
-        with session_scope() as session:
+        with read_session_scope() as session:
             end_date = datetime.utcnow()
             threshold_date = end_date - timedelta(days=days)
             
-            query = session.query(
-                Post.created_at,
-                func.avg(Post.likes).label('avg_likes'),
-                func.avg(Post.shares).label('avg_shares')
-            ).filter(
-                Post.created_at >= threshold_date,
-                Post.created_at <= end_date
-            )
-            
-            if platform:
-                query = query.filter(Post.platform == platform)
-            
-            query = query.group_by(
-                func.date(Post.created_at)
-            ).order_by(
-                func.date(Post.created_at)
+            engagement = self.timeseries.query(
+                session, threshold_date, end_date, 'day', metrics=('avg_likes', 'avg_shares'), platform=platform
             )
-            
-            results = query.all()
+            columns = engagement['series'][ALL_PLATFORMS]
             
             return [{
-                'date': result.created_at.strftime('%Y-%m-%d'),
-                'avg_likes': float(result.avg_likes or 0),
-                'avg_shares': float(result.avg_shares or 0)
-            } for result in results]
+                'date': bucket.strftime('%Y-%m-%d'),
+                'avg_likes': float(columns['avg_likes'][index]),
+                'avg_shares': float(columns['avg_shares'][index])
+            } for index, bucket in enumerate(engagement['buckets'])]
     
     def get_hashtag_network(self, days=7, limit=20):
         """Get hashtag co-occurrence network."""
-        with session_scope() as session:
-            threshold_date = datetime.utcnow() - timedelta(days=days)
-            
-            # Get all hashtags and their posts within the time range
-            hashtags = session.query(Hashtag).join(
-                Hashtag.posts
-            ).filter(
-                Post.created_at >= threshold_date
-            ).all()
-            
-            # Build co-occurrence matrix
-            co_occurrence = {}
-            for hashtag in hashtags:
-                for post in hashtag.posts:
-                    if post.created_at >= threshold_date:
-                        for other_hashtag in post.hashtags:
-                            if other_hashtag.id != hashtag.id:
-                                key = tuple(sorted([hashtag.text, other_hashtag.text]))
-                                co_occurrence[key] = co_occurrence.get(key, 0) + 1
-            
-            # Convert to list format
-            edges = [
-                {
-                    'source': pair[0],
-                    'target': pair[1],
-                    'weight': count
-                }
-                for pair, count in sorted(
-                    co_occurrence.items(),
-                    key=lambda x: x[1],
-                    reverse=True
-                )[:limit]
-            ]
-            
-            # Get unique nodes
-            nodes = set()
-            for edge in edges:
-                nodes.add(edge['source'])
-                nodes.add(edge['target'])
-            
-            return {
-                'nodes': [{'id': node} for node in nodes],
-                'edges': edges
-            }
+        threshold_date = datetime.utcnow() - timedelta(days=days)
+        
+        # Self-join post_hashtag on post_id; hashtag_id < hashtag_id counts each pair once
+        first = post_hashtag.alias('first')
+        second = post_hashtag.alias('second')
+        pair_counts = select(
+            first.c.hashtag_id.label('source_id'),
+            second.c.hashtag_id.label('target_id'),
+            func.count().label('weight')
+        ).join(
+            second, and_(first.c.post_id == second.c.post_id, first.c.hashtag_id < second.c.hashtag_id)
+        ).join(
+            Post, Post.id == first.c.post_id
+        ).where(
+            Post.created_at >= threshold_date
+        ).group_by(
+            first.c.hashtag_id, second.c.hashtag_id
+        ).order_by(
+            desc('weight')
+        ).limit(limit).subquery()
+        
+        source_tag = aliased(Hashtag)
+        target_tag = aliased(Hashtag)
+        pairs = fetch_rows(select(
+            source_tag.text.label('source'),
+            target_tag.text.label('target'),
+            pair_counts.c.weight
+        ).join_from(
+            pair_counts, source_tag, source_tag.id == pair_counts.c.source_id
+        ).join(
+            target_tag, target_tag.id == pair_counts.c.target_id
+        ).order_by(
+            desc(pair_counts.c.weight)
+        ), 'HashtagPair')
+        
+        # Convert to list format
+        edges = []
+        for pair in pairs:
+            source, target = sorted([pair.source, pair.target])
+            edges.append({
+                'source': source,
+                'target': target,
+                'weight': pair.weight
+            })
+        
+        # Get unique nodes
+        nodes = set()
+        for edge in edges:
+            nodes.add(edge['source'])
+            nodes.add(edge['target'])
+        
+        return {
+            'nodes': [{'id': node} for node in nodes],
+            'edges': edges
+        }
 
-    def search_posts(self, query_string, days=30, limit=50):
-        """Search posts by content."""
-        with session_scope() as session:
-            threshold_date = datetime.utcnow() - timedelta(days=days)
-            
-            posts = session.query(Post).filter(
-                Post.created_at >= threshold_date,
-                Post.content.ilike(f'%{query_string}%')
-            ).order_by(
-                desc(Post.created_at)
-            ).limit(limit).all()
-            
-            return [{
-                'id': post.id,
-                'content': post.content,
-                'platform': post.platform,
-                'created_at': post.created_at.isoformat(),
-                'likes': post.likes,
-                'shares': post.shares,
-                'sentiment_score': post.sentiment_score
-            } for post in posts]
+    def _search_index_available(self):
+        """Check (once) whether the full-text index exists."""
+        if self._search_index is None:
+            self._search_index = has_search_index(read_engine)
+        return self._search_index
+    
+    def search_posts(self, query_string, days=30, limit=50, order='relevance', fields=None):
+        """Search posts by content, ranked by relevance (or by recency with order='recent').
+        
+        Supports "quoted phrases" and prefix* terms; all terms must match.
+        """
+        return self.search_posts_page(query_string, days, limit, order, fields=fields)['posts']
+    
+    def search_posts_page(self, query_string, days=30, limit=50, order='relevance', cursor=None, fields=None):
+        """Get one page of search results as {'posts': [...], 'next_cursor': str or None}."""
+        fields = resolve_post_fields(fields, SEARCH_POST_FIELDS)
+        
+        threshold_date = datetime.utcnow() - timedelta(days=days)
+        dialect_name = read_engine.dialect.name
+        
+        rank, descending, posts_fts = None, True, None
+        if self._search_index_available() and dialect_name == 'sqlite':
+            match_expression = build_fts_query(query_string)
+            if not match_expression:
+                return {'posts': [], 'next_cursor': None}
+            posts_fts = table('posts_fts', column('rowid'))
+            match_filter = text('posts_fts MATCH :match_expression').bindparams(match_expression=match_expression)
+            # bm25() is lower for better matches
+            rank, descending = literal_column('bm25(posts_fts)'), False
+        elif self._search_index_available() and dialect_name == 'postgresql':
+            tsquery_expression = build_tsquery(query_string)
+            if not tsquery_expression:
+                return {'posts': [], 'next_cursor': None}
+            document = func.to_tsvector('english', func.coalesce(Post.content, ''))
+            tsquery = func.to_tsquery('english', tsquery_expression)
+            match_filter = document.op('@@')(tsquery)
+            rank = func.ts_rank(document, tsquery)
+        else:
+            match_filter = Post.content.ilike(f'%{query_string}%')
+        
+        if order == 'relevance' and rank is not None:
+            sort_column, sort_name = rank, 'relevance'
+        else:
+            sort_column, sort_name, descending = Post.created_at, 'recent', True
+        
+        query = select(
+            *post_columns(fields, self.snippet_length),
+            sort_column.label('sort_value')
+        )
+        if posts_fts is not None:
+            query = query.join_from(Post, posts_fts, posts_fts.c.rowid == Post.id)
+        query = query.where(Post.created_at >= threshold_date, match_filter)
+        
+        return self._keyset_page(query, sort_column, sort_name, fields, limit, cursor,
+                                 descending=descending, is_datetime=sort_name == 'recent')
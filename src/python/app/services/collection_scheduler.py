@@ -0,0 +1,192 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.models.post import CollectionTarget
+from database.db import session_scope, read_session_scope
+from app.config import get_config
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest run in a target's smoothed yield rate
+YIELD_SMOOTHING = 0.5
+
+# Lookback window passed to the scrapers; dedupe drops what earlier runs already saved
+COLLECTION_LOOKBACK_DAYS = 7
+
+
+def next_interval(interval, new_posts, yield_rate, limit, target_fill, min_interval, max_interval):
+    """Interval after a run, sized so the next run should return about target_fill * limit new posts.
+
+    A run that filled the whole limit probably missed posts and halves the interval; a
+    target with no yield doubles it. Intervals change at most 2x per run.
+    """
+    if new_posts >= limit:
+        proposal = interval / 2
+    elif yield_rate <= 0:
+        proposal = interval * 2
+    else:
+        proposal = target_fill * limit / yield_rate * 3600
+    proposal = min(max(proposal, interval / 2), interval * 2)
+    return min(max(proposal, min_interval), max_interval)
+
+
+class ScrapeBudget:
+    """Token bucket limiting scrapes per hour across every keyword and source."""
+
+    def __init__(self, per_hour, burst):
+        """Initialize a full bucket."""
+        self.rate = per_hour / 3600
+        self.capacity = max(1.0, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self):
+        """Spend one scrape if the budget allows it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class CollectionScheduler:
+    """Class for scheduling keyword scrapes by their recent yield of new posts.
+
+    Each (keyword, source) gets its own interval: targets that keep returning new posts are
+    scraped more often, quiet ones back off, and a shared budget caps total scrapes so busy
+    keywords get fresher without the collector doing more work overall.
+    """
+
+    def __init__(self, keywords=None, sources=None, collector_factory=None):
+        """Initialize the scheduler for the configured keywords and sources."""
+        self.config = get_config()
+        self.keywords = list(keywords or self.config.DEFAULT_KEYWORDS)
+        self.sources = list(sources or self.config.COLLECTION_SOURCES)
+        self.limit = self.config.POST_LIMIT
+        self.collector_factory = collector_factory
+
+        # By default, spend exactly what scraping every target each COLLECTION_INTERVAL would
+        target_count = len(self.keywords) * len(self.sources)
+        per_hour = self.config.COLLECTION_BUDGET_PER_HOUR or target_count * 3600 / self.config.COLLECTION_INTERVAL
+        self.budget = ScrapeBudget(per_hour, burst=target_count)
+
+    def sync_targets(self, now=None):
+        """Create schedule rows for configured targets that don't have one yet (due at once)."""
+        now = now or datetime.utcnow()
+        with session_scope() as session:
+            existing = set(session.execute(select(CollectionTarget.keyword, CollectionTarget.source)).tuples())
+            for keyword in self.keywords:
+                for source in self.sources:
+                    if (keyword, source) not in existing:
+                        session.add(CollectionTarget(
+                            keyword=keyword, source=source, interval_seconds=float(self.config.COLLECTION_INTERVAL),
+                            next_run_at=now, last_new_posts=0, yield_rate=0.0, runs=0
+                        ))
+
+    def due_targets(self, now=None):
+        """Configured (keyword, source) pairs whose next run has passed, highest priority first.
+
+        Priority is yield times lateness, so when the budget can't cover every due target the
+        productive ones go first and the rest wait for the next tick.
+        """
+        now = now or datetime.utcnow()
+        with read_session_scope() as session:
+            rows = session.execute(
+                select(CollectionTarget.keyword, CollectionTarget.source, CollectionTarget.next_run_at,
+                       CollectionTarget.yield_rate).where(CollectionTarget.next_run_at <= now)
+            ).all()
+
+        configured = {(keyword, source) for keyword in self.keywords for source in self.sources}
+        due = [row for row in rows if (row.keyword, row.source) in configured]
+        due.sort(key=lambda row: ((row.yield_rate or 0) + 1) * ((now - row.next_run_at).total_seconds() + 1),
+                 reverse=True)
+        return [(row.keyword, row.source) for row in due]
+
+    def run_due(self, now=None):
+        """Scrape due targets within the budget, one browser for the whole tick.
+
+        Returns {'runs', 'new_posts', 'deferred'}.
+        """
+        self.sync_targets(now)
+        due = self.due_targets(now)
+        runs = new_total = 0
+        collector = None
+        try:
+            for keyword, source in due:
+                if not self.budget.take():
+                    break
+                if collector is None:
+                    collector = self._create_collector()
+
+                data = collector.collect_all_data(keyword, [source], COLLECTION_LOOKBACK_DAYS, self.limit)
+                with session_scope() as session:
+                    new_posts = collector.save_to_database(data, session)
+
+                interval = self.record_run(keyword, source, new_posts)
+                logger.info(f"Collected {new_posts} new posts for '{keyword}' from {source}; next in {interval / 60:.0f} min")
+                runs += 1
+                new_total += new_posts
+        finally:
+            if collector is not None:
+                collector.cleanup()
+
+        return {'runs': runs, 'new_posts': new_total, 'deferred': len(due) - runs}
+
+    def _create_collector(self):
+        """Start the browser-backed collector (imported lazily; it pulls in Selenium)."""
+        if self.collector_factory is not None:
+            return self.collector_factory()
+        from app.services.collector import DataCollector
+        return DataCollector()
+
+    def record_run(self, keyword, source, new_posts, now=None):
+        """Update a target's yield and schedule its next run; returns the new interval in seconds."""
+        now = now or datetime.utcnow()
+        with session_scope() as session:
+            target = session.get(CollectionTarget, (keyword, source))
+            interval = target.interval_seconds
+
+            # The first run sweeps the whole lookback window, so it says nothing about the rate
+            if target.runs and target.last_run_at:
+                elapsed_hours = max((now - target.last_run_at).total_seconds() / 3600, 1 / 60)
+                rate = new_posts / elapsed_hours
+                target.yield_rate = rate if target.runs == 1 else (
+                    YIELD_SMOOTHING * rate + (1 - YIELD_SMOOTHING) * (target.yield_rate or 0)
+                )
+                interval = next_interval(
+                    interval, new_posts, target.yield_rate, self.limit, self.config.COLLECTION_TARGET_FILL,
+                    self.config.COLLECTION_MIN_INTERVAL, self.config.COLLECTION_MAX_INTERVAL
+                )
+
+            # Jitter keeps targets from drifting into lockstep
+            jitter = random.uniform(1 - self.config.COLLECTION_JITTER, 1 + self.config.COLLECTION_JITTER)
+            target.interval_seconds = interval
+            target.next_run_at = now + timedelta(seconds=interval * jitter)
+            target.last_run_at = now
+            target.last_new_posts = new_posts
+            target.runs = (target.runs or 0) + 1
+        return interval
+
+    def status(self):
+        """Schedule rows of the configured targets, soonest first."""
+        with read_session_scope() as session:
+            rows = session.execute(select(CollectionTarget).order_by(CollectionTarget.next_run_at)).scalars().all()
+            return [{
+                'keyword': row.keyword,
+                'source': row.source,
+                'interval_seconds': row.interval_seconds,
+                'next_run_at': row.next_run_at,
+                'last_run_at': row.last_run_at,
+                'last_new_posts': row.last_new_posts,
+                'yield_rate': row.yield_rate,
+                'runs': row.runs,
+            } for row in rows if row.keyword in self.keywords and row.source in self.sources]
@@ -696,22 +696,27 @@ class DataCollector:
         logger.info(f"Total data collected: {len(all_data)} items")
         return all_data
     
-    def save_to_database(self, data: List[Dict[str, Any]], db_session) -> None:
-        """Save collected data to the database."""
+    def save_to_database(self, data: List[Dict[str, Any]], db_session) -> int:
+        """Save collected data to the database; returns the number of new posts."""
         from app.models.post import Post  # Import here to avoid circular imports
+        from app.services.rollups import RollupBatch
+        from app.utils.cache import bump_data_version
+        from app.utils.engagement import engagement_score
+        from app.utils.nlp import content_hash
         
         if not data:
             logger.warning("No data to save to database")
-            return
+            return 0
             
         try:
             saved_count = 0
+            rollup_batch = RollupBatch()
             for item in data:
                 try:
                     # Check if post already exists (by content and platform)
-                    existing_post = db_session.query(Post).filter(
-                        Post.content == item['content'],
-                        Post.platform == item['platform']
+                    post_hash = content_hash(item['platform'], item['content'])
+                    existing_post = db_session.query(Post.id).filter(
+                        Post.content_hash == post_hash
                     ).first()
                     
                     if existing_post:
@@ -727,17 +732,23 @@ class DataCollector:
                         sentiment_score=item['sentiment_score'],
                         source_url=item.get('source_url'),
                         author=item.get('author'),
-                        engagement_score=item.get('engagement_score', 0.0)
+                        engagement_score=engagement_score(item['platform'], item['likes'], item['shares']),
+                        content_hash=post_hash
                     )
                     db_session.add(post)
+                    rollup_batch.add_post(post.created_at, post.platform, post.likes, post.shares, post.sentiment_score)
                     saved_count += 1
                     
                 except Exception as e:
                     logger.error(f"Error saving individual post: {str(e)}", exc_info=True)
                     continue
                     
+            rollup_batch.apply(db_session)
             db_session.commit()
+            if saved_count:
+                bump_data_version()
             logger.info(f"Successfully saved {saved_count} new items to database")
+            return saved_count
             
         except Exception as e:
             db_session.rollback()
@@ -756,7 +767,7 @@ def collect_and_save_data(source: str, keywords: List[str], session_scope, limit
         days (int): Number of days to look back for data
         
     Returns:
-        int: Total number of posts collected and saved
+        int: Total number of new posts saved (duplicates are not counted)
     """
     collector = None
     total_posts = 0
@@ -775,9 +786,7 @@ def collect_and_save_data(source: str, keywords: List[str], session_scope, limit
             
             # Save to database
             with session_scope() as session:
-                collector.save_to_database(data, session)
-                
-            total_posts += len(data)
+                total_posts += collector.save_to_database(data, session)
             
     except Exception as e:
         logger.error(f"Error in collect_and_save_data: {str(e)}")
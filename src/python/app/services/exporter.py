@@ -0,0 +1,143 @@
+import csv
+import io
+import logging
+from datetime import datetime
+
+from app.config import get_config
+from app.services.rollups import sentiment_label
+from app.services.retention import RetentionService
+from app.utils.serialization import dumps_bytes
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+EXPORT_COLUMNS = ('id', 'platform', 'author', 'created_at', 'content', 'likes', 'shares',
+                  'sentiment_score', 'sentiment', 'engagement_score', 'source_url', 'keywords')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that buffers bytes until they are drained into the response."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        # The Parquet writer records column chunk offsets from the stream position
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class DataExporter:
+    """Class for streaming posts, their keywords and sentiment out in bulk formats."""
+
+    def __init__(self, batch_size=None):
+        """Initialize the exporter."""
+        self.batch_size = batch_size or get_config().EXPORT_BATCH_SIZE
+        self.retention = RetentionService()
+
+    def iter_batches(self, start=None, end=None, platform=None):
+        """Yield lists of export rows, batch_size posts at a time, from the hot and archive tiers.
+
+        Each hot batch is a short keyset read on the primary key in its own session, so no
+        read transaction (or SQLite lock) stays open while the client downloads.
+        """
+        for posts in self.retention.iter_post_batches(start, end, platform, self.batch_size):
+            yield [{
+                **{column: post[column] for column in EXPORT_COLUMNS if column != 'sentiment'},
+                'sentiment': sentiment_label(post['sentiment_score'])
+            } for post in posts]
+
+    def stream(self, export_format, start=None, end=None, platform=None):
+        """Yield the export as encoded byte chunks, one or more per batch."""
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        if export_format == 'parquet' and not PARQUET_AVAILABLE:
+            raise ValueError("Parquet export requires pyarrow")
+
+        batches = self.iter_batches(start, end, platform)
+        if export_format == 'ndjson':
+            return self._stream_ndjson(batches)
+        if export_format == 'csv':
+            return self._stream_csv(batches)
+        return self._stream_parquet(batches)
+
+    def _stream_ndjson(self, batches):
+        """One JSON object per line."""
+        for rows in batches:
+            yield b''.join(dumps_bytes(row) + b'\n' for row in rows)
+
+    def _stream_csv(self, batches):
+        """CSV with a header row; keywords are joined with spaces."""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        for rows in batches:
+            for row in rows:
+                row['created_at'] = row['created_at'].isoformat() if row['created_at'] else ''
+                row['keywords'] = ' '.join(row['keywords'])
+                writer.writerow(row)
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+
+    def _stream_parquet(self, batches):
+        """Parquet file written one row group per batch."""
+        schema = pa.schema([
+            ('id', pa.int64()),
+            ('platform', pa.string()),
+            ('author', pa.string()),
+            ('created_at', pa.timestamp('us')),
+            ('content', pa.string()),
+            ('likes', pa.int64()),
+            ('shares', pa.int64()),
+            ('sentiment_score', pa.float64()),
+            ('sentiment', pa.string()),
+            ('engagement_score', pa.float64()),
+            ('source_url', pa.string()),
+            ('keywords', pa.list_(pa.string())),
+        ])
+
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema, compression='snappy')
+        try:
+            for rows in batches:
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()  # Footer
+
+    def export_filename(self, export_format, start=None, end=None):
+        """Download filename describing the exported window."""
+        first = start.strftime('%Y%m%d') if start else 'all'
+        last = (end or datetime.utcnow()).strftime('%Y%m%d')
+        return f"posts_{first}_{last}.{export_format}"
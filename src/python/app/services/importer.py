@@ -0,0 +1,239 @@
+import csv
+import logging
+import re
+import sys
+from datetime import datetime, timezone
+
+from sqlalchemy import select, update, bindparam
+
+from app.models.post import Post
+from database.db import session_scope
+from database.bulk import bulk_insert
+from app.config import get_config
+from app.services.rollups import RollupBatch
+from app.utils.cache import bump_data_version
+from app.utils.engagement import engagement_score
+from app.utils.nlp import content_hash
+
+logger = logging.getLogger(__name__)
+
+# Post field -> accepted CSV header names (compared case-insensitively)
+COLUMN_ALIASES = {
+    'content': ('content', 'text', 'full_text', 'body', 'message', 'post', 'tweet'),
+    'platform': ('platform', 'source', 'network', 'site'),
+    'created_at': ('created_at', 'date', 'datetime', 'timestamp', 'time', 'created', 'published_at'),
+    'likes': ('likes', 'like_count', 'favorites', 'favorite_count', 'upvotes', 'score'),
+    'shares': ('shares', 'share_count', 'retweets', 'retweet_count', 'reposts'),
+    'author': ('author', 'user', 'username', 'screen_name', 'user_name'),
+    'source_url': ('source_url', 'url', 'link', 'permalink'),
+    'sentiment_score': ('sentiment_score', 'sentiment', 'compound'),
+}
+
+TIMESTAMP_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d', '%m/%d/%Y %H:%M:%S', '%m/%d/%Y %H:%M',
+                     '%m/%d/%Y', '%a %b %d %H:%M:%S %z %Y')
+
+EPOCH_SECONDS = re.compile(r'\d{9,}(\.\d+)?$')
+
+
+def parse_timestamp(value):
+    """Parse an ISO 8601, common date or epoch-seconds value into a naive UTC datetime."""
+    value = (value or '').strip()
+    if not value:
+        return None
+
+    if EPOCH_SECONDS.match(value):
+        return datetime.utcfromtimestamp(float(value))
+
+    parsed = None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        for timestamp_format in TIMESTAMP_FORMATS:
+            try:
+                parsed = datetime.strptime(value, timestamp_format)
+                break
+            except ValueError:
+                continue
+    if parsed is None:
+        raise ValueError(f"Unrecognized timestamp: {value}")
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _parse_count(value):
+    """Parse a like/share count ("1,204", "12.0" or empty)."""
+    value = (value or '').strip().replace(',', '')
+    return int(float(value)) if value else 0
+
+
+def _parse_sentiment(value):
+    """Parse a compound sentiment score; labels and out-of-range values are left to the processor."""
+    try:
+        score = float((value or '').strip())
+    except ValueError:
+        return None
+    return score if -1 <= score <= 1 else None
+
+
+def _utf8_lines(binary_file):
+    """Decode a file line by line, so invalid UTF-8 is reported with its line number."""
+    for line_number, line in enumerate(binary_file, start=1):
+        try:
+            yield line.decode('utf-8-sig' if line_number == 1 else 'utf-8')
+        except UnicodeDecodeError as e:
+            raise ValueError(f"CSV line {line_number} is not UTF-8 text: {e.reason}") from e
+
+
+class CsvImporter:
+    """Class for bulk-importing posts from CSV files in bounded-memory chunks."""
+
+    def __init__(self, chunk_size=None, default_platform=None):
+        """Initialize the importer."""
+        config = get_config()
+        self.chunk_size = chunk_size or config.IMPORT_CHUNK_SIZE
+        self.default_platform = default_platform
+        self.engagement_weights = config.ENGAGEMENT_WEIGHTS
+
+        # Historical exports can carry very long post bodies
+        csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+    def map_columns(self, header):
+        """Map Post fields to CSV column positions; raises ValueError without a content column."""
+        positions = {name.strip().lower(): index for index, name in enumerate(header)}
+        columns = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            for alias in aliases:
+                if alias in positions:
+                    columns[field] = positions[alias]
+                    break
+
+        if 'content' not in columns:
+            raise ValueError(f"CSV needs a content column (one of: {', '.join(COLUMN_ALIASES['content'])})")
+        return columns
+
+    def import_file(self, path):
+        """Import a UTF-8 CSV file from disk."""
+        with open(path, 'rb') as f:
+            return self.import_stream(_utf8_lines(f))
+
+    def import_stream(self, stream):
+        """Import posts from a text stream (or iterable of lines) of CSV, one chunk per transaction.
+
+        Returns {'rows', 'imported', 'duplicates', 'invalid'}.
+        """
+        reader = csv.reader(stream)
+        try:
+            columns = self.map_columns(next(reader))
+        except StopIteration:
+            raise ValueError("CSV file is empty")
+        except csv.Error as e:
+            raise ValueError(f"Malformed CSV header: {e}") from e
+
+        stats = {'rows': 0, 'imported': 0, 'duplicates': 0, 'invalid': 0}
+        chunk = []
+        try:
+            for line_number, record in enumerate(reader, start=2):
+                stats['rows'] += 1
+                try:
+                    post = self._parse_record(record, columns)
+                except (ValueError, IndexError) as e:
+                    logger.debug(f"Skipping CSV line {line_number}: {e}")
+                    post = None
+
+                if post is None:
+                    stats['invalid'] += 1
+                    continue
+
+                chunk.append(post)
+                if len(chunk) >= self.chunk_size:
+                    self._insert_chunk(chunk, stats)
+                    chunk = []
+
+            if chunk:
+                self._insert_chunk(chunk, stats)
+        except csv.Error as e:
+            # The header is row 1; chunks committed before the bad row stay imported
+            raise ValueError(f"Malformed CSV at row {stats['rows'] + 2}: {e} "
+                             f"({stats['imported']} posts before it were imported)") from e
+        finally:
+            if stats['imported']:
+                bump_data_version()
+
+        logger.info(f"Imported {stats['imported']} of {stats['rows']} CSV rows "
+                    f"({stats['duplicates']} duplicates, {stats['invalid']} invalid)")
+        return stats
+
+    def _parse_record(self, record, columns):
+        """Convert one CSV record to a posts row, or None if it has no content."""
+        def value(field):
+            index = columns.get(field)
+            return record[index] if index is not None and index < len(record) else None
+
+        content = (value('content') or '').strip()
+        if not content:
+            return None
+
+        platform = (value('platform') or '').strip().lower() or self.default_platform
+        likes = _parse_count(value('likes'))
+        shares = _parse_count(value('shares'))
+
+        return {
+            'content': content,
+            'platform': platform,
+            'created_at': parse_timestamp(value('created_at')) or datetime.utcnow(),
+            'likes': likes,
+            'shares': shares,
+            'sentiment_score': _parse_sentiment(value('sentiment_score')),
+            'source_url': (value('source_url') or '').strip() or None,
+            'author': (value('author') or '').strip() or None,
+            'engagement_score': engagement_score(platform, likes, shares, self.engagement_weights),
+            'content_hash': content_hash(platform, content),
+        }
+
+    def _insert_chunk(self, chunk, stats):
+        """Insert the chunk's new posts with the dialect's bulk path and update rollups."""
+        unique_posts = {}
+        for post in chunk:
+            unique_posts.setdefault(post['content_hash'], post)
+
+        with session_scope() as session:
+            # Posts have no unique key, so this check is what keeps duplicates out; two
+            # concurrent imports of the same rows can still both insert them on Postgres
+            existing = set(session.execute(
+                select(Post.content_hash).where(Post.content_hash.in_(list(unique_posts)))
+            ).scalars())
+            new_posts = [post for post_hash, post in unique_posts.items() if post_hash not in existing]
+
+            if new_posts:
+                bulk_insert(session, Post.__table__, new_posts)
+
+                rollup_batch = RollupBatch()
+                for post in new_posts:
+                    rollup_batch.add_post(post['created_at'], post['platform'], post['likes'],
+                                          post['shares'], post['sentiment_score'])
+                rollup_batch.apply(session)
+
+        stats['imported'] += len(new_posts)
+        stats['duplicates'] += len(chunk) - len(new_posts)
+
+
+def backfill_content_hashes(batch_size=5000):
+    """Fill content_hash on posts stored before the column existed."""
+    posts_table = Post.__table__
+    statement = update(posts_table).where(posts_table.c.id == bindparam('post_id')).values(content_hash=bindparam('hash'))
+    updated_count = 0
+    while True:
+        with session_scope() as session:
+            rows = session.execute(
+                select(Post.id, Post.platform, Post.content).where(Post.content_hash.is_(None)).limit(batch_size)
+            ).all()
+            if not rows:
+                if updated_count:
+                    logger.info(f"Filled content_hash for {updated_count} existing posts")
+                return updated_count
+            session.execute(statement, [
+                {'post_id': row.id, 'hash': content_hash(row.platform, row.content)} for row in rows
+            ])
+        updated_count += len(rows)
@@ -2,7 +2,6 @@
 import re
 import logging
 import nltk
-import pandas as pd
 # import numpy as np # Not explicitly used in the new version of this file
 from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
@@ -11,9 +10,14 @@ from collections import Counter
 from datetime import datetime, timedelta
 from sqlalchemy import func, desc
 
-from app.models.post import Post, Keyword, Hashtag
-from database.db import session_scope # Removed get_session as it's not used here
+from app.models.post import Post, Keyword, Hashtag, HourlyRollup
+from database.db import session_scope, read_session_scope # Removed get_session as it's not used here
 from app.config import get_config
+from app.utils.nlp import lemmatize_text
+from app.utils.cache import bump_data_version
+from app.utils.engagement import engagement_score_expression
+from app.services.rollups import RollupBatch, RollupService
+from app.services.timeseries import TimeSeriesEngine
 
 # Initialize NLTK
 try:
@@ -85,34 +89,46 @@ class DataProcessor:
     def extract_keywords(self, post_id=None, limit=None):
         """Extract keywords from posts and store them in the database."""
         processed_count = 0
+        extracted_at = datetime.utcnow()
         with session_scope() as session:
             # Query posts that need keyword extraction
-            query = session.query(Post).outerjoin(Post.keywords)
+            query = session.query(Post)
             
             if post_id:
                 query = query.filter(Post.id == post_id)
             else:
-                # Filter posts that don't have keywords yet (more robustly)
-                query = query.filter(~Post.keywords.any())
+                # Posts not attempted yet, oldest first (posts without keywords are marked too)
+                query = query.filter(Post.keywords_extracted_at.is_(None)).order_by(Post.id)
             
             if limit:
                 query = query.limit(limit)
             
             posts_to_process = query.all()
+            rollup_batch = RollupBatch()
             
             for post in posts_to_process:
                 tokens = self.preprocess_text(post.content)
+                if self.config.LEMMATIZE_KEYWORDS:
+                    # Fold inflections ("models" -> "model") so they count as one keyword
+                    tokens = lemmatize_text(tokens)
                 token_counts = Counter(tokens)
                 
-                for token, frequency in token_counts.most_common(10):  # Store top 10 keywords
+                top_keywords = token_counts.most_common(10)  # Store top 10 keywords
+                for token, frequency in top_keywords:
                     keyword_obj = Keyword(
                         post_id=post.id,
                         text=token,
                         frequency=frequency
                     )
                     session.add(keyword_obj)
+                rollup_batch.add_keywords(post.created_at, post.platform, dict(top_keywords))
+                post.keywords_extracted_at = extracted_at
                 processed_count += 1
+            
+            rollup_batch.apply(session)
         
+        if processed_count:
+            bump_data_version()
         return processed_count
     
     def analyze_sentiment(self, post_id=None, limit=None):
@@ -129,35 +145,59 @@ class DataProcessor:
                 query = query.limit(limit)
             
             posts_to_process = query.all()
+            rollup_batch = RollupBatch()
             
             for post in posts_to_process:
                 sentiment = self.sentiment_analyzer.polarity_scores(post.content)
+                rollup_batch.change_sentiment(post.created_at, post.platform, post.sentiment_score, sentiment['compound'])
                 post.sentiment_score = sentiment['compound']
                 processed_count += 1
+            
+            rollup_batch.apply(session)
         
+        if processed_count:
+            bump_data_version()
         return processed_count
     
+    def pending_counts(self):
+        """Posts still waiting for keyword extraction and for sentiment analysis."""
+        with read_session_scope() as session:
+            return {
+                'keywords': session.query(func.count(Post.id)).filter(Post.keywords_extracted_at.is_(None)).scalar(),
+                'sentiment': session.query(func.count(Post.id)).filter(Post.sentiment_score.is_(None)).scalar(),
+            }
+    
+    def refresh_engagement_scores(self, since=None, missing_only=False):
+        """Recompute materialized engagement scores from likes and shares in one UPDATE."""
+        with session_scope() as session:
+            query = session.query(Post)
+            
+            if since:
+                query = query.filter(Post.created_at >= since)
+            
+            if missing_only:
+                query = query.filter(Post.engagement_score.is_(None))
+            
+            updated_count = query.update(
+                {Post.engagement_score: engagement_score_expression(Post.platform, Post.likes, Post.shares)},
+                synchronize_session=False
+            )
+        
+        if updated_count:
+            bump_data_version()
+        return updated_count
+    
     def get_trending_keywords(self, days=1, limit=10):
         """Get trending keywords from the last N days."""
-        with session_scope() as session:
+        with read_session_scope() as session:
             threshold_date = datetime.utcnow() - timedelta(days=days)
             
-            keyword_counts = session.query(
-                Keyword.text,
-                func.sum(Keyword.frequency).label('total_frequency')
-            ).join(Post, Keyword.post_id == Post.id).filter( # Explicit join condition
-                Post.created_at >= threshold_date
-            ).group_by(
-                Keyword.text
-            ).order_by(
-                desc('total_frequency')
-            ).limit(limit).all()
-            
-            return [{'text': k.text, 'frequency': int(k.total_frequency)} for k in keyword_counts]
+            # Sums daily keyword rollups, scanning raw keywords only for the partial first day
+            return RollupService().top_keywords(session, threshold_date, limit)
     
     def get_trending_hashtags(self, days=1, limit=10):
         """Get trending hashtags from the last N days."""
-        with session_scope() as session:
+        with read_session_scope() as session:
             threshold_date = datetime.utcnow() - timedelta(days=days)
             
             hashtag_counts = session.query(
@@ -176,80 +216,31 @@ class DataProcessor:
             return [{'text': h.text, 'count': int(h.post_count)} for h in hashtag_counts]
     
     def get_post_activity(self, days=7, interval='day'):
-        """Get post activity over time."""
-        with session_scope() as session:
+        """Get post activity over time; raises ValueError for intervals outside BUCKET_INTERVALS."""
+        with read_session_scope() as session:
             end_date = datetime.utcnow()
             threshold_date = end_date - timedelta(days=days)
             
-            posts_data = session.query(
-                Post.created_at,
-                Post.platform
-            ).filter(
-                Post.created_at >= threshold_date,
-                Post.created_at <= end_date
-            ).all()
-
-            if not posts_data:
-                return []
-
-            df = pd.DataFrame([(p.created_at, p.platform) for p in posts_data], 
-                             columns=['created_at', 'platform'])
-            df['created_at'] = pd.to_datetime(df['created_at'])
-
-            # Determine frequency for date_range and resampling
-            freq_map = {'hour': 'H', 'day': 'D', 'week': 'W-MON'}
-            pandas_freq = freq_map.get(interval.lower(), 'D') # Ensure interval is lowercase
-
-            df = df.set_index('created_at')
-            
-            # Group by platform then resample and count
-            activity_list = []
-            if not df.empty:
-                 for platform_name, group_df in df.groupby('platform'):
-                    # Ensure group_df is not empty before resampling
-                    if not group_df.empty:
-                        resampled = group_df.resample(pandas_freq).size().rename(platform_name)
-                        activity_list.append(resampled)
-            
-            if not activity_list:
-                # Create an empty DataFrame with the expected date range if no activity or no posts
-                # Adjust start date to be at the beginning of its period for alignment
-                if pandas_freq == 'H':
-                    start_dt_aligned = threshold_date.replace(minute=0, second=0, microsecond=0)
-                elif pandas_freq == 'D':
-                    start_dt_aligned = threshold_date.replace(hour=0, minute=0, second=0, microsecond=0)
-                elif pandas_freq == 'W-MON':
-                    start_dt_aligned = (threshold_date - timedelta(days=threshold_date.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
-                else: # Default to day
-                    start_dt_aligned = threshold_date.replace(hour=0, minute=0, second=0, microsecond=0)
-                
-                idx = pd.date_range(start=start_dt_aligned, end=end_date, freq=pandas_freq)
-                activity_df = pd.DataFrame(index=idx) # Renamed to activity_df
-            else:
-                activity_df = pd.concat(activity_list, axis=1).fillna(0)
-
-            all_platforms_db = session.query(Post.platform).distinct().all()
-            platform_names = [p[0] for p in all_platforms_db]
-
-            for p_name in platform_names:
-                if p_name not in activity_df.columns:
-                    activity_df[p_name] = 0
+            activity = TimeSeriesEngine().query(
+                session, threshold_date, end_date, interval, metrics=('posts',), by_platform=True
+            )
             
-            activity_df = activity_df.sort_index()
+            # Include every known platform, with zeros where it had no posts
+            platform_names = [p[0] for p in session.query(HourlyRollup.platform).distinct().all()]
+            empty_column = [0] * len(activity['buckets'])
             
             result = []
-            for date_idx, row in activity_df.iterrows():
-                data_point = {'date': date_idx.isoformat()}
-                # Ensure to iterate over actual columns present in activity_df
-                for platform_col in activity_df.columns: 
-                    data_point[platform_col] = int(row[platform_col]) if pd.notna(row[platform_col]) else 0
+            for index, bucket in enumerate(activity['buckets']):
+                data_point = {'date': bucket.isoformat()}
+                for platform_name in sorted(set(platform_names) | set(activity['series'])):
+                    data_point[platform_name] = activity['series'].get(platform_name, {'posts': empty_column})['posts'][index]
                 result.append(data_point)
             
             return result
     
     def get_engagement_metrics(self, days=7, platform=None):
         """Get engagement metrics over time."""
-        with session_scope() as session:
+        with read_session_scope() as session:
             threshold_date = datetime.utcnow() - timedelta(days=days)
             
             query = session.query(
@@ -285,30 +276,14 @@ class DataProcessor:
     
     def get_sentiment_distribution(self, days=7, platform=None):
         """Get sentiment distribution."""
-        with session_scope() as session:
+        with read_session_scope() as session:
             threshold_date = datetime.utcnow() - timedelta(days=days)
             
-            query = session.query(Post.sentiment_score).filter(
-                Post.created_at >= threshold_date,
-                Post.sentiment_score.isnot(None) # Use isnot for not None checks
-            )
-            
-            if platform:
-                query = query.filter(Post.platform == platform)
-            
-            sentiments_tuples = query.all() # List of tuples like [(0.5,), (-0.2,)]
-            
-            if not sentiments_tuples:
-                return {'positive': 0, 'neutral': 0, 'negative': 0}
-            
-            scores = [s[0] for s in sentiments_tuples] # Extract scores
-
-            positive = sum(1 for score in scores if score > 0.05)
-            negative = sum(1 for score in scores if score < -0.05)
-            neutral = len(scores) - positive - negative
+            # Whole hours come from the hourly rollups, partial edge hours from raw posts
+            platform_totals = RollupService().platform_totals(session, threshold_date, platform=platform)
             
             return {
-                'positive': positive,
-                'neutral': neutral,
-                'negative': negative
+                'positive': sum(metrics['positive_count'] for metrics in platform_totals.values()),
+                'neutral': sum(metrics['neutral_count'] for metrics in platform_totals.values()),
+                'negative': sum(metrics['negative_count'] for metrics in platform_totals.values())
             }
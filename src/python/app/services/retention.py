@@ -0,0 +1,307 @@
+import logging
+import os
+import re
+import sqlite3
+import zlib
+from collections import defaultdict
+from datetime import datetime, date, timedelta
+
+from sqlalchemy import select, delete, desc, func
+
+from app.models.post import Post, Keyword, Hashtag, post_hashtag, post_topic
+from database.db import session_scope, read_session_scope
+from app.config import get_config
+from app.services.rollups import RollupService, day_bucket_expression, _as_date
+from app.utils.cache import bump_data_version
+from app.utils.time_utils import next_bucket
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_PARTITIONS = ('day', 'week', 'month')
+
+# posts_2024-05-13.db (day), posts_2024-W20.db (ISO week) or posts_2024-05.db (month)
+ARCHIVE_FILE_PATTERN = re.compile(r'^posts_(\d{4}-\d{2}-\d{2}|\d{4}-W\d{2}|\d{4}-\d{2})\.db$')
+
+ARCHIVE_POST_COLUMNS = ('id', 'platform', 'author', 'created_at', 'likes', 'shares', 'sentiment_score',
+                        'engagement_score', 'source_url', 'content_hash', 'content')
+
+
+def partition_key(day, granularity='day'):
+    """Name of the day, ISO week or month partition holding day."""
+    if granularity == 'week':
+        year, week, _ = day.isocalendar()
+        return f"{year}-W{week:02d}"
+    if granularity == 'month':
+        return day.strftime('%Y-%m')
+    return day.isoformat()
+
+
+def partition_bounds(key):
+    """[start, end) datetimes covered by a partition key of any granularity."""
+    if '-W' in key:
+        year, week = key.split('-W')
+        start, interval = date.fromisocalendar(int(year), int(week), 1), 'week'
+    elif len(key) == 7:
+        start, interval = date.fromisoformat(f"{key}-01"), 'month'
+    else:
+        start, interval = date.fromisoformat(key), 'day'
+    start = datetime.combine(start, datetime.min.time())
+    return start, next_bucket(start, interval)
+
+
+class ArchiveStore:
+    """Time-partitioned archive of posts: one SQLite file per day, week or month, content zlib-compressed."""
+
+    def __init__(self, archive_dir, granularity='day'):
+        """Initialize the store rooted at archive_dir, writing partitions of the given granularity."""
+        if granularity not in ARCHIVE_PARTITIONS:
+            raise ValueError(f"Unsupported archive partitioning: {granularity}")
+        self.archive_dir = archive_dir
+        self.granularity = granularity
+
+    def path_for(self, key):
+        """Partition file for a partition key."""
+        return os.path.join(self.archive_dir, f"posts_{key}.db")
+
+    def partitions(self, start=None, end=None):
+        """Sorted (key, start, end) of the partitions overlapping [start, end).
+
+        Partitions written under an earlier granularity are still listed, so changing
+        ARCHIVE_PARTITION doesn't hide posts that were already archived.
+        """
+        if not os.path.isdir(self.archive_dir):
+            return []
+        partitions = []
+        for filename in os.listdir(self.archive_dir):
+            match = ARCHIVE_FILE_PATTERN.match(filename)
+            if not match:
+                continue
+            key = match.group(1)
+            partition_start, partition_end = partition_bounds(key)
+            if (start and partition_end <= start) or (end and partition_start >= end):
+                continue
+            partitions.append((key, partition_start, partition_end))
+        return sorted(partitions, key=lambda partition: (partition[1], partition[2]))
+
+    def _connect(self, key):
+        """Open (and if needed create) a partition."""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        connection = sqlite3.connect(self.path_for(key))
+        connection.executescript(
+            "CREATE TABLE IF NOT EXISTS archived_posts ("
+            "id INTEGER PRIMARY KEY, platform TEXT, author TEXT, created_at TEXT, likes INTEGER, "
+            "shares INTEGER, sentiment_score REAL, engagement_score REAL, source_url TEXT, "
+            "content_hash TEXT, content BLOB);"
+            "CREATE TABLE IF NOT EXISTS archived_keywords (post_id INTEGER, text TEXT, frequency INTEGER);"
+            "CREATE TABLE IF NOT EXISTS archived_hashtags (post_id INTEGER, text TEXT);"
+            "CREATE INDEX IF NOT EXISTS ix_archived_keywords_post_id ON archived_keywords (post_id);"
+            "CREATE INDEX IF NOT EXISTS ix_archived_hashtags_post_id ON archived_hashtags (post_id);"
+        )
+        return connection
+
+    def write(self, day, posts, keywords, hashtags):
+        """Store posts (dicts) created on day with their keyword and hashtag rows in day's partition.
+
+        Re-writing the same posts replaces them, so an interrupted archive run can be repeated.
+        """
+        post_ids = [(post['id'],) for post in posts]
+        connection = self._connect(partition_key(day, self.granularity))
+        try:
+            with connection:
+                connection.executemany("DELETE FROM archived_keywords WHERE post_id = ?", post_ids)
+                connection.executemany("DELETE FROM archived_hashtags WHERE post_id = ?", post_ids)
+                connection.executemany(
+                    f"INSERT OR REPLACE INTO archived_posts ({', '.join(ARCHIVE_POST_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(ARCHIVE_POST_COLUMNS))})",
+                    [(
+                        post['id'], post['platform'], post['author'], post['created_at'].isoformat(),
+                        post['likes'], post['shares'], post['sentiment_score'], post['engagement_score'],
+                        post['source_url'], post['content_hash'],
+                        zlib.compress((post['content'] or '').encode('utf-8'))
+                    ) for post in posts]
+                )
+                connection.executemany("INSERT INTO archived_keywords VALUES (?, ?, ?)", keywords)
+                connection.executemany("INSERT INTO archived_hashtags VALUES (?, ?)", hashtags)
+        finally:
+            connection.close()
+
+    def iter_batches(self, start=None, end=None, platform=None, batch_size=1000):
+        """Yield lists of archived posts created in [start, end), oldest partition first.
+
+        Partitions outside the window are pruned without being opened.
+        """
+        for key, _, _ in self.partitions(start, end):
+            connection = sqlite3.connect(f"file:{self.path_for(key)}?mode=ro", uri=True)
+            try:
+                query = f"SELECT {', '.join(ARCHIVE_POST_COLUMNS)} FROM archived_posts WHERE id > ?"
+                parameters = []
+                if start:
+                    query += " AND created_at >= ?"
+                    parameters.append(start.isoformat())
+                if end:
+                    query += " AND created_at < ?"
+                    parameters.append(end.isoformat())
+                if platform:
+                    query += " AND platform = ?"
+                    parameters.append(platform)
+                query += " ORDER BY id LIMIT ?"
+
+                last_id = 0
+                while True:
+                    rows = connection.execute(query, [last_id, *parameters, batch_size]).fetchall()
+                    if not rows:
+                        break
+
+                    post_keywords = defaultdict(list)
+                    placeholders = ', '.join('?' * len(rows))
+                    for post_id, keyword in connection.execute(
+                        f"SELECT post_id, text FROM archived_keywords WHERE post_id IN ({placeholders}) "
+                        f"ORDER BY post_id, frequency DESC",
+                        [row[0] for row in rows]
+                    ):
+                        post_keywords[post_id].append(keyword)
+
+                    batch = []
+                    for row in rows:
+                        post = dict(zip(ARCHIVE_POST_COLUMNS, row))
+                        post['created_at'] = datetime.fromisoformat(post['created_at'])
+                        post['content'] = zlib.decompress(post['content']).decode('utf-8')
+                        post['keywords'] = post_keywords.get(post['id'], [])
+                        batch.append(post)
+                    yield batch
+                    last_id = rows[-1][0]
+            finally:
+                connection.close()
+
+    def newest_post_time(self):
+        """created_at of the newest archived post, or None if the archive is empty."""
+        for key, _, _ in reversed(self.partitions()):
+            connection = sqlite3.connect(f"file:{self.path_for(key)}?mode=ro", uri=True)
+            try:
+                newest = connection.execute("SELECT MAX(created_at) FROM archived_posts").fetchone()[0]
+            finally:
+                connection.close()
+            if newest:
+                return datetime.fromisoformat(newest)
+        return None
+
+
+class RetentionService:
+    """Class for moving posts past the hot window into the archive tier (rollups stay online)."""
+
+    def __init__(self):
+        """Initialize the retention service."""
+        self.config = get_config()
+        self.archive = ArchiveStore(self.config.ARCHIVE_DIR, self.config.ARCHIVE_PARTITION)
+        self.batch_size = self.config.ARCHIVE_BATCH_SIZE
+
+    def hot_boundary(self, now=None):
+        """Midnight before which posts belong in the archive, or None if retention is off."""
+        return RollupService().archive_boundary(now)
+
+    def archive_expired(self, now=None):
+        """Archive and delete hot posts created before the hot boundary, one day at a time."""
+        boundary = self.hot_boundary(now)
+        if boundary is None:
+            return {'posts': 0, 'days': 0}
+
+        with session_scope() as session:
+            day = day_bucket_expression(Post.created_at, session.get_bind().dialect.name)
+            days = [_as_date(row[0]) for row in session.execute(
+                select(day).where(Post.created_at < boundary).group_by(day).order_by(day)
+            )]
+
+        archived_count = 0
+        for archive_day in days:
+            archived_count += self._archive_day(archive_day)
+
+        if archived_count:
+            bump_data_version()
+            logger.info(f"Archived {archived_count} posts from {len(days)} days before {boundary:%Y-%m-%d}")
+        return {'posts': archived_count, 'days': len(days)}
+
+    def _archive_day(self, archive_day):
+        """Move one day of posts to its archive partition in batches."""
+        day_start = datetime.combine(archive_day, datetime.min.time())
+        day_end = day_start + timedelta(days=1)
+        archived_count = 0
+
+        while True:
+            with session_scope() as session:
+                posts = [row._asdict() for row in session.execute(
+                    select(*[getattr(Post, name) for name in ARCHIVE_POST_COLUMNS]).where(
+                        Post.created_at >= day_start,
+                        Post.created_at < day_end
+                    ).order_by(Post.id).limit(self.batch_size)
+                )]
+                if not posts:
+                    return archived_count
+
+                post_ids = [post['id'] for post in posts]
+                keywords = session.execute(
+                    select(Keyword.post_id, Keyword.text, Keyword.frequency).where(Keyword.post_id.in_(post_ids))
+                ).all()
+                hashtags = session.execute(
+                    select(post_hashtag.c.post_id, Hashtag.text).join(
+                        Hashtag, Hashtag.id == post_hashtag.c.hashtag_id
+                    ).where(post_hashtag.c.post_id.in_(post_ids))
+                ).all()
+
+                # The archive write is committed before the hot rows are deleted
+                self.archive.write(archive_day, posts, [tuple(row) for row in keywords], [tuple(row) for row in hashtags])
+
+                session.execute(delete(Keyword).where(Keyword.post_id.in_(post_ids)))
+                session.execute(delete(post_hashtag).where(post_hashtag.c.post_id.in_(post_ids)))
+                session.execute(delete(post_topic).where(post_topic.c.post_id.in_(post_ids)))
+                session.execute(delete(Post).where(Post.id.in_(post_ids)))
+
+            archived_count += len(posts)
+
+    def iter_post_batches(self, start=None, end=None, platform=None, batch_size=1000):
+        """Yield batches of posts (with keywords) created in [start, end) from both tiers.
+
+        Archive partitions are pruned by the window, so windows inside the hot period never
+        open an archive file. Old posts not archived yet are still read from posts.
+        """
+        yield from self.archive.iter_batches(start, end, platform, batch_size)
+
+        last_id = 0
+        while True:
+            with read_session_scope() as session:
+                query = select(*[getattr(Post, name) for name in ARCHIVE_POST_COLUMNS]).where(Post.id > last_id)
+                if start:
+                    query = query.where(Post.created_at >= start)
+                if end:
+                    query = query.where(Post.created_at < end)
+                if platform:
+                    query = query.where(Post.platform == platform)
+
+                posts = [row._asdict() for row in session.execute(query.order_by(Post.id).limit(batch_size))]
+                if not posts:
+                    return
+
+                post_keywords = defaultdict(list)
+                for post_id, keyword in session.execute(
+                    select(Keyword.post_id, Keyword.text).where(
+                        Keyword.post_id.in_([post['id'] for post in posts])
+                    ).order_by(Keyword.post_id, desc(Keyword.frequency))
+                ):
+                    post_keywords[post_id].append(keyword)
+
+            for post in posts:
+                post['keywords'] = post_keywords.get(post['id'], [])
+            yield posts
+            last_id = posts[-1]['id']
+
+    def archived_until(self):
+        """Midnight after the newest archived day; rollups before it can't be rebuilt from posts."""
+        newest = self.archive.newest_post_time()
+        if newest is None:
+            return None
+        return datetime.combine(newest.date() + timedelta(days=1), datetime.min.time())
+
+    def tier_counts(self):
+        """Number of posts in the hot table and partitions in the archive."""
+        with read_session_scope() as session:
+            hot_count = session.execute(select(func.count(Post.id))).scalar()
+        return {'hot_posts': hot_count, 'archived_partitions': len(self.archive.partitions())}
@@ -0,0 +1,352 @@
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, date, timedelta
+
+from sqlalchemy import func, case, cast, desc, select, union_all, and_, or_, Date
+
+from app.models.post import Post, Keyword, HourlyRollup, KeywordDailyRollup
+from database.db import session_scope, read_session_scope
+from app.config import get_config
+from app.utils.time_utils import bucket_expression, parse_bucket
+
+logger = logging.getLogger(__name__)
+
+HOURLY_METRICS = ('post_count', 'likes_sum', 'shares_sum', 'positive_count', 'neutral_count', 'negative_count')
+UNKNOWN_PLATFORM = 'unknown'
+
+
+def sentiment_label(score):
+    """Classify a compound sentiment score, or return None if the post is unscored."""
+    if score is None:
+        return None
+    if score > 0.05:
+        return 'positive'
+    if score < -0.05:
+        return 'negative'
+    return 'neutral'
+
+
+def floor_hour(dt):
+    """Truncate a datetime to the start of its hour."""
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def ceil_hour(dt):
+    """Round a datetime up to the next hour boundary (unchanged if already on one)."""
+    floored = floor_hour(dt)
+    return floored if floored == dt else floored + timedelta(hours=1)
+
+
+def ceil_day(dt):
+    """Round a datetime up to the next midnight (unchanged if already midnight)."""
+    floored = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    return floored if floored == dt else floored + timedelta(days=1)
+
+
+def day_bucket_expression(column, dialect_name):
+    """SQL expression truncating a timestamp column to its calendar day."""
+    if dialect_name == 'postgresql':
+        return cast(column, Date)
+    return func.date(column)
+
+
+def _as_date(value):
+    """Convert a day value returned by the database to a date."""
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value[:10], '%Y-%m-%d').date()
+
+
+def _upsert_increments(session, table, key_columns, rows):
+    """Add row values onto existing rollup rows, inserting rows that don't exist yet."""
+    if not rows:
+        return
+
+    if session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    stmt = insert(table)
+    value_columns = [column for column in rows[0] if column not in key_columns]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={column: table.c[column] + stmt.excluded[column] for column in value_columns}
+    )
+    session.execute(stmt, rows)
+
+
+def raw_metric_columns():
+    """Aggregate columns computing rollup metrics directly from posts."""
+    return [
+        func.count(Post.id).label('post_count'),
+        func.coalesce(func.sum(Post.likes), 0).label('likes_sum'),
+        func.coalesce(func.sum(Post.shares), 0).label('shares_sum'),
+        func.coalesce(func.sum(case((Post.sentiment_score > 0.05, 1), else_=0)), 0).label('positive_count'),
+        func.coalesce(func.sum(case((and_(Post.sentiment_score >= -0.05, Post.sentiment_score <= 0.05), 1), else_=0)), 0).label('neutral_count'),
+        func.coalesce(func.sum(case((Post.sentiment_score < -0.05, 1), else_=0)), 0).label('negative_count'),
+    ]
+
+
+def rollup_metric_columns():
+    """Aggregate columns summing stored hourly rollup rows."""
+    return [func.coalesce(func.sum(getattr(HourlyRollup, metric)), 0).label(metric) for metric in HOURLY_METRICS]
+
+
+class RollupBatch:
+    """Accumulates rollup deltas during a transaction and applies them in one statement."""
+
+    def __init__(self):
+        """Initialize an empty batch."""
+        self.hourly = defaultdict(Counter)  # (bucket, platform) -> metric deltas
+        self.keywords = defaultdict(Counter)  # (day, platform, keyword) -> frequency/post_count deltas
+
+    def add_post(self, created_at, platform, likes=0, shares=0, sentiment_score=None):
+        """Count a newly inserted post."""
+        delta = self.hourly[(floor_hour(created_at or datetime.utcnow()), platform or UNKNOWN_PLATFORM)]
+        delta['post_count'] += 1
+        delta['likes_sum'] += likes or 0
+        delta['shares_sum'] += shares or 0
+        label = sentiment_label(sentiment_score)
+        if label:
+            delta[f'{label}_count'] += 1
+
+    def change_sentiment(self, created_at, platform, old_score, new_score):
+        """Move a post between sentiment classes after (re)scoring."""
+        old_label = sentiment_label(old_score)
+        new_label = sentiment_label(new_score)
+        if old_label == new_label:
+            return
+
+        delta = self.hourly[(floor_hour(created_at or datetime.utcnow()), platform or UNKNOWN_PLATFORM)]
+        if old_label:
+            delta[f'{old_label}_count'] -= 1
+        if new_label:
+            delta[f'{new_label}_count'] += 1
+
+    def add_keywords(self, created_at, platform, keyword_counts):
+        """Count keywords extracted from one post."""
+        day = (created_at or datetime.utcnow()).date()
+        for keyword, frequency in keyword_counts.items():
+            delta = self.keywords[(day, platform or UNKNOWN_PLATFORM, keyword)]
+            delta['frequency'] += frequency
+            delta['post_count'] += 1
+
+    def apply(self, session):
+        """Write accumulated deltas to the rollup tables within the caller's session."""
+        hourly_rows = [
+            {'bucket': bucket, 'platform': platform, **{metric: delta.get(metric, 0) for metric in HOURLY_METRICS}}
+            for (bucket, platform), delta in self.hourly.items()
+        ]
+        _upsert_increments(session, HourlyRollup.__table__, ['bucket', 'platform'], hourly_rows)
+        self.hourly.clear()
+
+        keyword_rows = [
+            {'day': day, 'platform': platform, 'keyword': keyword,
+             'frequency': delta['frequency'], 'post_count': delta['post_count']}
+            for (day, platform, keyword), delta in self.keywords.items()
+        ]
+        _upsert_increments(session, KeywordDailyRollup.__table__, ['day', 'platform', 'keyword'], keyword_rows)
+        self.keywords.clear()
+
+
+class RollupService:
+    """Class for rebuilding and querying pre-aggregated post and keyword rollups."""
+
+    def __init__(self):
+        """Initialize the rollup service."""
+        self.config = get_config()
+
+    def archive_boundary(self, now=None):
+        """Midnight before which posts may have been archived, or None if retention is off.
+
+        Rollups outlive archiving, so windows reaching past it take the partial edge hour or day
+        from the rollups too: the answer is then the same before and after the archive job runs.
+        """
+        if not self.config.HOT_RETENTION_DAYS:
+            return None
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.config.HOT_RETENTION_DAYS)
+        return cutoff.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def rebuild(self, since=None):
+        """Recompute rollups from raw posts (all history, or from `since` onwards)."""
+        with session_scope() as session:
+            hourly_count = self._rebuild_hourly(session, since)
+            keyword_count = self._rebuild_keywords(session, since)
+
+        logger.info(f"Rebuilt {hourly_count} hourly and {keyword_count} keyword-daily rollup rows")
+        return {'hourly': hourly_count, 'keywords': keyword_count}
+
+    def ensure_built(self):
+        """Rebuild the rollups when posts exist but the rollup tables are empty.
+
+        Databases from before the rollup tables would otherwise answer every aggregate from
+        the raw edge hours only. Returns the rebuild counts, or None if nothing was rebuilt.
+        """
+        with read_session_scope() as session:
+            has_rollups = session.execute(select(HourlyRollup.bucket).limit(1)).first() is not None
+            has_posts = session.execute(select(Post.id).limit(1)).first() is not None
+        if has_rollups or not has_posts:
+            return None
+
+        logger.warning("Rollup tables are empty but posts exist; rebuilding them from posts")
+        return self.rebuild()
+
+    def _rebuild_hourly(self, session, since=None):
+        """Recompute the hourly post rollups."""
+        dialect_name = session.get_bind().dialect.name
+        bucket = bucket_expression(Post.created_at, 'hour', dialect_name).label('bucket')
+        platform = func.coalesce(Post.platform, UNKNOWN_PLATFORM).label('platform')
+
+        query = session.query(bucket, platform, *raw_metric_columns()).filter(
+            Post.created_at.isnot(None)
+        )
+        stale_rows = session.query(HourlyRollup)
+
+        if since:
+            since = floor_hour(since)
+            query = query.filter(Post.created_at >= since)
+            stale_rows = stale_rows.filter(HourlyRollup.bucket >= since)
+
+        stale_rows.delete(synchronize_session=False)
+
+        rows = [{
+            'bucket': parse_bucket(row.bucket),
+            'platform': row.platform,
+            **{metric: int(getattr(row, metric) or 0) for metric in HOURLY_METRICS}
+        } for row in query.group_by(bucket, platform).all()]
+
+        if rows:
+            session.execute(HourlyRollup.__table__.insert(), rows)
+        return len(rows)
+
+    def _rebuild_keywords(self, session, since=None):
+        """Recompute the daily keyword frequency rollups."""
+        dialect_name = session.get_bind().dialect.name
+        day = day_bucket_expression(Post.created_at, dialect_name).label('day')
+        platform = func.coalesce(Post.platform, UNKNOWN_PLATFORM).label('platform')
+
+        query = session.query(
+            day,
+            platform,
+            Keyword.text.label('keyword'),
+            func.sum(Keyword.frequency).label('frequency'),
+            func.count(Keyword.id).label('post_count')
+        ).join(
+            Post, Keyword.post_id == Post.id
+        ).filter(
+            Post.created_at.isnot(None)
+        )
+        stale_rows = session.query(KeywordDailyRollup)
+
+        if since:
+            since = since.replace(hour=0, minute=0, second=0, microsecond=0)
+            query = query.filter(Post.created_at >= since)
+            stale_rows = stale_rows.filter(KeywordDailyRollup.day >= since.date())
+
+        stale_rows.delete(synchronize_session=False)
+
+        rows = [{
+            'day': _as_date(row.day),
+            'platform': row.platform,
+            'keyword': row.keyword,
+            'frequency': int(row.frequency or 0),
+            'post_count': int(row.post_count or 0)
+        } for row in query.group_by(day, platform, Keyword.text).all()]
+
+        if rows:
+            session.execute(KeywordDailyRollup.__table__.insert(), rows)
+        return len(rows)
+
+    def split_window(self, start, end):
+        """Split [start, end) into whole hours served by rollups and raw edge filters.
+
+        A start before the archive boundary is rounded down to its hour, which the rollups serve.
+        """
+        boundary = self.archive_boundary()
+        if boundary is not None and start < boundary:
+            start = floor_hour(start)
+        first_full = ceil_hour(start)
+        last_full = floor_hour(end or datetime.utcnow())
+
+        if first_full >= last_full:
+            # Window shorter than one whole hour: answer entirely from raw rows
+            raw_filter = Post.created_at >= start if end is None else and_(Post.created_at >= start, Post.created_at <= end)
+            return None, raw_filter
+
+        right_edge = Post.created_at >= last_full if end is None else and_(Post.created_at >= last_full, Post.created_at <= end)
+        raw_filter = or_(and_(Post.created_at >= start, Post.created_at < first_full), right_edge)
+        return (first_full, last_full), raw_filter
+
+    def platform_totals(self, session, start, end=None, platform=None):
+        """Get rollup metrics per platform for posts created in [start, end] in one grouped scan."""
+        full_hours, raw_filter = self.split_window(start, end)
+
+        raw_platform = func.coalesce(Post.platform, UNKNOWN_PLATFORM)
+        parts = [select(raw_platform.label('platform'), *raw_metric_columns()).where(raw_filter)]
+        if platform:
+            parts[0] = parts[0].where(Post.platform == platform)
+        parts[0] = parts[0].group_by(raw_platform)
+
+        if full_hours:
+            rollup_part = select(HourlyRollup.platform, *rollup_metric_columns()).where(
+                HourlyRollup.bucket >= full_hours[0],
+                HourlyRollup.bucket < full_hours[1]
+            )
+            if platform:
+                rollup_part = rollup_part.where(HourlyRollup.platform == platform)
+            parts.append(rollup_part.group_by(HourlyRollup.platform))
+
+        # Rollup hours and raw edge hours are merged per platform by the database
+        combined = (union_all(*parts) if len(parts) > 1 else parts[0]).subquery()
+        results = session.query(
+            combined.c.platform,
+            *[func.sum(combined.c[metric]).label(metric) for metric in HOURLY_METRICS]
+        ).group_by(combined.c.platform).order_by(combined.c.platform).all()
+
+        return {
+            row.platform: {metric: int(getattr(row, metric) or 0) for metric in HOURLY_METRICS}
+            for row in results if row.post_count
+        }
+
+    def top_keywords(self, session, start, limit=10, platform=None):
+        """Get the most frequent keywords in posts created since start.
+
+        A start before the archive boundary is rounded down to its day, which the rollups serve.
+        """
+        first_full_day = ceil_day(start)
+        boundary = self.archive_boundary()
+        if boundary is not None and start < boundary:
+            first_full_day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        # Whole days come from the daily rollup, the partial first day from raw keywords
+        rollup_rows = select(
+            KeywordDailyRollup.keyword.label('text'),
+            KeywordDailyRollup.frequency.label('frequency')
+        ).where(KeywordDailyRollup.day >= first_full_day.date())
+
+        raw_rows = select(
+            Keyword.text.label('text'),
+            Keyword.frequency.label('frequency')
+        ).join(
+            Post, Keyword.post_id == Post.id
+        ).where(
+            Post.created_at >= start,
+            Post.created_at < first_full_day
+        )
+
+        if platform:
+            rollup_rows = rollup_rows.where(KeywordDailyRollup.platform == platform)
+            raw_rows = raw_rows.where(Post.platform == platform)
+
+        combined = union_all(rollup_rows, raw_rows).subquery()
+        keywords = session.query(
+            combined.c.text,
+            func.sum(combined.c.frequency).label('total_frequency')
+        ).group_by(
+            combined.c.text
+        ).order_by(
+            desc('total_frequency')
+        ).limit(limit).all()
+
+        return [{'text': k.text, 'frequency': int(k.total_frequency)} for k in keywords]
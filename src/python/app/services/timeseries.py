@@ -0,0 +1,114 @@
+from collections import defaultdict
+
+from sqlalchemy import func, select, union_all
+
+from app.models.post import Post, HourlyRollup
+from app.services.rollups import RollupService, HOURLY_METRICS, UNKNOWN_PLATFORM, raw_metric_columns, rollup_metric_columns
+from app.utils.time_utils import BUCKET_INTERVALS, bucket_expression, floor_bucket, next_bucket, parse_bucket
+
+# Metric name -> rollup column it is summed from
+SUM_METRICS = {
+    'posts': 'post_count',
+    'likes': 'likes_sum',
+    'shares': 'shares_sum',
+    'positive': 'positive_count',
+    'neutral': 'neutral_count',
+    'negative': 'negative_count',
+}
+
+# Metric name -> (numerator, denominator) rollup columns
+AVERAGE_METRICS = {
+    'avg_likes': ('likes_sum', 'post_count'),
+    'avg_shares': ('shares_sum', 'post_count'),
+}
+
+ALL_PLATFORMS = 'all'
+
+
+class TimeSeriesEngine:
+    """Class for bucketed post time series, aggregated in SQL and returned as columns."""
+
+    def __init__(self):
+        """Initialize the time-series engine."""
+        self.rollups = RollupService()
+
+    def query(self, session, start, end, interval='day', metrics=('posts',), platform=None, by_platform=False):
+        """Get gap-filled metric columns per bucket for posts created in [start, end].
+
+        Returns {'interval', 'buckets': [bucket start datetimes], 'series': {group: {metric: [values]}}},
+        where group is each platform when by_platform is set, otherwise 'all'.
+        """
+        if interval not in BUCKET_INTERVALS:
+            raise ValueError(f"Unsupported interval: {interval}")
+        unknown = [metric for metric in metrics if metric not in SUM_METRICS and metric not in AVERAGE_METRICS]
+        if unknown:
+            raise ValueError(f"Unsupported metrics: {', '.join(unknown)}")
+
+        dialect_name = session.get_bind().dialect.name
+        full_hours, raw_filter = self.rollups.split_window(start, end)
+
+        # Raw edge hours and whole rollup hours are bucketed by the same SQL expression
+        raw_bucket = bucket_expression(Post.created_at, interval, dialect_name)
+        raw_platform = func.coalesce(Post.platform, UNKNOWN_PLATFORM)
+        raw_part = select(
+            raw_bucket.label('bucket'), raw_platform.label('platform'), *raw_metric_columns()
+        ).where(raw_filter)
+        if platform:
+            raw_part = raw_part.where(Post.platform == platform)
+        parts = [raw_part.group_by(raw_bucket, raw_platform)]
+
+        if full_hours:
+            rollup_bucket = bucket_expression(HourlyRollup.bucket, interval, dialect_name)
+            rollup_part = select(
+                rollup_bucket.label('bucket'), HourlyRollup.platform, *rollup_metric_columns()
+            ).where(
+                HourlyRollup.bucket >= full_hours[0],
+                HourlyRollup.bucket < full_hours[1]
+            )
+            if platform:
+                rollup_part = rollup_part.where(HourlyRollup.platform == platform)
+            parts.append(rollup_part.group_by(rollup_bucket, HourlyRollup.platform))
+
+        combined = (union_all(*parts) if len(parts) > 1 else parts[0]).subquery()
+        group_columns = [combined.c.bucket, combined.c.platform] if by_platform else [combined.c.bucket]
+        rows = session.query(
+            *group_columns,
+            *[func.sum(combined.c[metric]).label(metric) for metric in HOURLY_METRICS]
+        ).group_by(*group_columns).all()
+
+        # Gap fill: every bucket between start and end gets a value
+        buckets = []
+        bucket = floor_bucket(start, interval)
+        last_bucket = floor_bucket(end, interval)
+        while bucket <= last_bucket:
+            buckets.append(bucket)
+            bucket = next_bucket(bucket, interval)
+        positions = {bucket: index for index, bucket in enumerate(buckets)}
+
+        totals = defaultdict(lambda: {metric: [0] * len(buckets) for metric in HOURLY_METRICS})
+        for row in rows:
+            position = positions.get(parse_bucket(row.bucket))
+            if position is None:
+                continue
+            group = totals[row.platform if by_platform else ALL_PLATFORMS]
+            for metric in HOURLY_METRICS:
+                group[metric][position] += int(getattr(row, metric) or 0)
+
+        if not by_platform and not totals:
+            totals[ALL_PLATFORMS]  # An all-zero series rather than no series
+
+        series = {}
+        for group_name in sorted(totals):
+            columns = totals[group_name]
+            series[group_name] = {}
+            for metric in metrics:
+                if metric in SUM_METRICS:
+                    series[group_name][metric] = columns[SUM_METRICS[metric]]
+                else:
+                    numerator, denominator = AVERAGE_METRICS[metric]
+                    series[group_name][metric] = [
+                        value / count if count else 0.0
+                        for value, count in zip(columns[numerator], columns[denominator])
+                    ]
+
+        return {'interval': interval, 'buckets': buckets, 'series': series}
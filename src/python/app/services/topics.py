@@ -0,0 +1,225 @@
+import json
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from app.models.post import Post, Keyword, Topic, post_topic
+from database.db import session_scope
+from app.config import get_config
+from app.utils.nlp import minhash_signature, estimate_topic_similarity, lsh_band_keys
+from app.utils.cache import bump_data_version
+
+logger = logging.getLogger(__name__)
+
+# Posts whose keywords are loaded per query (keeps IN lists small)
+CLUSTER_BATCH_SIZE = 500
+
+
+class TopicClusterer:
+    """Class for incrementally clustering posts into topics with MinHash/LSH sketches."""
+
+    def __init__(self):
+        """Initialize the topic clusterer."""
+        self.config = get_config()
+        self.num_perm = self.config.TOPIC_MINHASH_PERMUTATIONS
+        self.bands = self.config.TOPIC_LSH_BANDS
+
+        # In-memory LSH index over active topics, rebuilt from the database on each run
+        self._band_index = defaultdict(set)  # (band, values) -> topic ids
+        self._signatures = {}  # topic id -> MinHash signature
+
+    def _index_topic(self, topic_id, signature):
+        """Add (or re-add) a topic signature to the LSH index."""
+        self._unindex_topic(topic_id)
+        self._signatures[topic_id] = signature
+        for key in lsh_band_keys(signature, self.bands):
+            self._band_index[key].add(topic_id)
+
+    def _unindex_topic(self, topic_id):
+        """Remove a topic from the LSH index."""
+        signature = self._signatures.pop(topic_id, None)
+        if signature is None:
+            return
+        for key in lsh_band_keys(signature, self.bands):
+            topic_ids = self._band_index.get(key)
+            if topic_ids:
+                topic_ids.discard(topic_id)
+                if not topic_ids:
+                    del self._band_index[key]
+
+    def _load_index(self, session):
+        """Load signatures of all active topics into the LSH index."""
+        self._band_index.clear()
+        self._signatures.clear()
+        active_topics = session.query(Topic.id, Topic.signature).filter(Topic.is_active.is_(True)).all()
+        for topic_id, signature in active_topics:
+            if signature:
+                self._index_topic(topic_id, json.loads(signature))
+
+    def _find_best_topic(self, signature, threshold, exclude=None):
+        """Find the most similar indexed topic above threshold, checking LSH candidates only."""
+        candidates = set()
+        for key in lsh_band_keys(signature, self.bands):
+            candidates.update(self._band_index.get(key, ()))
+        candidates.discard(exclude)
+
+        best_id, best_score = None, 0
+        for topic_id in candidates:
+            score = estimate_topic_similarity(signature, self._signatures[topic_id])
+            if score > best_score:
+                best_id, best_score = topic_id, score
+
+        if best_score >= threshold:
+            return best_id, best_score
+        return None, best_score
+
+    def _decayed_weight(self, topic, now):
+        """Exponentially decay a topic's stored weight up to now."""
+        if not topic.updated_at:
+            return topic.weight or 0.0
+        hours = max((now - topic.updated_at).total_seconds() / 3600, 0)
+        return (topic.weight or 0.0) * 0.5 ** (hours / self.config.TOPIC_DECAY_HALF_LIFE_HOURS)
+
+    def _refresh_topic(self, topic, keyword_counts):
+        """Store a topic's keyword counts and recompute its label and signature."""
+        top_keywords = keyword_counts.most_common(self.config.TOPIC_MAX_KEYWORDS)
+        topic.keywords = json.dumps(dict(top_keywords))
+        topic.label = ', '.join(word for word, _ in top_keywords[:3])
+
+        signature_keywords = [word for word, _ in top_keywords[:self.config.TOPIC_SIGNATURE_KEYWORDS]]
+        signature = minhash_signature(signature_keywords, self.num_perm)
+        topic.signature = json.dumps(signature)
+        return signature
+
+    def cluster_new_posts(self, limit=None):
+        """Assign posts that have keywords but no topic to the closest topic (or a new one)."""
+        assigned_count = 0
+        now = datetime.utcnow()
+        threshold = self.config.TOPIC_SIMILARITY_THRESHOLD
+
+        with session_scope() as session:
+            self._load_index(session)
+
+            query = session.query(Post.id, Post.sentiment_score).filter(
+                Post.keywords.any(),
+                ~Post.topics.any()
+            ).order_by(Post.created_at)
+
+            if limit:
+                query = query.limit(limit)
+
+            posts = query.all()
+
+            topics = {}  # topic id -> Topic touched in this run
+            topic_keywords = {}  # topic id -> Counter of keyword frequencies
+
+            for start in range(0, len(posts), CLUSTER_BATCH_SIZE):
+                batch = posts[start:start + CLUSTER_BATCH_SIZE]
+
+                post_keywords = defaultdict(Counter)
+                keyword_rows = session.query(Keyword.post_id, Keyword.text, Keyword.frequency).filter(
+                    Keyword.post_id.in_([post.id for post in batch])
+                ).all()
+                for row in keyword_rows:
+                    post_keywords[row.post_id][row.text] += row.frequency or 1
+
+                memberships = []
+                for post in batch:
+                    counts = post_keywords.get(post.id)
+                    if not counts:
+                        continue
+
+                    signature = minhash_signature(counts.keys(), self.num_perm)
+                    topic_id, _ = self._find_best_topic(signature, threshold)
+
+                    if topic_id is None:
+                        topic = Topic(post_count=0, sentiment_sum=0.0, sentiment_count=0, weight=0.0,
+                                      is_active=True, created_at=now, updated_at=now)
+                        session.add(topic)
+                        keyword_counts = Counter()
+                    else:
+                        topic = topics.get(topic_id) or session.get(Topic, topic_id)
+                        keyword_counts = topic_keywords.get(topic_id) or Counter(json.loads(topic.keywords or '{}'))
+
+                    keyword_counts.update(counts)
+                    topic.weight = self._decayed_weight(topic, now) + 1
+                    topic.updated_at = now
+                    topic.post_count = (topic.post_count or 0) + 1
+                    if post.sentiment_score is not None:
+                        topic.sentiment_sum = (topic.sentiment_sum or 0.0) + post.sentiment_score
+                        topic.sentiment_count = (topic.sentiment_count or 0) + 1
+
+                    signature = self._refresh_topic(topic, keyword_counts)
+                    if topic.id is None:
+                        session.flush()  # Assign an id to the new topic
+
+                    self._index_topic(topic.id, signature)
+                    topics[topic.id] = topic
+                    topic_keywords[topic.id] = keyword_counts
+                    memberships.append({'post_id': post.id, 'topic_id': topic.id})
+
+                if memberships:
+                    session.execute(post_topic.insert(), memberships)
+                    assigned_count += len(memberships)
+
+        if assigned_count:
+            bump_data_version()
+        return assigned_count
+
+    def _merge_topics(self, session, target, source, now):
+        """Merge source topic into target, moving its posts and keyword counts."""
+        keyword_counts = Counter(json.loads(target.keywords or '{}'))
+        keyword_counts.update(json.loads(source.keywords or '{}'))
+
+        target.post_count = (target.post_count or 0) + (source.post_count or 0)
+        target.sentiment_sum = (target.sentiment_sum or 0.0) + (source.sentiment_sum or 0.0)
+        target.sentiment_count = (target.sentiment_count or 0) + (source.sentiment_count or 0)
+        target.weight = self._decayed_weight(target, now) + self._decayed_weight(source, now)
+        target.updated_at = now
+        signature = self._refresh_topic(target, keyword_counts)
+
+        source.is_active = False
+        source.merged_into_id = target.id
+        session.execute(
+            post_topic.update().where(post_topic.c.topic_id == source.id).values(topic_id=target.id)
+        )
+
+        self._unindex_topic(source.id)
+        self._index_topic(target.id, signature)
+
+    def decay_and_merge(self):
+        """Retire topics whose activity has decayed away and merge near-duplicate topics."""
+        now = datetime.utcnow()
+        retired_count = 0
+        merged_count = 0
+
+        with session_scope() as session:
+            active_topics = session.query(Topic).filter(Topic.is_active.is_(True)).all()
+            topics_by_id = {topic.id: topic for topic in active_topics}
+
+            self._band_index.clear()
+            self._signatures.clear()
+
+            for topic in active_topics:
+                if self._decayed_weight(topic, now) < self.config.TOPIC_MIN_WEIGHT:
+                    topic.is_active = False
+                    retired_count += 1
+                elif topic.signature:
+                    self._index_topic(topic.id, json.loads(topic.signature))
+
+            # Larger topics absorb their near-duplicates first
+            for topic in sorted(active_topics, key=lambda t: t.post_count or 0, reverse=True):
+                if not topic.is_active or topic.id not in self._signatures:
+                    continue
+                while True:
+                    match_id, _ = self._find_best_topic(
+                        self._signatures[topic.id], self.config.TOPIC_MERGE_THRESHOLD, exclude=topic.id
+                    )
+                    if match_id is None:
+                        break
+                    self._merge_topics(session, topic, topics_by_id[match_id], now)
+                    merged_count += 1
+
+        if merged_count or retired_count:
+            bump_data_version()
+        return {'merged': merged_count, 'retired': retired_count}
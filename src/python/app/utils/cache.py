@@ -0,0 +1,203 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, make_response
+
+from app.config import get_config
+
+logger = logging.getLogger(__name__)
+
+
+class DataVersion:
+    """Data version counter stored in a small file so every worker process sees bumps."""
+
+    def __init__(self, path):
+        """Initialize the counter backed by the given file."""
+        self.path = path
+        self._stat_key = None
+        self._value = '0'
+        self._lock = threading.Lock()
+
+    def current(self):
+        """Return the current version; a stat() call unless the file changed."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return '0'
+
+        # os.replace() in bump() gives the file a new inode and mtime
+        stat_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stat_key != self._stat_key:
+            with self._lock:
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        self._value = f.read().strip() or '0'
+                except FileNotFoundError:
+                    self._value = '0'
+                self._stat_key = stat_key
+        return self._value
+
+    def bump(self):
+        """Publish a new version, invalidating cached responses in every process."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        version = f"{time.time_ns()}-{os.getpid()}"
+        temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(version)
+        os.replace(temp_path, self.path)
+        return version
+
+
+class ResponseCache:
+    """Two-tier cache of serialized API responses: a bounded in-memory LRU and an
+    optional SQLite file shared by all workers. Entries are valid for one data
+    version and at most `ttl` seconds (sliding windows move even without ingest)."""
+
+    def __init__(self, max_entries=256, ttl=300, disk_path=None):
+        """Initialize the cache."""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_path = disk_path
+        self._memory = OrderedDict()  # key -> (version, expires_at, body)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+            with self._disk() as connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS response_cache ("
+                    "key TEXT PRIMARY KEY, version TEXT, expires_at REAL, body BLOB)"
+                )
+
+    def _disk(self):
+        """Per-thread connection to the shared on-disk tier."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.disk_path, timeout=1)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key, version):
+        """Return the cached body for key at this data version, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                if entry[0] == version and entry[1] > now:
+                    self._memory.move_to_end(key)
+                    return entry[2]
+                del self._memory[key]
+
+        if not self.disk_path:
+            return None
+
+        try:
+            row = self._disk().execute(
+                "SELECT expires_at, body FROM response_cache WHERE key = ? AND version = ? AND expires_at > ?",
+                (key, version, now)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache disk read failed: {e}")
+            return None
+
+        if row:
+            self._remember(key, version, row[0], row[1])
+            return row[1]
+        return None
+
+    def set(self, key, version, body):
+        """Store a response body for key at this data version."""
+        expires_at = time.time() + self.ttl
+        self._remember(key, version, expires_at, body)
+
+        if not self.disk_path:
+            return
+
+        try:
+            with self._disk() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, version, expires_at, body) VALUES (?, ?, ?, ?)",
+                    (key, version, expires_at, body)
+                )
+                self._writes += 1
+                if self._writes % 100 == 0:
+                    # Drop entries from older data versions and expired ones
+                    connection.execute(
+                        "DELETE FROM response_cache WHERE version != ? OR expires_at <= ?",
+                        (version, time.time())
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache disk write failed: {e}")
+
+    def _remember(self, key, version, expires_at, body):
+        """Insert into the in-memory LRU, evicting the least recently used entries."""
+        with self._lock:
+            self._memory[key] = (version, expires_at, body)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached response."""
+        with self._lock:
+            self._memory.clear()
+        if self.disk_path:
+            with self._disk() as connection:
+                connection.execute("DELETE FROM response_cache")
+
+
+_config = get_config()
+data_version = DataVersion(_config.DATA_VERSION_FILE)
+response_cache = ResponseCache(
+    max_entries=_config.RESPONSE_CACHE_SIZE,
+    ttl=_config.RESPONSE_CACHE_TTL,
+    disk_path=_config.RESPONSE_CACHE_FILE
+)
+
+
+def bump_data_version():
+    """Invalidate cached API responses after new data was committed."""
+    return data_version.bump()
+
+
+def cache_key():
+    """Cache key for the current request: path plus sorted, non-empty query parameters."""
+    params = sorted(
+        (name.strip().lower(), value.strip())
+        for name, value in request.args.items(multi=True)
+        if value.strip()
+    )
+    return request.path + '?' + '&'.join(f'{name}={value}' for name, value in params)
+
+
+def cached_response(view):
+    """Serve a JSON view from the response cache until the data version changes."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not _config.RESPONSE_CACHE_ENABLED:
+            return view(*args, **kwargs)
+
+        key = cache_key()
+        version = data_version.current()
+        body = response_cache.get(key, version)
+        if body is not None:
+            response = make_response(body)
+            response.mimetype = 'application/json'
+            response.headers['X-Cache'] = 'HIT'
+            return response
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200 and response.mimetype == 'application/json':
+            response_cache.set(key, version, response.get_data())
+        response.headers['X-Cache'] = 'MISS'
+        return response
+
+    return wrapper
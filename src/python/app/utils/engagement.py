@@ -0,0 +1,38 @@
+from sqlalchemy import case, func
+
+from app.config import get_config
+
+# Fallback weights for platforms without an entry in ENGAGEMENT_WEIGHTS
+DEFAULT_PLATFORM = 'default'
+
+
+def platform_weights(platform, weights=None):
+    """Return the {'likes', 'shares'} weights for a platform; weights it doesn't set come from the default."""
+    weights = weights if weights is not None else get_config().ENGAGEMENT_WEIGHTS
+    return {**weights[DEFAULT_PLATFORM], **weights.get((platform or '').lower(), {})}
+
+
+def engagement_score(platform, likes, shares, weights=None):
+    """Weighted engagement score of one post."""
+    platform_weight = platform_weights(platform, weights)
+    return float((likes or 0) * platform_weight['likes'] + (shares or 0) * platform_weight['shares'])
+
+
+def engagement_score_expression(platform_column, likes_column, shares_column, weights=None):
+    """SQL expression computing engagement_score with the same weights as engagement_score()."""
+    weights = weights if weights is not None else get_config().ENGAGEMENT_WEIGHTS
+    likes = func.coalesce(likes_column, 0)
+    shares = func.coalesce(shares_column, 0)
+
+    default = weights[DEFAULT_PLATFORM]
+    default_score = likes * default['likes'] + shares * default['shares']
+    platforms = [name for name in weights if name != DEFAULT_PLATFORM]
+    if not platforms:
+        return default_score
+
+    platform_name = func.lower(platform_column)
+    when_platforms = []
+    for name in platforms:
+        platform_weight = platform_weights(name, weights)
+        when_platforms.append((platform_name == name, likes * platform_weight['likes'] + shares * platform_weight['shares']))
+    return case(*when_platforms, else_=default_score)
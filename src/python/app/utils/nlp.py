@@ -5,7 +5,11 @@ from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
 from nltk.stem import WordNetLemmatizer
 from collections import Counter
+from functools import lru_cache
+import hashlib
+import random
 import string
+import threading
 
 # Download NLTK resources if they don't exist
 try:
@@ -23,6 +27,17 @@ try:
 except LookupError:
     nltk.download('wordnet')
 
+# Token -> lemma cache size; word frequencies are Zipf-distributed, so a bounded
+# cache serves nearly all lookups from memory
+LEMMA_CACHE_SIZE = 50000
+
+_lemmatizer = None
+_lemmatizer_lock = threading.Lock()
+
+# MinHash parameters (Mersenne prime modulus, 32-bit hash values)
+_MINHASH_PRIME = (1 << 61) - 1
+_MINHASH_MAX = (1 << 32) - 1
+
 
 def clean_text(text):
     """Clean and normalize text."""
@@ -86,11 +101,33 @@ def extract_hashtags(text):
     return hashtags
 
 
+def content_hash(platform, content):
+    """Hash identifying a post by platform and whitespace-normalized content."""
+    normalized = ' '.join((content or '').split())
+    return hashlib.sha256(f"{(platform or '').lower()}\n{normalized}".encode('utf-8')).hexdigest()
+
+
+def get_lemmatizer():
+    """Return the shared lemmatizer, loading WordNet once."""
+    global _lemmatizer
+    if _lemmatizer is None:
+        with _lemmatizer_lock:
+            if _lemmatizer is None:
+                lemmatizer = WordNetLemmatizer()
+                lemmatizer.lemmatize('warmup')  # Force the lazy WordNet load under the lock
+                _lemmatizer = lemmatizer
+    return _lemmatizer
+
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def lemmatize_token(token):
+    """Lemmatize a single token, memoizing the result."""
+    return get_lemmatizer().lemmatize(token)
+
+
 def lemmatize_text(tokens):
     """Lemmatize tokens to get base forms."""
-    lemmatizer = WordNetLemmatizer()
-    lemmatized = [lemmatizer.lemmatize(token) for token in tokens]
-    return lemmatized
+    return [lemmatize_token(token) for token in tokens]
 
 
 def create_word_cloud_data(texts, top_n=100):
@@ -127,3 +164,46 @@ def calculate_topic_similarity(topic1_keywords, topic2_keywords):
         return 0
     
     return intersection / union
+
+
+def _stable_token_hash(token):
+    """Hash a token to a 32-bit integer that is stable across processes."""
+    digest = hashlib.blake2b(token.encode('utf-8'), digest_size=4).digest()
+    return int.from_bytes(digest, 'little')
+
+
+@lru_cache(maxsize=8)
+def _minhash_coefficients(num_perm, seed=1):
+    """Generate the (a, b) coefficients of the MinHash permutation family."""
+    rng = random.Random(seed)
+    a = [rng.randrange(1, _MINHASH_PRIME) for _ in range(num_perm)]
+    b = [rng.randrange(0, _MINHASH_PRIME) for _ in range(num_perm)]
+    return a, b
+
+
+def minhash_signature(keywords, num_perm=64):
+    """Compute a MinHash signature approximating the keyword set."""
+    hashes = [_stable_token_hash(keyword) for keyword in set(keywords)]
+    if not hashes:
+        return []
+
+    a, b = _minhash_coefficients(num_perm)
+    return [
+        min(((a_i * h + b_i) % _MINHASH_PRIME) & _MINHASH_MAX for h in hashes)
+        for a_i, b_i in zip(a, b)
+    ]
+
+
+def estimate_topic_similarity(signature1, signature2):
+    """Estimate Jaccard similarity between two topics from their MinHash signatures."""
+    if not signature1 or len(signature1) != len(signature2):
+        return 0
+
+    matches = sum(1 for h1, h2 in zip(signature1, signature2) if h1 == h2)
+    return matches / len(signature1)
+
+
+def lsh_band_keys(signature, bands):
+    """Split a MinHash signature into LSH band keys for candidate lookup."""
+    rows = len(signature) // bands
+    return [(band, tuple(signature[band * rows:(band + 1) * rows])) for band in range(bands)]
@@ -0,0 +1,40 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+
+def encode_cursor(sort_name, sort_value, row_id):
+    """Encode the last row of a page as an opaque cursor string."""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_name, sort_value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort_name, is_datetime=False):
+    """Decode a cursor into (sort_value, row_id); raises ValueError if it is invalid
+    or was issued for a different ordering."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        name, sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if is_datetime:
+            sort_value = datetime.fromisoformat(sort_value)
+    except (binascii.Error, UnicodeError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+    if name != sort_name or not isinstance(row_id, int) or sort_value is None:
+        raise ValueError("Cursor does not match the requested ordering")
+    return sort_value, row_id
+
+
+def keyset_after(sort_column, id_column, sort_value, row_id, descending=True):
+    """Filter selecting the rows after (sort_value, row_id) in (sort, id) order.
+
+    A row-value comparison lets the database seek an index on (sort, id) to the cursor.
+    """
+    if descending:
+        return tuple_(sort_column, id_column) < tuple_(sort_value, row_id)
+    return tuple_(sort_column, id_column) > tuple_(sort_value, row_id)
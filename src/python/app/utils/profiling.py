@@ -0,0 +1,47 @@
+import hmac
+
+from flask import current_app, g, request
+
+from app.config import get_config
+from database.db import engine, read_engine
+from database.profiling import QueryProfiler, current_profile
+
+_config = get_config()
+
+profiler = QueryProfiler(
+    [engine, read_engine],
+    slowest=_config.QUERY_PROFILING_SLOWEST,
+    history=_config.QUERY_PROFILING_HISTORY,
+    repeat_threshold=_config.QUERY_PROFILING_REPEAT_THRESHOLD
+)
+if _config.QUERY_PROFILING:
+    profiler.enable()
+
+
+def start_query_profile():
+    """before_request hook: profile the SQL of /api/* requests while profiling is enabled."""
+    if profiler.enabled and request.path.startswith('/api/') and not request.path.startswith('/api/debug/'):
+        g.query_profile_token = profiler.start(f"{request.method} {request.full_path.rstrip('?')}")
+
+
+def add_server_timing(response):
+    """after_request hook: report the request's SQL count and time in a Server-Timing header."""
+    profile = current_profile.get()
+    if profile is not None:
+        response.headers.add('Server-Timing', f'db;dur={profile.seconds * 1000:.2f};desc="{profile.count} queries"')
+    return response
+
+
+def finish_query_profile(exception=None):
+    """teardown_request hook: close the request's profile, also when the view raised."""
+    token = g.pop('query_profile_token', None)
+    if token is not None:
+        profiler.finish(token)
+
+
+def debug_access_allowed():
+    """Debug endpoints are open in debug mode and otherwise need X-Debug-Token = DEBUG_API_TOKEN."""
+    if current_app.debug:
+        return True
+    token = _config.DEBUG_API_TOKEN
+    return bool(token) and hmac.compare_digest(request.headers.get('X-Debug-Token', ''), token)
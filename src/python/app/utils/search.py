@@ -0,0 +1,43 @@
+import re
+
+# A quoted phrase or a bare term (optionally ending in * for prefix search)
+QUERY_TOKEN = re.compile(r'"[^"]*"|\S+')
+WORD = re.compile(r'\w+')
+
+
+def parse_search_query(query_string):
+    """Split a user query into (words, is_phrase, is_prefix) terms."""
+    terms = []
+    for token in QUERY_TOKEN.findall(query_string or ''):
+        words = WORD.findall(token.lower())
+        if not words:
+            continue
+        if token.startswith('"'):
+            terms.append((words, True, False))
+        else:
+            # Punctuation inside a bare term splits it into separate terms
+            for word in words[:-1]:
+                terms.append(([word], False, False))
+            terms.append(([words[-1]], False, token.endswith('*')))
+    return terms
+
+
+def build_fts_query(query_string):
+    """Translate a user query into an SQLite FTS5 MATCH expression (terms are ANDed)."""
+    expressions = []
+    for words, _, is_prefix in parse_search_query(query_string):
+        # Quoting every term keeps FTS5 operators in user input from being interpreted
+        expression = '"' + ' '.join(words) + '"'
+        expressions.append(expression + '*' if is_prefix else expression)
+    return ' '.join(expressions)
+
+
+def build_tsquery(query_string):
+    """Translate a user query into a Postgres to_tsquery expression (terms are ANDed)."""
+    expressions = []
+    for words, _, is_prefix in parse_search_query(query_string):
+        expression = ' <-> '.join(words)
+        if len(words) > 1:
+            expression = f'({expression})'
+        expressions.append(expression + ':*' if is_prefix else expression)
+    return ' & '.join(expressions)
@@ -0,0 +1,94 @@
+import gzip
+import json
+from datetime import date, datetime
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+from app.config import get_config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Response bodies worth compressing (exports stream and are left alone)
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/csv', 'text/plain', 'application/x-ndjson')
+
+_config = get_config()
+
+
+def json_default(value):
+    """Encode values json can't: datetimes as ISO 8601, the rest as Flask does."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)
+
+
+def dumps_bytes(obj, sort_keys=False, indent=False):
+    """Encode obj as UTF-8 JSON bytes, with orjson when it is installed.
+
+    Datetimes, dataclasses and numpy arrays are encoded natively by orjson, so callers can
+    pass query rows and columnar series without converting them first.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=json_default, option=option)
+    return json.dumps(obj, default=json_default, ensure_ascii=False, sort_keys=sort_keys,
+                      indent=2 if indent else None, separators=None if indent else (',', ':')).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider encoding responses with orjson (stdlib json as fallback)."""
+
+    default = staticmethod(json_default)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps_bytes(obj, sort_keys=self.sort_keys).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        # Bytes go straight into the response, skipping a str round trip
+        return self._app.response_class(dumps_bytes(obj, self.sort_keys, indent) + b'\n', mimetype=self.mimetype)
+
+
+def _accepted_encodings():
+    """Content codings this server can produce, preferred first."""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def compress_response(response):
+    """after_request hook: gzip or brotli-encode sizeable bodies the client accepts."""
+    if (not _config.RESPONSE_COMPRESSION or response.direct_passthrough or response.is_streamed
+            or not 200 <= response.status_code < 300 or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < _config.RESPONSE_COMPRESSION_MIN_SIZE:
+        return response
+
+    encoding = request.accept_encodings.best_match(_accepted_encodings())
+    if encoding == 'br':
+        data = brotli.compress(data, quality=_config.RESPONSE_BROTLI_QUALITY)
+    elif encoding == 'gzip':
+        data = gzip.compress(data, compresslevel=_config.RESPONSE_GZIP_LEVEL)
+    else:
+        return response
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    return response
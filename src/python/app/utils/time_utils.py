@@ -1,5 +1,6 @@
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func
 
 def get_current_utc_time():
     """Returns the current time in UTC."""
@@ -13,3 +14,52 @@ def format_datetime(dt_object, fmt="%Y-%m-%d %H:%M:%S %Z%z"):
 
 # Add other time-related utility functions as needed.
 # For example, parsing date strings, converting timezones, etc.
+
+
+# Time-series bucketing helpers shared by the rollups and the time-series engine
+BUCKET_INTERVALS = ('hour', 'day', 'week', 'month')
+
+_SQLITE_BUCKET_ARGS = {
+    'hour': ('%Y-%m-%d %H:00:00',),
+    'day': ('%Y-%m-%d 00:00:00',),
+    'week': ('%Y-%m-%d 00:00:00', 'weekday 0', '-6 days'),  # Monday of the ISO week
+    'month': ('%Y-%m-01 00:00:00',),
+}
+
+
+def bucket_expression(column, interval, dialect_name):
+    """SQL expression truncating a timestamp column to the start of its bucket."""
+    if dialect_name == 'postgresql':
+        return func.date_trunc(interval, column)
+    fmt, *modifiers = _SQLITE_BUCKET_ARGS[interval]
+    return func.strftime(fmt, column, *modifiers)
+
+
+def floor_bucket(dt, interval):
+    """Truncate a datetime to the start of its bucket (weeks start on Monday)."""
+    if interval == 'hour':
+        return dt.replace(minute=0, second=0, microsecond=0)
+    day_start = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == 'day':
+        return day_start
+    if interval == 'week':
+        return day_start - timedelta(days=day_start.weekday())
+    return day_start.replace(day=1)
+
+
+def next_bucket(dt, interval):
+    """Return the start of the bucket following the one starting at dt."""
+    if interval == 'hour':
+        return dt + timedelta(hours=1)
+    if interval == 'day':
+        return dt + timedelta(days=1)
+    if interval == 'week':
+        return dt + timedelta(weeks=1)
+    return (dt.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def parse_bucket(value):
+    """Convert a bucket value returned by the database to a datetime."""
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    return datetime.strptime(value[:19], '%Y-%m-%d %H:%M:%S')
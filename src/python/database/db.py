@@ -1,35 +1,143 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
-from contextlib import contextmanager
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
 import os
+import threading
 
-# Create database directory if it doesn't exist
-db_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance')
-os.makedirs(db_dir, exist_ok=True)
+from app.config import get_config
 
-# Database URL
-DATABASE_URL = f'sqlite:///{os.path.join(db_dir, "app.db")}'
+config = get_config()
 
-# Create engine
-engine = create_engine(DATABASE_URL)
+# Database URLs; reads go to the replica when one is configured
+DATABASE_URL = config.DATABASE_URI
+DATABASE_READ_URL = config.DATABASE_READ_URI or DATABASE_URL
 
-# Create session factory
+
+def _create_engine(url, read_only=False):
+    """Engine for url: busy timeout on SQLite, a sized, pre-pinged connection pool elsewhere."""
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite':
+        # Create database directory if it doesn't exist
+        if url.database and url.database != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(url.database)), exist_ok=True)
+        return create_engine(url, connect_args={'timeout': config.SQLITE_BUSY_TIMEOUT})
+
+    options = {
+        'pool_size': config.DB_POOL_SIZE,
+        'max_overflow': config.DB_MAX_OVERFLOW,
+        'pool_timeout': config.DB_POOL_TIMEOUT,
+        'pool_recycle': config.DB_POOL_RECYCLE,
+        'pool_pre_ping': True,  # Replace connections the server or a proxy dropped while idle
+    }
+    if read_only and url.get_backend_name() == 'postgresql':
+        options['execution_options'] = {'postgresql_readonly': True}
+    return create_engine(url, **options)
+
+
+# Write engine: on SQLite every transaction goes through the serialized writer below
+engine = _create_engine(DATABASE_URL)
+
+# Read engine: dashboard and API queries, never blocked by ingest under WAL
+read_engine = _create_engine(DATABASE_READ_URL, read_only=True)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, read_only):
+    """Per-connection SQLite settings: WAL journal, relaxed fsync, bigger cache and mmap."""
+    cursor = dbapi_connection.cursor()
+    if not read_only:
+        # WAL is persistent in the database file; readers then see the last commit while a write runs
+        cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute(f'PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}')
+    cursor.execute(f'PRAGMA busy_timeout={int(config.SQLITE_BUSY_TIMEOUT * 1000)}')
+    cursor.execute(f'PRAGMA cache_size=-{config.SQLITE_CACHE_SIZE_MB * 1024}')
+    cursor.execute(f'PRAGMA mmap_size={config.SQLITE_MMAP_SIZE_MB * 1024 * 1024}')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    if read_only:
+        cursor.execute('PRAGMA query_only=ON')
+    cursor.close()
+
+
+if engine.dialect.name == 'sqlite':
+    @event.listens_for(engine, 'connect')
+    def _on_write_connect(dbapi_connection, connection_record):
+        _apply_sqlite_pragmas(dbapi_connection, read_only=False)
+        # Let SQLAlchemy issue BEGIN itself (see _on_write_begin)
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def _on_write_begin(connection):
+        # Take the write lock up front: a deferred transaction that reads first can't wait for
+        # another process's writer to finish and fails with "database is locked" instead
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+
+if read_engine.dialect.name == 'sqlite':
+    @event.listens_for(read_engine, 'connect')
+    def _on_read_connect(dbapi_connection, connection_record):
+        _apply_sqlite_pragmas(dbapi_connection, read_only=True)
+
+# Create session factories
 Session = sessionmaker(bind=engine)
+ReadSession = sessionmaker(bind=read_engine)
+
+# SQLite allows one writer at a time; queue writers in this process instead of racing for the lock.
+# Server databases lock rows, so their writers run concurrently.
+_write_lock = threading.RLock() if engine.dialect.name == 'sqlite' else nullcontext()
+
+def _reset_after_fork():
+    """Give a forked child its own connections and writer lock.
+
+    Pooled connections are shared sockets/file handles with the parent, so the child drops
+    them without closing; the lock may have been held by a parent thread that doesn't exist here.
+    """
+    global _write_lock
+    engine.dispose(close=False)
+    read_engine.dispose(close=False)
+    if engine.dialect.name == 'sqlite':
+        _write_lock = threading.RLock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
 @contextmanager
 def session_scope():
-    """Provide a transactional scope around a series of operations."""
-    session = Session()
+    """Provide a transactional scope around a series of operations (serialized writer on SQLite)."""
+    with _write_lock:
+        session = Session()
+        try:
+            yield session
+            session.commit()
+        except:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+@contextmanager
+def read_session_scope():
+    """Provide a read-only session; nothing is committed."""
+    session = ReadSession()
     try:
         yield session
-        session.commit()
-    except:
-        session.rollback()
-        raise
     finally:
+        session.rollback()
         session.close()
 
 def init_db():
-    """Initialize the database, creating all tables."""
+    """Initialize the database, creating all tables and any missing columns and indexes."""
     from app.models.post import Base
-    Base.metadata.create_all(engine) 
\ No newline at end of file
+    from database.schema import ensure_columns, ensure_indexes, ensure_search_index, mark_extracted_posts
+    Base.metadata.create_all(engine)
+    # create_all skips columns and indexes of tables that already exist
+    ensure_columns(engine, Base.metadata)
+    ensure_indexes(engine, Base.metadata)
+    ensure_search_index(engine)
+    # Posts processed before keywords_extracted_at existed must not be extracted again
+    mark_extracted_posts(engine, datetime.utcnow())
+    # Posts stored before content_hash existed need one, or ingest dedupe misses them
+    from app.services.importer import backfill_content_hashes
+    backfill_content_hashes()
+    # Databases created before the rollup tables have posts but no rollups to answer from
+    from app.services.rollups import RollupService
+    RollupService().ensure_built()
@@ -0,0 +1,34 @@
+from database.db import engine
+from database.schema import ensure_columns, ensure_indexes
+
+
+def upgrade():
+    """Add posts.content_hash, fill it for existing posts and index it for import dedupe."""
+    from app.models.post import Base
+    from app.services.importer import backfill_content_hashes
+    try:
+        added = ensure_columns(engine, Base.metadata)
+        print(f"Added {len(added)} columns: {', '.join(added) or 'none missing'}")
+        updated_count = backfill_content_hashes()
+        print(f"Hashed {updated_count} existing posts")
+        created = ensure_indexes(engine, Base.metadata)
+        print(f"Created {len(created)} indexes: {', '.join(created) or 'none missing'}")
+    except Exception as e:
+        print(f"Error adding content hashes: {str(e)}")
+        raise
+
+
+def downgrade():
+    """Remove the content hash index (the column stays; SQLite can't drop columns directly)."""
+    from sqlalchemy import text
+    try:
+        with engine.begin() as conn:
+            conn.execute(text('DROP INDEX IF EXISTS ix_posts_content_hash'))
+        print("Dropped ix_posts_content_hash")
+    except Exception as e:
+        print(f"Error in downgrade: {str(e)}")
+        raise
+
+
+if __name__ == '__main__':
+    upgrade()
@@ -0,0 +1,28 @@
+from database.db import engine
+from database.schema import ensure_indexes, drop_indexes
+
+
+def upgrade():
+    """Create secondary indexes matching the analyzer's window filters and joins."""
+    from app.models.post import Base
+    try:
+        created = ensure_indexes(engine, Base.metadata)
+        print(f"Created {len(created)} indexes: {', '.join(created) or 'none missing'}")
+    except Exception as e:
+        print(f"Error creating indexes: {str(e)}")
+        raise
+
+
+def downgrade():
+    """Drop the secondary indexes."""
+    from app.models.post import Base
+    try:
+        dropped = drop_indexes(engine, Base.metadata)
+        print(f"Dropped {len(dropped)} indexes")
+    except Exception as e:
+        print(f"Error dropping indexes: {str(e)}")
+        raise
+
+
+if __name__ == '__main__':
+    upgrade()
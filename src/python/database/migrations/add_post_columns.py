@@ -1,18 +1,8 @@
-from sqlalchemy import create_engine, Column, String, Float, text
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
+from sqlalchemy import text
 
-# Load environment variables
-load_dotenv()
+from database.db import engine, Session
 
-# Get database URL from environment
-DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///instance/app.db')
-
-# Create engine and session
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
+# Engine built from Config.DATABASE_URI, same database as the app
 session = Session()
 
 def upgrade():
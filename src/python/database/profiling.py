@@ -0,0 +1,183 @@
+import contextvars
+import heapq
+import threading
+import time
+from collections import Counter, deque
+
+from sqlalchemy import event
+
+from database.schema import explain_query_plan, find_full_scans
+
+# Profile collecting the statements of the current request; copy the context into worker threads
+current_profile = contextvars.ContextVar('current_profile', default=None)
+
+
+def _is_select(statement):
+    return statement.lstrip().upper().startswith(('SELECT', 'WITH'))
+
+
+class QueryProfile:
+    """Statements executed on behalf of one request: count, total time, repeats and the slowest."""
+
+    def __init__(self, label, keep=5):
+        """Initialize an empty profile; `keep` slowest statements are retained."""
+        self.label = label
+        self.keep = keep
+        self.started = time.perf_counter()
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()  # statement -> executions
+        self.slowest = []  # min-heap of (seconds, statement, parameters)
+        self._lock = threading.Lock()  # Widget queries record from several threads
+
+    def record(self, statement, parameters, seconds):
+        """Add one executed statement."""
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.statements[statement] += 1
+            entry = (seconds, statement, parameters)
+            if len(self.slowest) < self.keep:
+                heapq.heappush(self.slowest, entry)
+            elif seconds > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+
+    def repeated(self, threshold):
+        """Statements run at least `threshold` times (N+1 suspects), most frequent first."""
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+    def summary(self, repeat_threshold):
+        """Plain dict of the profile for the debug endpoint."""
+        with self._lock:
+            return {
+                'request': self.label,
+                'queries': self.count,
+                'sql_ms': round(self.seconds * 1000, 2),
+                'total_ms': round((time.perf_counter() - self.started) * 1000, 2),
+                'slowest': [
+                    {'statement': statement, 'ms': round(seconds * 1000, 2)}
+                    for seconds, statement, _ in sorted(self.slowest, key=lambda entry: entry[0], reverse=True)
+                ],
+                'repeated': [
+                    {'statement': statement, 'count': count} for statement, count in self.repeated(repeat_threshold)
+                ],
+            }
+
+
+class QueryProfiler:
+    """Times SQL statements on the given engines for requests that started a profile.
+
+    The cursor hooks are only attached while profiling is enabled, so a disabled profiler
+    costs nothing per statement. Toggling applies to the current process only.
+    """
+
+    def __init__(self, engines, slowest=20, history=100, repeat_threshold=5):
+        """Initialize a disabled profiler; call enable() to attach the hooks."""
+        self.engines = list(engines)
+        self.slowest_kept = slowest
+        self.repeat_threshold = repeat_threshold
+        self.recent = deque(maxlen=history)  # Summaries of the last profiled requests
+        self.slowest = {}  # statement -> (seconds, parameters, request, engine) of its slowest run
+        self.enabled = False
+        self._plans = {}  # statement -> plan lines, explained once
+        self._lock = threading.Lock()
+
+    def enable(self):
+        """Attach the cursor hooks to every engine."""
+        with self._lock:
+            if not self.enabled:
+                for engine in self.engines:
+                    event.listen(engine, 'before_cursor_execute', self._before_execute)
+                    event.listen(engine, 'after_cursor_execute', self._after_execute)
+                self.enabled = True
+
+    def disable(self):
+        """Detach the hooks; requests already being profiled stop recording."""
+        with self._lock:
+            if self.enabled:
+                for engine in self.engines:
+                    event.remove(engine, 'before_cursor_execute', self._before_execute)
+                    event.remove(engine, 'after_cursor_execute', self._after_execute)
+                self.enabled = False
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if current_profile.get() is not None:
+            conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        profile = current_profile.get()
+        started = conn.info.get('query_started')
+        if profile is None or not started:
+            return
+        seconds = time.perf_counter() - started.pop()
+
+        # executemany parameter lists can be huge and can't be explained anyway
+        parameters = None if executemany else parameters
+        profile.record(statement, parameters, seconds)
+        self._note_slow(statement, parameters, seconds, profile.label, conn.engine)
+
+    def _note_slow(self, statement, parameters, seconds, label, engine):
+        """Keep the slowest run of each statement, for the slowest_kept slowest statements."""
+        with self._lock:
+            known = self.slowest.get(statement)
+            if known is not None and known[0] >= seconds:
+                return
+            self.slowest[statement] = (seconds, parameters, label, engine)
+            if len(self.slowest) > self.slowest_kept:
+                fastest = min(self.slowest, key=lambda key: self.slowest[key][0])
+                del self.slowest[fastest]
+                self._plans.pop(fastest, None)
+
+    def start(self, label):
+        """Begin profiling the current context; returns the token for finish()."""
+        return current_profile.set(QueryProfile(label))
+
+    def finish(self, token):
+        """End the profile started with token and return it (None if there was none)."""
+        profile = current_profile.get()
+        current_profile.reset(token)
+        if profile is not None:
+            self.recent.append(profile.summary(self.repeat_threshold))
+        return profile
+
+    def plan(self, statement, parameters, engine):
+        """Query plan of a SELECT (cached per statement); None for writes or unexplainable ones."""
+        if statement in self._plans:
+            return self._plans[statement]
+        plan = None
+        if parameters is not None and _is_select(statement):
+            # Our own EXPLAIN must not show up in a profile
+            token = current_profile.set(None)
+            try:
+                with engine.connect() as connection:
+                    plan = explain_query_plan(connection, statement, parameters)
+            except Exception as e:
+                plan = [f"EXPLAIN failed: {e}"]
+            finally:
+                current_profile.reset(token)
+        self._plans[statement] = plan
+        return plan
+
+    def report(self):
+        """Slowest statements with their plans and full scans, plus the recent request profiles."""
+        with self._lock:
+            slowest = sorted(self.slowest.items(), key=lambda item: item[1][0], reverse=True)
+
+        statements = []
+        for statement, (seconds, parameters, label, engine) in slowest:
+            plan = self.plan(statement, parameters, engine)
+            statements.append({
+                'statement': statement,
+                'ms': round(seconds * 1000, 2),
+                'request': label,
+                'plan': plan,
+                'full_scans': find_full_scans(plan) if plan else [],
+            })
+        return {'enabled': self.enabled, 'slowest': statements, 'recent': list(self.recent)}
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        with self._lock:
+            self.recent.clear()
+            self.slowest.clear()
+            self._plans.clear()
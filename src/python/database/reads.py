@@ -0,0 +1,25 @@
+import functools
+from dataclasses import make_dataclass
+
+from database.db import read_engine
+
+
+@functools.lru_cache(maxsize=128)
+def row_class(name, fields):
+    """Slotted dataclass with the given fields, cached per (name, fields)."""
+    return make_dataclass(name, fields, slots=True)
+
+
+def fetch_rows(statement, row_name=None):
+    """Run a Core select on the read engine and return its rows.
+
+    Rows are plain tuples, or instances of a slotted dataclass named row_name whose fields are
+    the selected column labels. No ORM session is involved: nothing is tracked in an identity
+    map, flushed or committed, and the connection's transaction is rolled back on release.
+    """
+    with read_engine.connect() as connection:
+        result = connection.execute(statement)
+        if row_name is None:
+            return [tuple(row) for row in result]
+        row_type = row_class(row_name, tuple(result.keys()))
+        return [row_type(*row) for row in result]
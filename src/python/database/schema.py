@@ -0,0 +1,177 @@
+import logging
+import re
+from sqlalchemy import event, inspect, text
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+# Tables large enough that a full scan in a dashboard query is a regression
+LARGE_TABLES = ('posts', 'keywords', 'post_hashtag', 'post_topic')
+
+
+def ensure_columns(engine, metadata):
+    """Add declared columns that are missing from existing tables (nullable, no default)."""
+    inspector = inspect(engine)
+    added = []
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        missing = [column for column in table.columns if column.name not in existing]
+        if not missing:
+            continue
+        with engine.begin() as connection:
+            for column in missing:
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                added.append(f'{table.name}.{column.name}')
+
+    if added:
+        logger.info(f"Added columns: {', '.join(added)}")
+    return added
+
+
+def ensure_indexes(engine, metadata):
+    """Create declared indexes that are missing from existing tables."""
+    inspector = inspect(engine)
+    created = []
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine)
+                created.append(index.name)
+
+    if created:
+        logger.info(f"Created indexes: {', '.join(created)}")
+    return created
+
+
+def drop_indexes(engine, metadata):
+    """Drop declared indexes (used by migration downgrades)."""
+    inspector = inspect(engine)
+    dropped = []
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                index.drop(bind=engine)
+                dropped.append(index.name)
+    return dropped
+
+
+def mark_extracted_posts(engine, now):
+    """Mark posts that already have keywords as extracted (stored before keywords_extracted_at existed)."""
+    with engine.begin() as connection:
+        result = connection.execute(text(
+            "UPDATE posts SET keywords_extracted_at = :now WHERE keywords_extracted_at IS NULL "
+            "AND EXISTS (SELECT 1 FROM keywords WHERE keywords.post_id = posts.id)"
+        ), {'now': now})
+    if result.rowcount:
+        logger.info(f"Marked {result.rowcount} posts with keywords as extracted")
+    return result.rowcount
+
+
+def ensure_search_index(engine):
+    """Create the full-text index on posts.content, kept in sync with posts by the database."""
+    if engine.dialect.name == 'postgresql':
+        with engine.begin() as connection:
+            connection.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_posts_content_tsv ON posts "
+                "USING GIN (to_tsvector('english', coalesce(content, '')))"
+            ))
+        return True
+
+    if engine.dialect.name != 'sqlite':
+        return False
+
+    try:
+        with engine.begin() as connection:
+            exists = connection.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'posts_fts'"
+            )).first()
+
+            # External-content FTS5 table: stores only the index, content stays in posts
+            connection.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5("
+                "content, content='posts', content_rowid='id', tokenize='porter unicode61')"
+            ))
+            connection.execute(text(
+                "CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN "
+                "INSERT INTO posts_fts(rowid, content) VALUES (new.id, new.content); END"
+            ))
+            connection.execute(text(
+                "CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN "
+                "INSERT INTO posts_fts(posts_fts, rowid, content) VALUES ('delete', old.id, old.content); END"
+            ))
+            connection.execute(text(
+                "CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF content ON posts BEGIN "
+                "INSERT INTO posts_fts(posts_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+                "INSERT INTO posts_fts(rowid, content) VALUES (new.id, new.content); END"
+            ))
+
+            if not exists:
+                # Index posts that were stored before the FTS table existed
+                connection.execute(text("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')"))
+                logger.info("Created posts_fts full-text index")
+        return True
+    except OperationalError as e:
+        logger.warning(f"SQLite FTS5 unavailable, search falls back to LIKE scans: {e}")
+        return False
+
+
+def has_search_index(engine):
+    """Check whether the full-text index on posts exists."""
+    if engine.dialect.name == 'postgresql':
+        return 'ix_posts_content_tsv' in {index['name'] for index in inspect(engine).get_indexes('posts')}
+    return inspect(engine).has_table('posts_fts')
+
+
+def explain_query_plan(connection, statement, parameters=()):
+    """Return the query plan lines for a SQL statement."""
+    if connection.dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+        return [row[-1] for row in rows]
+    rows = connection.exec_driver_sql(f'EXPLAIN {statement}', parameters).fetchall()
+    return [row[0] for row in rows]
+
+
+def _table_name(alias):
+    """Strip SQLAlchemy's numeric alias suffix (post_hashtag_1 -> post_hashtag)."""
+    return re.sub(r'_\d+$', '', alias)
+
+
+def find_full_scans(plan, tables=LARGE_TABLES):
+    """Return plan lines that scan one of the given tables without an index."""
+    scans = []
+    for line in plan:
+        words = line.split()
+        # SQLite reports full scans as "SCAN <table>"; index walks add "USING ... INDEX"
+        if len(words) >= 2 and words[0] == 'SCAN' and _table_name(words[1]) in tables and 'INDEX' not in line:
+            scans.append(line)
+        # Postgres reports "Seq Scan on <table>"
+        elif 'Seq Scan on' in line and any(f'Seq Scan on {table} ' in f'{line} ' for table in tables):
+            scans.append(line.strip())
+    return scans
+
+
+def capture_query_plans(engine, func, *args, **kwargs):
+    """Run func, capturing each SELECT it issues together with its query plan."""
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', _record)
+    try:
+        func(*args, **kwargs)
+    finally:
+        event.remove(engine, 'before_cursor_execute', _record)
+
+    with engine.connect() as connection:
+        return [(statement, explain_query_plan(connection, statement, parameters)) for statement, parameters in statements]
@@ -0,0 +1,322 @@
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from database.db import init_db
+
+
+def rebuild_rollups(args):
+    """Rebuild pre-aggregated rollup tables from raw posts."""
+    from app.services.rollups import RollupService
+
+    from app.services.retention import RetentionService
+    from app.utils.cache import bump_data_version
+
+    since = datetime.fromisoformat(args.since) if args.since else None
+
+    # Archived posts are gone from the hot table, so their rollups must be kept
+    archived_until = RetentionService().archived_until()
+    if archived_until and (since is None or since < archived_until):
+        if since is not None:
+            print(f"Posts before {archived_until:%Y-%m-%d} are archived; rebuilding from there")
+        since = archived_until
+
+    counts = RollupService().rebuild(since)
+    bump_data_version()
+    print(f"Rebuilt {counts['hourly']} hourly and {counts['keywords']} keyword-daily rollup rows")
+
+
+def refresh_engagement(args):
+    """Recompute engagement scores, e.g. after changing ENGAGEMENT_WEIGHTS."""
+    from app.services.processor import DataProcessor
+
+    since = datetime.fromisoformat(args.since) if args.since else None
+    updated_count = DataProcessor().refresh_engagement_scores(since)
+    print(f"Refreshed engagement scores of {updated_count} posts")
+
+
+def export_posts(args):
+    """Stream posts with keywords and sentiment to a file (or stdout)."""
+    from app.services.exporter import DataExporter
+
+    start = datetime.fromisoformat(args.since) if args.since else None
+    end = datetime.fromisoformat(args.until) if args.until else None
+    exporter = DataExporter(args.batch_size)
+    chunks = exporter.stream(args.format, start, end, args.platform)
+
+    output = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+
+
+def import_csv(args):
+    """Bulk-import posts from CSV files."""
+    from app.services.importer import CsvImporter
+
+    importer = CsvImporter(args.chunk_size, args.platform)
+    for path in args.files:
+        stats = importer.import_file(path)
+        print(f"{path}: imported {stats['imported']} of {stats['rows']} rows "
+              f"({stats['duplicates']} duplicates, {stats['invalid']} invalid)")
+    print("Keywords and sentiment are computed by the next processing run")
+
+
+def archive_posts(args):
+    """Move posts older than HOT_RETENTION_DAYS into the time-partitioned archive."""
+    from app.services.retention import RetentionService
+
+    retention = RetentionService()
+    if retention.hot_boundary() is None:
+        print("HOT_RETENTION_DAYS is 0; nothing to archive")
+        return
+    result = retention.archive_expired()
+    counts = retention.tier_counts()
+    print(f"Archived {result['posts']} posts from {result['days']} days; "
+          f"{counts['hot_posts']} posts hot, {counts['archived_partitions']} archive partitions")
+
+
+def explain_queries(args):
+    """Print EXPLAIN QUERY PLAN for every analyzer query and flag full table scans."""
+    from database.db import read_engine
+    from database.schema import capture_query_plans, find_full_scans
+    from app.services.analyzer import DataAnalyzer
+
+    analyzer = DataAnalyzer()
+    calls = [
+        ('get_dashboard_summary', analyzer.get_dashboard_summary, (args.days,)),
+        ('get_trending_topics', analyzer.get_trending_topics, (args.days,)),
+        ('get_topics', analyzer.get_topics, (args.days,)),
+        ('get_top_posts', analyzer.get_top_posts, (args.days,)),
+        ('get_time_series_activity', analyzer.get_time_series_activity, (args.days,)),
+        ('get_time_series_engagement', analyzer.get_time_series_engagement, (args.days,)),
+        ('get_hashtag_network', analyzer.get_hashtag_network, (args.days,)),
+        ('search_posts', analyzer.search_posts, ('data', args.days)),
+        ('get_sentiment_distribution', analyzer.processor.get_sentiment_distribution, (args.days,)),
+        ('get_trending_hashtags', analyzer.processor.get_trending_hashtags, (args.days,)),
+    ]
+
+    regressions = 0
+    for name, func, call_args in calls:
+        print(f"== {name}")
+        for statement, plan in capture_query_plans(read_engine, func, *call_args):
+            print(' '.join(statement.split()))
+            for line in plan:
+                print(f"    {line}")
+            for scan in find_full_scans(plan):
+                print(f"    !! full scan: {scan}")
+                regressions += 1
+
+    print(f"{regressions} full table scan(s) found")
+    if regressions:
+        sys.exit(1)
+
+
+def check_db(args):
+    """Check the configured database and time the bulk-insert path (rolled back afterwards)."""
+    import time
+    from sqlalchemy import select, func
+    from database.db import engine, read_engine, Session
+    from database.bulk import bulk_insert
+    from app.models.post import Post
+
+    for name, db_engine in (('write', engine), ('read', read_engine)):
+        print(f"{name}: {db_engine.url.render_as_string(hide_password=True)} "
+              f"({db_engine.dialect.name}, {type(db_engine.pool).__name__})")
+
+    # Values that need escaping in COPY text format, to check they survive the round trip
+    content = "check-db back\\slash\ttab\nnewline\rreturn"
+    rows = [{
+        'content': f"{content} {number}",
+        'platform': 'check-db',
+        'created_at': datetime.utcnow(),
+        'likes': number,
+        'shares': 0,
+        'sentiment_score': None,
+        'source_url': None,
+        'author': None,
+        'engagement_score': None,
+        'content_hash': None,
+    } for number in range(args.rows)]
+
+    session = Session()
+    try:
+        start = time.perf_counter()
+        bulk_insert(session, Post.__table__, rows)
+        elapsed = time.perf_counter() - start
+        stored = session.execute(
+            select(func.count(Post.id)).where(Post.platform == 'check-db')
+        ).scalar()
+        first = session.execute(
+            select(Post.content).where(Post.platform == 'check-db').order_by(Post.likes).limit(1)
+        ).scalar()
+    finally:
+        session.rollback()
+        session.close()
+
+    print(f"bulk insert: {stored} of {args.rows} rows in {elapsed:.3f}s "
+          f"({args.rows / elapsed if elapsed else 0:.0f} rows/s), rolled back")
+    if stored != args.rows or first != f"{content} 0":
+        print("bulk insert round trip FAILED")
+        sys.exit(1)
+
+
+def benchmark_reads(args):
+    """Compare per-row read cost of ORM entities, ORM row projections and Core rows."""
+    import time
+    from sqlalchemy import select
+    from database.db import session_scope, read_session_scope
+    from database.reads import fetch_rows
+    from app.models.post import Post
+    from app.services.analyzer import TOP_POST_FIELDS
+
+    statement = select(*[getattr(Post, field).label(field) for field in TOP_POST_FIELDS]).order_by(
+        Post.id.desc()
+    ).limit(args.rows)
+
+    def orm_entities():
+        # Previous read path: full Post objects through the committing session
+        with session_scope() as session:
+            return [{field: getattr(post, field) for field in TOP_POST_FIELDS}
+                    for post in session.query(Post).order_by(Post.id.desc()).limit(args.rows)]
+
+    def orm_rows():
+        with read_session_scope() as session:
+            return [row._asdict() for row in session.execute(statement)]
+
+    def core_tuples():
+        return [dict(zip(TOP_POST_FIELDS, row)) for row in fetch_rows(statement)]
+
+    def core_slots():
+        return [{field: getattr(row, field) for field in TOP_POST_FIELDS} for row in fetch_rows(statement, 'PostRow')]
+
+    baseline = None
+    for name, func in (('orm entities', orm_entities), ('orm rows', orm_rows),
+                       ('core tuples', core_tuples), ('core slots', core_slots)):
+        func()  # Warm up statement caches and the connection pool
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            row_count = len(func())
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        per_row = best / row_count * 1e6 if row_count else 0
+        baseline = baseline or per_row
+        print(f"{name:<14} {row_count} rows  best {best * 1000:.1f} ms  "
+              f"{per_row:.2f} us/row  {per_row / baseline if baseline else 0:.2f}x")
+
+
+def benchmark_json(args):
+    """Compare encoding time and wire size of a large post list: stdlib json versus the API encoder."""
+    import gzip
+    import json
+    import time
+    from sqlalchemy import select
+    from database.reads import fetch_rows
+    from app.models.post import Post, POST_SCHEMA
+    from app.utils.serialization import dumps_bytes, orjson, brotli
+
+    rows = fetch_rows(select(*[getattr(Post, field) for field in POST_SCHEMA]).order_by(Post.id.desc()).limit(args.rows))
+    posts = [dict(zip(POST_SCHEMA, row)) for row in rows]
+
+    def stdlib():
+        # Previous path: isoformat() per row, then jsonify's json.dumps
+        converted = [{**post, 'created_at': post['created_at'].isoformat() if post['created_at'] else None}
+                     for post in posts]
+        return json.dumps(converted, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+    def provider():
+        return dumps_bytes(posts, sort_keys=True)
+
+    print(f"{len(posts)} posts; encoder: {'orjson' if orjson else 'stdlib json (orjson not installed)'}")
+    for name, func in (('stdlib json', stdlib), ('api encoder', provider)):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            body = func()
+            timings.append(time.perf_counter() - start)
+        print(f"{name:<12} best {min(timings) * 1000:.1f} ms  {len(body)} bytes")
+
+    print(f"gzip         {len(gzip.compress(body, compresslevel=6))} bytes")
+    if brotli is not None:
+        print(f"brotli       {len(brotli.compress(body, quality=5))} bytes")
+
+
+def collection_status(args):
+    """Show each keyword and source's adaptive collection interval and yield."""
+    from app.services.collection_scheduler import CollectionScheduler
+
+    collection_scheduler = CollectionScheduler()
+    collection_scheduler.sync_targets()
+    for target in collection_scheduler.status():
+        last_run = f"{target['last_run_at']:%Y-%m-%d %H:%M}" if target['last_run_at'] else 'never'
+        print(f"{target['keyword']:<20} {target['source']:<8} every {target['interval_seconds'] / 60:6.0f} min  "
+              f"next {target['next_run_at']:%Y-%m-%d %H:%M}  last {last_run} ({target['last_new_posts']} new)  "
+              f"{target['yield_rate'] or 0:.1f} posts/h")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="InStream maintenance commands")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    rollups_parser = subparsers.add_parser('rebuild-rollups', help="Rebuild rollup tables from raw posts")
+    rollups_parser.add_argument('--since', help="Only rebuild from this date (YYYY-MM-DD[THH:MM])")
+    rollups_parser.set_defaults(func=rebuild_rollups)
+
+    engagement_parser = subparsers.add_parser('refresh-engagement', help="Recompute post engagement scores")
+    engagement_parser.add_argument('--since', help="Only refresh posts created from this date (YYYY-MM-DD[THH:MM])")
+    engagement_parser.set_defaults(func=refresh_engagement)
+
+    export_parser = subparsers.add_parser('export', help="Export posts with keywords and sentiment")
+    export_parser.add_argument('--format', choices=['ndjson', 'csv', 'parquet'], default='ndjson')
+    export_parser.add_argument('--since', help="Only export posts created from this date (YYYY-MM-DD[THH:MM])")
+    export_parser.add_argument('--until', help="Only export posts created before this date (YYYY-MM-DD[THH:MM])")
+    export_parser.add_argument('--platform', help="Only export posts from this platform")
+    export_parser.add_argument('--batch-size', type=int, default=None, help="Posts read per query")
+    export_parser.add_argument('--output', help="Output file (default: stdout)")
+    export_parser.set_defaults(func=export_posts)
+
+    import_parser = subparsers.add_parser('import-csv', help="Bulk-import posts from CSV files")
+    import_parser.add_argument('files', nargs='+', help="CSV files with a header row")
+    import_parser.add_argument('--platform', help="Platform for rows without a platform column")
+    import_parser.add_argument('--chunk-size', type=int, default=None, help="Rows inserted per transaction")
+    import_parser.set_defaults(func=import_csv)
+
+    archive_parser = subparsers.add_parser('archive', help="Archive posts older than the hot retention window")
+    archive_parser.set_defaults(func=archive_posts)
+
+    collection_parser = subparsers.add_parser('collection-status', help="Show adaptive collection intervals per keyword and source")
+    collection_parser.set_defaults(func=collection_status)
+
+    explain_parser = subparsers.add_parser('explain-queries', help="Show query plans for analyzer queries; exit 1 on full scans")
+    explain_parser.add_argument('--days', type=int, default=7, help="Window size passed to each query")
+    explain_parser.set_defaults(func=explain_queries)
+
+    benchmark_parser = subparsers.add_parser('benchmark-reads', help="Time ORM versus Core row reads per row")
+    benchmark_parser.add_argument('--rows', type=int, default=5000, help="Rows read per run")
+    benchmark_parser.add_argument('--repeat', type=int, default=5, help="Runs per read path (best is reported)")
+    benchmark_parser.set_defaults(func=benchmark_reads)
+
+    json_parser = subparsers.add_parser('benchmark-json', help="Time JSON encoding and compressed size of a large post list")
+    json_parser.add_argument('--rows', type=int, default=5000, help="Posts encoded per run")
+    json_parser.add_argument('--repeat', type=int, default=5, help="Runs per encoder (best is reported)")
+    json_parser.set_defaults(func=benchmark_json)
+
+    check_parser = subparsers.add_parser('check-db', help="Check the configured database and its bulk-insert path")
+    check_parser.add_argument('--rows', type=int, default=10000, help="Rows inserted (and rolled back)")
+    check_parser.set_defaults(func=check_db)
+
+    args = parser.parse_args()
+    init_db()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
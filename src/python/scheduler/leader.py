@@ -0,0 +1,143 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, insert, update, delete, or_, case
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app.models.post import SchedulerLease
+from database.db import session_scope, read_session_scope
+
+logger = logging.getLogger(__name__)
+
+leases = SchedulerLease.__table__
+
+
+def process_identity():
+    """Holder id unique to this process: host, pid and a random nonce (pids are reused)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseLock:
+    """Named lease in the scheduler_leases table, held by at most one process until it expires."""
+
+    def __init__(self, name, ttl, holder=None):
+        """Initialize the lease; nothing is written until acquire()."""
+        self.name = name
+        self.ttl = ttl
+        self.holder = holder or process_identity()
+        self.expires_at = None  # Expiry of our last successful acquire/renewal
+
+    def acquire(self):
+        """Take the lease if it is free or expired, or renew it if we hold it. Returns True if held."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        try:
+            with session_scope() as session:
+                # One conditional UPDATE: the row lock (or SQLite's write lock) makes takeover atomic
+                result = session.execute(update(leases).where(
+                    leases.c.name == self.name,
+                    or_(leases.c.holder == self.holder, leases.c.expires_at <= now)
+                ).values(
+                    holder=self.holder,
+                    acquired_at=case((leases.c.holder == self.holder, leases.c.acquired_at), else_=now),
+                    heartbeat_at=now,
+                    expires_at=expires_at
+                ))
+                if result.rowcount == 0:
+                    if session.execute(select(leases.c.name).where(leases.c.name == self.name)).first():
+                        return False  # Held by another live process
+                    session.execute(insert(leases).values(
+                        name=self.name, holder=self.holder, acquired_at=now, heartbeat_at=now, expires_at=expires_at
+                    ))
+        except IntegrityError:
+            return False  # Another process inserted the lease first
+
+        self.expires_at = expires_at
+        return True
+
+    def release(self):
+        """Give the lease up so another process can take over without waiting for expiry."""
+        with session_scope() as session:
+            session.execute(delete(leases).where(leases.c.name == self.name, leases.c.holder == self.holder))
+        self.expires_at = None
+
+    def current_holder(self):
+        """(holder, expires_at) of the lease row, or None if nobody ever held it."""
+        with read_session_scope() as session:
+            row = session.execute(
+                select(leases.c.holder, leases.c.expires_at).where(leases.c.name == self.name)
+            ).first()
+        return tuple(row) if row else None
+
+
+class LeaderElector:
+    """Background thread that keeps competing for a lease and reports gaining or losing it.
+
+    The leader renews every `interval` seconds; the others retry just as often and take over
+    once the leader's lease expires (crash, hang, or a heartbeat blocked for longer than the TTL).
+    """
+
+    def __init__(self, lease, interval, on_elected, on_deposed):
+        """Initialize the elector; call start() to begin competing."""
+        self.lease = lease
+        self.interval = interval
+        self.on_elected = on_elected
+        self.on_deposed = on_deposed
+        self.is_leader = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the heartbeat thread."""
+        self._thread = threading.Thread(target=self._run, name=f"lease-{self.lease.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            self.heartbeat()
+            if self._stop.wait(self.interval):
+                return
+
+    def heartbeat(self):
+        """Acquire or renew the lease once and act on any change of leadership."""
+        try:
+            held = self.lease.acquire()
+        except SQLAlchemyError as e:
+            # The database may be busy; keep leading only while our last renewal is still valid
+            logger.warning(f"Lease {self.lease.name} heartbeat failed: {e}")
+            held = self.is_leader and self.lease.expires_at is not None and datetime.utcnow() < self.lease.expires_at
+
+        if held and not self.is_leader:
+            logger.info(f"Acquired lease {self.lease.name} as {self.lease.holder}")
+            self.is_leader = True
+            try:
+                self.on_elected()
+            except Exception as e:
+                logger.error(f"Failed to start as {self.lease.name} leader: {e}", exc_info=True)
+                self._resign()
+        elif not held and self.is_leader:
+            logger.warning(f"Lost lease {self.lease.name}; stopping")
+            self.is_leader = False
+            self.on_deposed()
+
+    def _resign(self):
+        """Stop leading and hand the lease back."""
+        if self.is_leader:
+            self.is_leader = False
+            self.on_deposed()
+        try:
+            self.lease.release()
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not release lease {self.lease.name}: {e}")
+
+    def stop(self):
+        """Stop competing; a leader stops its work and releases the lease."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.interval)
+        self._resign()
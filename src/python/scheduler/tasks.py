@@ -1,11 +1,19 @@
 
 import logging
+import math
+import multiprocessing
+import time
+from apscheduler.executors.pool import ThreadPoolExecutor, ProcessPoolExecutor
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from app.services.collector import collect_and_save_data # Assuming collector.py will be created
+from app.services.collection_scheduler import CollectionScheduler
 from app.services.processor import DataProcessor
+from app.services.topics import TopicClusterer
+from app.services.retention import RetentionService
 from app.config import get_config
+from scheduler.leader import LeaseLock, LeaderElector
 import atexit
+from datetime import datetime
 
 # Configure logging
 logging.basicConfig(
@@ -14,53 +22,171 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Scheduler started by init_scheduler() in this process, if any
+scheduler = None
+
+# Lease election run by init_scheduler_election() in this process, if any
+elector = None
+
+# Per-keyword collection schedule (created on the first collection tick; keeps the scrape budget)
+collection_scheduler = None
+
+# NLP processor of this process (a process pool worker when run by the scheduler)
+processor = None
+
+# A deep processing backlog is split into about this many transactions
+PROCESSING_DRAIN_BATCHES = 10
+
 
 def data_collection_job():
-    """Scheduled job to collect new data."""
-    config = get_config()
-    logger.info("Starting scheduled data collection...")
+    """Scheduled job to scrape the keywords and sources that are due."""
+    global collection_scheduler
     
     try:
-        # Collect data from Twitter
-        # Placeholder for actual keywords and limit logic
-        count = collect_and_save_data('twitter', config.DEFAULT_KEYWORDS, config.POST_LIMIT)
-        logger.info(f"Collected {count} posts from Twitter")
+        if collection_scheduler is None:
+            collection_scheduler = CollectionScheduler()
+        result = collection_scheduler.run_due()
+        if result['runs'] or result['deferred']:
+            logger.info(f"Ran {result['runs']} scrapes, saved {result['new_posts']} new posts "
+                        f"({result['deferred']} due scrapes deferred by the budget)")
     except Exception as e:
-        logger.error(f"Error collecting data from Twitter: {e}", exc_info=True)
+        logger.error(f"Error collecting data: {e}", exc_info=True)
+
+
+def processing_batch_size(backlog):
+    """Posts per processing transaction for a backlog of this size.
+
+    A short backlog goes in small transactions that hold the write lock briefly; a deep one
+    (e.g. after an import) in bigger ones, so it drains in about PROCESSING_DRAIN_BATCHES.
+    """
+    config = get_config()
+    size = math.ceil(backlog / PROCESSING_DRAIN_BATCHES)
+    return min(max(size, config.PROCESSING_MIN_BATCH), config.PROCESSING_MAX_BATCH)
+
+
+def _get_processor():
+    """DataProcessor of this process, created once (the stopwords and VADER lexicon load slowly)."""
+    global processor
+    if processor is None:
+        processor = DataProcessor()
+    return processor
 
 
 def data_processing_job():
-    """Scheduled job to process and analyze collected data."""
+    """Scheduled job to process and analyze collected data.
+
+    Runs in the scheduler's process pool. Keywords and sentiment are worked off in batches sized
+    by the backlog until it is empty or PROCESSING_MAX_SECONDS have passed.
+    """
     logger.info("Starting scheduled data processing...")
+    config = get_config()
     
     try:
-        # Initialize processor
-        processor = DataProcessor()
+        processor = _get_processor()
+        deadline = time.monotonic() + config.PROCESSING_MAX_SECONDS
+        keyword_count = sentiment_count = 0
         
-        # Extract keywords
-        keyword_count = processor.extract_keywords()
-        logger.info(f"Extracted keywords from {keyword_count} posts")
+        pending = processor.pending_counts()
+        while pending['keywords'] or pending['sentiment']:
+            batch_size = processing_batch_size(max(pending.values()))
+            
+            # Extract keywords
+            if pending['keywords']:
+                keyword_count += processor.extract_keywords(limit=batch_size)
+            
+            # Analyze sentiment
+            if pending['sentiment']:
+                sentiment_count += processor.analyze_sentiment(limit=batch_size)
+            
+            # Every batch marks its posts, so the backlog shrinks; stop anyway if a batch changed nothing
+            remaining = processor.pending_counts()
+            if remaining == pending or time.monotonic() >= deadline:
+                pending = remaining
+                break
+            pending = remaining
         
-        # Analyze sentiment
-        sentiment_count = processor.analyze_sentiment()
+        logger.info(f"Extracted keywords from {keyword_count} posts")
         logger.info(f"Analyzed sentiment for {sentiment_count} posts")
+        if pending['keywords'] or pending['sentiment']:
+            logger.info(f"Left {pending['keywords']} posts without keywords and {pending['sentiment']} "
+                        f"without sentiment for the next run")
+        
+        # Score posts stored without an engagement score
+        engagement_count = processor.refresh_engagement_scores(missing_only=True)
+        logger.info(f"Scored engagement for {engagement_count} posts")
+        
+        # Assign new posts to topics, then decay and merge existing topics
+        clusterer = TopicClusterer()
+        topic_count = clusterer.cluster_new_posts()
+        logger.info(f"Assigned {topic_count} posts to topics")
+        maintenance = clusterer.decay_and_merge()
+        logger.info(f"Merged {maintenance['merged']} and retired {maintenance['retired']} topics")
     except Exception as e:
         logger.error(f"Error processing data: {e}", exc_info=True)
 
 
+def retention_job():
+    """Scheduled job to move posts past the hot window into the archive."""
+    logger.info("Starting scheduled retention run...")
+    
+    try:
+        result = RetentionService().archive_expired()
+        logger.info(f"Archived {result['posts']} posts from {result['days']} days")
+    except Exception as e:
+        logger.error(f"Error archiving posts: {e}", exc_info=True)
+
+
+def queue_processing():
+    """Run the data processing job as soon as possible (e.g. after a bulk import).
+
+    Without a scheduler in this process, new posts are picked up by the next scheduled run;
+    a run already in progress picks them up itself before it finishes.
+    """
+    if scheduler is None or not scheduler.running:
+        return False
+    scheduler.modify_job('data_processing_job', next_run_time=datetime.now(scheduler.timezone))
+    return True
+
+
 def init_scheduler():
     """Initialize the task scheduler."""
+    global scheduler
     config = get_config()
     
+    # Scraping and archiving wait on the network and disk, so they share a thread pool. NLP is
+    # CPU-bound and runs in worker processes instead of competing with request threads for the GIL;
+    # the workers start from a fork server, so they inherit no threads, locks or connections.
+    # Without one (Windows) it stays on threads: spawned workers re-run the web app's main module.
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        cpu_executor = ProcessPoolExecutor(config.SCHEDULER_CPU_WORKERS,
+                                           pool_kwargs={'mp_context': multiprocessing.get_context('forkserver')})
+    else:
+        logger.info("No forkserver start method; running processing jobs on threads")
+        cpu_executor = ThreadPoolExecutor(config.SCHEDULER_CPU_WORKERS)
+    executors = {
+        'io': ThreadPoolExecutor(config.SCHEDULER_IO_WORKERS),
+        'cpu': cpu_executor,
+    }
+    
+    # A job still running when it is due again is skipped rather than started twice, and runs
+    # missed while the process was busy or asleep collapse into a single run
+    job_defaults = {
+        'max_instances': 1,
+        'coalesce': True,
+        'misfire_grace_time': config.SCHEDULER_MISFIRE_GRACE_SECONDS,
+    }
+    
     # Create scheduler
-    scheduler = BackgroundScheduler(timezone=config.TIMEZONE) # Use timezone from config
+    scheduler = BackgroundScheduler(executors=executors, job_defaults=job_defaults,
+                                    timezone=config.TIMEZONE) # Use timezone from config
     
-    # Data collection job - run every X seconds (from config)
+    # Data collection job - each tick scrapes the keywords that are due (intervals adapt per keyword)
     scheduler.add_job(
         func=data_collection_job,
-        trigger=IntervalTrigger(seconds=config.COLLECTION_INTERVAL),
+        trigger=IntervalTrigger(seconds=config.COLLECTION_TICK_SECONDS),
         id='data_collection_job',
         name='Collect new social media data',
+        executor='io',
         replace_existing=True
     )
     
@@ -71,14 +197,58 @@ def init_scheduler():
         trigger=IntervalTrigger(minutes=processing_interval_minutes),
         id='data_processing_job',
         name='Process and analyze collected data',
+        executor='cpu',
         replace_existing=True
     )
     
+    # Retention job - run daily when a hot window is configured
+    if config.HOT_RETENTION_DAYS:
+        scheduler.add_job(
+            func=retention_job,
+            trigger=IntervalTrigger(hours=24),
+            id='retention_job',
+            name='Archive posts past the hot retention window',
+            executor='io',
+            replace_existing=True
+        )
+    
     # Start the scheduler
     scheduler.start()
-    logger.info(f"Scheduler started with collection interval: {config.COLLECTION_INTERVAL}s and processing interval: {processing_interval_minutes}min.")
+    logger.info(f"Scheduler started with collection tick: {config.COLLECTION_TICK_SECONDS}s and processing interval: {processing_interval_minutes}min.")
     
-    # Shut down the scheduler when exiting the app
-    atexit.register(lambda: scheduler.shutdown())
+    # Shut down the scheduler when exiting the app (registered once, however often this process is elected)
+    atexit.unregister(shutdown_scheduler)
+    atexit.register(shutdown_scheduler)
     
     return scheduler
+
+
+def shutdown_scheduler():
+    """Stop the scheduler started in this process; running jobs finish in the background."""
+    global scheduler
+    if scheduler is not None and scheduler.running:
+        scheduler.shutdown(wait=False)
+        logger.info("Scheduler stopped.")
+    scheduler = None
+
+
+def init_scheduler_election():
+    """Compete for the scheduler lease; only the process holding it runs the scheduler.
+
+    Every web worker calls this. The others keep serving requests and take over if the
+    leader stops renewing its lease.
+    """
+    global elector
+    config = get_config()
+    
+    elector = LeaderElector(
+        LeaseLock('scheduler', ttl=config.SCHEDULER_LEASE_TTL),
+        interval=config.SCHEDULER_LEASE_HEARTBEAT,
+        on_elected=init_scheduler,
+        on_deposed=shutdown_scheduler
+    ).start()
+    
+    # Hand the lease over on a clean exit instead of making the others wait for it to expire
+    atexit.register(elector.stop)
+    
+    return elector
@@ -0,0 +1,59 @@
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# Modules read the config at import, so point it at a throwaway instance directory first
+INSTANCE_DIR = tempfile.mkdtemp(prefix='instream-tests-')
+os.environ['FLASK_ENV'] = 'testing'
+os.environ['TEST_DATABASE_URI'] = f"sqlite:///{os.path.join(INSTANCE_DIR, 'test.db')}"
+os.environ['DATA_VERSION_FILE'] = os.path.join(INSTANCE_DIR, 'data_version')
+os.environ['ARCHIVE_DIR'] = os.path.join(INSTANCE_DIR, 'archive')
+
+# Add the python source directory to the path, as manage.py does
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database.db import init_db, session_scope  # noqa: E402
+from app.models.post import Base, Post  # noqa: E402
+
+
+def pytest_sessionstart(session):
+    init_db()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(INSTANCE_DIR, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def clean_database():
+    """Empty every table and the archive after each test."""
+    yield
+    with session_scope() as session:
+        for table in reversed(Base.metadata.sorted_tables):
+            session.execute(table.delete())
+    shutil.rmtree(os.environ['ARCHIVE_DIR'], ignore_errors=True)
+
+
+@pytest.fixture
+def add_posts():
+    """Insert posts from dicts (content, platform, created_at, likes, shares, ...) and return their ids."""
+    def add(*posts):
+        with session_scope() as session:
+            rows = [Post(**{'platform': 'twitter', 'likes': 0, 'shares': 0, 'created_at': datetime.utcnow(), **post})
+                    for post in posts]
+            session.add_all(rows)
+            session.flush()
+            return [row.id for row in rows]
+    return add
+
+
+@pytest.fixture
+def client():
+    """Test client of the Flask app (imported lazily; it builds the services at import)."""
+    from app.main import app
+    return app.test_client()
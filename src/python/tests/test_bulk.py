@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.models.post import Hashtag, Post
+from database.bulk import bulk_insert, _copy_value
+from database.db import session_scope, read_session_scope
+
+
+def test_copy_values_escape_the_text_format():
+    assert _copy_value(None) == '\\N'
+    assert _copy_value(True) == 't'
+    assert _copy_value(datetime(2024, 5, 1, 10, 30)) == '2024-05-01 10:30:00'
+    assert _copy_value('tab\there\nnew\\line') == 'tab\\there\\nnew\\\\line'
+
+
+def test_bulk_insert_loads_rows_in_one_statement():
+    rows = [{'content': f'post {i}', 'platform': 'twitter', 'likes': i, 'shares': 0} for i in range(50)]
+    with session_scope() as session:
+        assert bulk_insert(session, Post.__table__, rows) == 50
+    with read_session_scope() as session:
+        assert session.execute(select(Post.likes).order_by(Post.id)).scalars().all() == list(range(50))
+
+
+def test_rows_hitting_a_unique_constraint_are_skipped():
+    with session_scope() as session:
+        session.add(Hashtag(text='ai'))
+    with session_scope() as session:
+        assert bulk_insert(session, Hashtag.__table__, [{'text': 'ai'}, {'text': 'ml'}, {'text': 'ml'}]) == 1
+    with read_session_scope() as session:
+        assert sorted(session.execute(select(Hashtag.text)).scalars()) == ['ai', 'ml']
+
+
+def test_empty_batches_do_nothing():
+    with session_scope() as session:
+        assert bulk_insert(session, Post.__table__, []) == 0
@@ -0,0 +1,65 @@
+import io
+
+import pytest
+
+from app.config import TestingConfig
+from app.utils.cache import DataVersion, ResponseCache, response_cache
+
+
+@pytest.fixture
+def cache_enabled(monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'RESPONSE_CACHE_ENABLED', True)
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+
+def test_bumps_are_seen_by_other_readers_of_the_file(tmp_path):
+    path = str(tmp_path / 'data_version')
+    reader, writer = DataVersion(path), DataVersion(path)
+    assert reader.current() == '0'
+
+    version = writer.bump()
+    assert reader.current() == version
+    assert writer.bump() != version
+    assert reader.current() != version
+
+
+def test_entries_are_valid_for_one_data_version():
+    cache = ResponseCache()
+    cache.set('/api/summary?', 'v1', b'{}')
+    assert cache.get('/api/summary?', 'v1') == b'{}'
+    assert cache.get('/api/summary?', 'v2') is None
+    # The stale entry is dropped, not resurrected by the old version
+    assert cache.get('/api/summary?', 'v1') is None
+
+
+def test_memory_tier_evicts_the_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.set('a', 'v', b'a')
+    cache.set('b', 'v', b'b')
+    cache.get('a', 'v')
+    cache.set('c', 'v', b'c')
+    assert cache.get('b', 'v') is None
+    assert cache.get('a', 'v') == b'a'
+
+
+def test_disk_tier_is_shared_between_caches(tmp_path):
+    path = str(tmp_path / 'response_cache.db')
+    ResponseCache(disk_path=path).set('key', 'v1', b'body')
+    other_worker = ResponseCache(disk_path=path)
+    assert other_worker.get('key', 'v1') == b'body'
+    assert other_worker.get('key', 'v2') is None
+
+
+def test_ingest_invalidates_cached_responses(client, cache_enabled):
+    first = client.get('/api/summary?days=1')
+    assert first.headers['X-Cache'] == 'MISS'
+    # Query parameters are normalized into the key
+    assert client.get('/api/summary?days=1&platform=').headers['X-Cache'] == 'HIT'
+
+    csv_file = io.BytesIO(b"content\nfresh post\n")
+    response = client.post('/api/import', data={'file': (csv_file, 'posts.csv')}, content_type='multipart/form-data')
+    assert response.status_code == 200
+
+    assert client.get('/api/summary?days=1').headers['X-Cache'] == 'MISS'
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import TestingConfig
+from app.services.collection_scheduler import CollectionScheduler, ScrapeBudget, next_interval
+
+NOW = datetime.utcnow().replace(microsecond=0)
+
+
+class FakeCollector:
+    """Stands in for the browser-backed collector: returns `new_posts` new posts per scrape."""
+
+    def __init__(self, new_posts=3):
+        self.new_posts = new_posts
+        self.scrapes = []
+        self.cleaned_up = False
+
+    def collect_all_data(self, keyword, sources, days, limit):
+        self.scrapes.append((keyword, sources[0]))
+        return [{}] * self.new_posts
+
+    def save_to_database(self, data, session):
+        return len(data)
+
+    def cleanup(self):
+        self.cleaned_up = True
+
+
+@pytest.fixture
+def hourly(monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'COLLECTION_INTERVAL', 3600)
+    monkeypatch.setattr(TestingConfig, 'COLLECTION_JITTER', 0)
+
+
+@pytest.mark.parametrize('new_posts, yield_rate, expected', [
+    (100, 400.0, 1800),  # A full run probably missed posts
+    (0, 0.0, 7200),  # Nothing new backs off
+    (20, 25.0, 7200),  # 50 expected posts at 25/h would take 2h
+    (20, 1000.0, 1800),  # Changes are capped at 2x per run
+])
+def test_next_interval_aims_at_the_target_fill(new_posts, yield_rate, expected):
+    assert next_interval(3600, new_posts, yield_rate, limit=100, target_fill=0.5,
+                         min_interval=300, max_interval=43200) == expected
+
+
+def test_next_interval_stays_within_the_bounds():
+    assert next_interval(400, 100, 1000.0, 100, 0.5, min_interval=300, max_interval=43200) == 300
+    assert next_interval(40000, 0, 0.0, 100, 0.5, min_interval=300, max_interval=43200) == 43200
+
+
+def test_budget_allows_a_burst_then_refills_at_its_rate():
+    budget = ScrapeBudget(per_hour=3600, burst=2)
+    assert budget.take() and budget.take()
+    assert not budget.take()
+    budget.updated -= 1  # One second later
+    assert budget.take()
+
+
+def test_run_due_scrapes_within_the_budget_with_one_collector(hourly):
+    collectors = []
+
+    def create_collector():
+        collectors.append(FakeCollector())
+        return collectors[-1]
+
+    scheduler = CollectionScheduler(['tech', 'ai', 'data'], ['twitter'], collector_factory=create_collector)
+    scheduler.budget = ScrapeBudget(per_hour=0, burst=2)
+
+    assert scheduler.run_due(NOW) == {'runs': 2, 'new_posts': 6, 'deferred': 1}
+    assert len(collectors) == 1 and collectors[0].cleaned_up
+    assert scheduler.due_targets(NOW) == [
+        target for target in [('tech', 'twitter'), ('ai', 'twitter'), ('data', 'twitter')]
+        if target not in collectors[0].scrapes
+    ]
+
+
+def test_busy_targets_speed_up_and_quiet_ones_back_off(hourly):
+    scheduler = CollectionScheduler(['busy', 'quiet'], ['twitter'])
+    scheduler.sync_targets(NOW)
+    for keyword in ('busy', 'quiet'):
+        # The first run only sweeps the lookback window and keeps the interval
+        assert scheduler.record_run(keyword, 'twitter', 50, now=NOW) == 3600
+
+    later = NOW + timedelta(hours=1)
+    assert scheduler.record_run('busy', 'twitter', scheduler.limit, now=later) == 1800
+    assert scheduler.record_run('quiet', 'twitter', 0, now=later) == 7200
+
+    status = {row['keyword']: row for row in scheduler.status()}
+    assert status['busy']['next_run_at'] == later + timedelta(seconds=1800)
+    assert status['quiet']['runs'] == 2
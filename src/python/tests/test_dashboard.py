@@ -0,0 +1,51 @@
+import threading
+from datetime import datetime, timedelta
+
+from app import main
+from app.services.rollups import RollupService
+
+NOW = datetime.utcnow()
+
+
+def test_dashboard_data_combines_the_widgets(client, add_posts):
+    add_posts(
+        {'content': 'good news', 'platform': 'twitter', 'likes': 4, 'shares': 1, 'sentiment_score': 0.8, 'created_at': NOW - timedelta(days=1)},
+        {'content': 'bad news', 'platform': 'reddit', 'likes': 0, 'shares': 0, 'sentiment_score': -0.6, 'created_at': NOW - timedelta(days=2)},
+        {'content': 'plain news', 'platform': 'twitter', 'likes': 1, 'shares': 0, 'sentiment_score': 0.0, 'created_at': NOW - timedelta(hours=1)},
+    )
+    RollupService().rebuild()
+
+    data = client.get('/api/dashboard-data?timeRange=7').get_json()
+
+    assert data['metrics']['totalPosts'] == 3
+    assert data['sentimentDistribution'] == {'positive': 1, 'negative': 1, 'neutral': 1}
+    assert dict(zip(data['platformDistribution']['labels'], data['platformDistribution']['data'])) == {'twitter': 2, 'reddit': 1}
+    assert [post['content'] for post in data['recentPosts']] == ['plain news', 'good news', 'bad news']
+
+    activity = data['activityData']
+    assert activity['labels'] == sorted(activity['labels'])
+    totals = {dataset['label']: sum(dataset['data']) for dataset in activity['datasets']}
+    assert totals == {'Reddit': 1, 'Twitter': 2}
+
+
+def test_source_filter_narrows_the_sentiment_breakdown(client, add_posts):
+    add_posts({'content': 'good', 'platform': 'twitter', 'sentiment_score': 0.9},
+              {'content': 'bad', 'platform': 'reddit', 'sentiment_score': -0.9})
+
+    data = client.get('/api/dashboard-data?source=reddit').get_json()
+
+    assert data['sentimentDistribution'] == {'positive': 0, 'neutral': 0, 'negative': 1}
+    assert [dataset['label'] for dataset in data['activityData']['datasets']] == ['Reddit']
+
+
+def test_widgets_run_on_the_dashboard_pool(client, monkeypatch):
+    threads = []
+    get_topics = main.analyzer.get_topics
+
+    def recording_get_topics(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return get_topics(*args, **kwargs)
+
+    monkeypatch.setattr(main.analyzer, 'get_topics', recording_get_topics)
+    assert client.get('/api/dashboard-data').status_code == 200
+    assert len(threads) == 1 and threads[0].startswith('dashboard')
@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import select, func, text
+from sqlalchemy.exc import OperationalError
+
+from app.models.post import Post
+from database import db
+from database.db import engine, read_engine, session_scope, read_session_scope
+
+
+def _post_count():
+    with read_session_scope() as session:
+        return session.execute(select(func.count(Post.id))).scalar()
+
+
+def test_sqlite_runs_in_wal_mode():
+    with engine.connect() as connection:
+        assert connection.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+
+
+def test_read_engine_refuses_writes():
+    with read_engine.connect() as connection:
+        with pytest.raises(OperationalError, match='readonly'):
+            connection.execute(text("INSERT INTO posts (content, platform) VALUES ('x', 'twitter')"))
+
+
+def test_reads_see_the_last_commit_while_a_write_is_open(add_posts):
+    add_posts({'content': 'committed'})
+    with session_scope() as session:
+        session.add(Post(content='pending', platform='twitter'))
+        session.flush()
+        # The writer holds the lock; readers neither wait nor see the uncommitted row
+        assert _post_count() == 1
+    assert _post_count() == 2
+
+
+def test_failed_transactions_roll_back():
+    with pytest.raises(RuntimeError):
+        with session_scope() as session:
+            session.add(Post(content='lost', platform='twitter'))
+            session.flush()
+            raise RuntimeError('ingest failed')
+    assert _post_count() == 0
+
+
+def test_forked_children_get_a_fresh_writer_lock(monkeypatch):
+    lock = db._write_lock
+    monkeypatch.setattr(db, '_write_lock', lock)
+    with lock:
+        db._reset_after_fork()
+        assert db._write_lock is not lock
+        # Held by a "parent" thread, the old lock would block the child forever
+        assert db._write_lock.acquire(blocking=False)
+        db._write_lock.release()
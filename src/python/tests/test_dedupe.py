@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select, func
+
+from app.models.post import Post
+from app.services.collector import DataCollector
+from database.db import init_db, session_scope, read_session_scope
+
+
+@pytest.fixture
+def collector(monkeypatch):
+    monkeypatch.setattr(DataCollector, '_initialize_webdriver', lambda self: None)
+    return DataCollector()
+
+
+def _scraped(content, platform='twitter'):
+    return {'content': content, 'platform': platform, 'created_at': datetime.utcnow(),
+            'likes': 1, 'shares': 0, 'sentiment_score': None}
+
+
+def test_init_db_hashes_posts_stored_without_a_hash(add_posts):
+    add_posts({'content': 'an  older post'}, {'content': 'another one'})
+
+    init_db()
+
+    with read_session_scope() as session:
+        assert session.execute(select(func.count()).where(Post.content_hash.is_(None))).scalar() == 0
+
+
+def test_collector_skips_posts_stored_before_hashing(add_posts, collector):
+    add_posts({'content': 'an older post', 'platform': 'twitter'})
+    init_db()
+
+    with session_scope() as session:
+        saved = collector.save_to_database([_scraped('an  older   post'), _scraped('a new post')], session)
+
+    assert saved == 1
+    with read_session_scope() as session:
+        assert session.execute(select(func.count(Post.id))).scalar() == 2
+
+
+def test_same_text_on_another_platform_is_not_a_duplicate(collector):
+    with session_scope() as session:
+        assert collector.save_to_database([_scraped('hello'), _scraped('hello', 'reddit'), _scraped('hello')], session) == 2
@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+
+from app.config import merge_engagement_weights
+from app.services.analyzer import DataAnalyzer
+from app.services.processor import DataProcessor
+from app.utils.engagement import engagement_score, platform_weights
+
+NOW = datetime.utcnow()
+
+
+def test_platform_override_keeps_default_for_unset_weights():
+    weights = merge_engagement_weights({'likes': 1.0, 'shares': 1.0}, {'Reddit': {'likes': 0.5}})
+    assert weights['reddit'] == {'likes': 0.5, 'shares': 1.0}
+    assert engagement_score('reddit', 10, 4, weights) == 9.0
+
+
+def test_partial_weights_passed_directly_fall_back_to_default():
+    weights = {'default': {'likes': 1.0, 'shares': 3.0}, 'twitter': {'shares': 2.0}}
+    assert platform_weights('twitter', weights) == {'likes': 1.0, 'shares': 2.0}
+    assert platform_weights('mastodon', weights) == {'likes': 1.0, 'shares': 3.0}
+
+
+def test_default_score_is_likes_plus_shares():
+    assert engagement_score('twitter', 7, 5) == 12.0
+
+
+def test_top_posts_keep_the_likes_plus_shares_ranking(add_posts):
+    counts = [(10, 0), (3, 6), (0, 8), (5, 5), (1, 1)]
+    add_posts(*[{'content': f'post {i}', 'likes': likes, 'shares': shares, 'created_at': NOW - timedelta(hours=i)}
+                for i, (likes, shares) in enumerate(counts)])
+    DataProcessor().refresh_engagement_scores(missing_only=True)
+
+    posts = DataAnalyzer().get_top_posts(days=1, metric='engagement', limit=5)
+
+    assert [post['engagement_score'] for post in posts] == [10.0, 10.0, 9.0, 8.0, 2.0]
+    assert [post['likes'] + post['shares'] for post in posts] == [10, 10, 9, 8, 2]
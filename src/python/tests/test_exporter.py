@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.post import Keyword
+from app.services.exporter import DataExporter, PARQUET_AVAILABLE
+from database.db import session_scope
+
+NOW = datetime.utcnow().replace(microsecond=0)
+
+
+@pytest.fixture
+def exported_posts(add_posts):
+    ids = add_posts(*[{
+        'content': f'post {i}, with "quotes"\nand a newline',
+        'platform': 'twitter' if i % 2 else 'reddit',
+        'created_at': NOW - timedelta(hours=i),
+        'sentiment_score': 0.5 if i % 2 else None,
+    } for i in range(7)])
+    with session_scope() as session:
+        session.add(Keyword(post_id=ids[0], text='alpha', frequency=2))
+        session.add(Keyword(post_id=ids[0], text='beta', frequency=1))
+    return ids
+
+
+def test_ndjson_has_one_object_per_post_across_batches(exported_posts):
+    chunks = list(DataExporter(batch_size=3).stream('ndjson'))
+    assert len(chunks) == 3
+
+    rows = [json.loads(line) for line in b''.join(chunks).decode('utf-8').splitlines()]
+    assert [row['id'] for row in rows] == exported_posts
+    assert rows[0]['keywords'] == ['alpha', 'beta']
+    assert rows[0]['created_at'].startswith(NOW.isoformat())
+    assert [row['sentiment'] for row in rows[:2]] == [None, 'positive']  # Unscored posts have no label
+
+
+def test_csv_round_trips_quotes_and_newlines(exported_posts):
+    body = b''.join(DataExporter(batch_size=2).stream('csv', platform='twitter')).decode('utf-8')
+    rows = list(csv.DictReader(io.StringIO(body)))
+
+    assert [int(row['id']) for row in rows] == exported_posts[1::2]
+    assert rows[0]['content'] == 'post 1, with "quotes"\nand a newline'
+
+
+def test_window_bounds_are_start_inclusive_end_exclusive(exported_posts):
+    start, end = NOW - timedelta(hours=4), NOW - timedelta(hours=1)
+    body = b''.join(DataExporter().stream('ndjson', start, end)).decode('utf-8')
+    assert [json.loads(line)['id'] for line in body.splitlines()] == exported_posts[2:5]
+
+
+def test_unknown_formats_are_rejected_before_streaming():
+    with pytest.raises(ValueError, match='Unsupported export format'):
+        DataExporter().stream('xml')
+
+
+def test_parquet_round_trips_batches_and_keyword_lists(exported_posts):
+    pq = pytest.importorskip('pyarrow.parquet')
+
+    body = b''.join(DataExporter(batch_size=3).stream('parquet', platform='reddit'))
+    parquet_file = pq.ParquetFile(io.BytesIO(body))
+    rows = pq.read_table(io.BytesIO(body)).to_pylist()
+
+    assert parquet_file.num_row_groups == 2  # One row group per batch
+    assert [row['id'] for row in rows] == exported_posts[0::2]
+    assert rows[0]['keywords'] == ['alpha', 'beta']
+    assert rows[0]['created_at'] == NOW
+    assert rows[0]['content'] == 'post 0, with "quotes"\nand a newline'
+
+
+@pytest.mark.skipif(PARQUET_AVAILABLE, reason="pyarrow is installed")
+def test_parquet_needs_pyarrow(client):
+    response = client.get('/api/export?format=parquet')
+    assert response.status_code == 400
+
+
+def test_export_route_streams_an_attachment(client, exported_posts):
+    response = client.get('/api/export?format=csv&days=1')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert 'attachment' in response.headers['Content-Disposition']
+    assert len(response.get_data(as_text=True).splitlines()) > len(exported_posts)
@@ -0,0 +1,45 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import combinations
+
+from app.models.post import Hashtag, Post
+from app.services.analyzer import DataAnalyzer
+from database.db import session_scope
+
+NOW = datetime.utcnow()
+
+TAG_SETS = [
+    ['ai', 'ml', 'data'],
+    ['ai', 'ml'],
+    ['ml', 'ai', 'python'],
+    ['data'],
+    ['python', 'data'],
+]
+
+
+def _add_tagged_posts(tag_sets, created_at):
+    with session_scope() as session:
+        tags = {tag.text: tag for tag in session.query(Hashtag).all()}
+        for i, tag_set in enumerate(tag_sets):
+            post = Post(content=f'post {i}', platform='twitter', likes=0, shares=0, created_at=created_at)
+            post.hashtags = [tags.setdefault(text, Hashtag(text=text)) for text in tag_set]
+            session.add(post)
+
+
+def test_network_counts_each_co_occurring_pair_once():
+    _add_tagged_posts(TAG_SETS, NOW - timedelta(hours=1))
+    _add_tagged_posts([['ai', 'ml']], NOW - timedelta(days=30))  # Outside the window
+
+    network = DataAnalyzer().get_hashtag_network(days=7, limit=20)
+
+    expected = Counter(pair for tag_set in TAG_SETS for pair in combinations(sorted(tag_set), 2))
+    assert {(edge['source'], edge['target']): edge['weight'] for edge in network['edges']} == expected
+    assert [edge['weight'] for edge in network['edges']] == sorted(expected.values(), reverse=True)
+    assert {node['id'] for node in network['nodes']} == {'ai', 'ml', 'data', 'python'}
+
+
+def test_network_keeps_the_heaviest_edges():
+    _add_tagged_posts(TAG_SETS, NOW - timedelta(hours=1))
+    network = DataAnalyzer().get_hashtag_network(days=7, limit=1)
+    assert network['edges'] == [{'source': 'ai', 'target': 'ml', 'weight': 3}]
+    assert sorted(node['id'] for node in network['nodes']) == ['ai', 'ml']
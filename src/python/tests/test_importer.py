@@ -0,0 +1,58 @@
+import io
+
+import pytest
+from sqlalchemy import select, func
+
+from app.models.post import Post
+from app.services.importer import CsvImporter, parse_timestamp
+from database.db import read_session_scope
+
+
+def _post_count():
+    with read_session_scope() as session:
+        return session.execute(select(func.count(Post.id))).scalar()
+
+
+def test_import_dedupes_by_content_and_skips_rows_without_content():
+    csv_text = ("text,source,date,likes,retweets\n"
+                "hello world,twitter,2024-05-01 10:00:00,\"1,204\",3\n"
+                "hello   world,twitter,2024-05-01 11:00:00,1,1\n"
+                ",twitter,2024-05-01,1,1\n"
+                "hello world,reddit,1714557600,2,0\n")
+
+    stats = CsvImporter(chunk_size=2).import_stream(io.StringIO(csv_text))
+
+    assert stats == {'rows': 4, 'imported': 2, 'duplicates': 1, 'invalid': 1}
+    assert _post_count() == 2
+
+
+def test_import_needs_a_content_column():
+    with pytest.raises(ValueError, match='content column'):
+        CsvImporter().import_stream(io.StringIO("a,b\n1,2\n"))
+
+
+def test_malformed_csv_reports_the_row():
+    csv_text = "content\nfirst post\nsecond post\nbare\rcarriage return\n"
+    with pytest.raises(ValueError, match='row 4'):
+        CsvImporter().import_stream(io.StringIO(csv_text))
+
+
+def test_epoch_and_offset_timestamps_become_naive_utc():
+    assert parse_timestamp('1714557600').isoformat() == '2024-05-01T10:00:00'
+    assert parse_timestamp('2024-05-01T12:00:00+02:00').isoformat() == '2024-05-01T10:00:00'
+
+
+def test_import_route_answers_400_for_malformed_files(client):
+    bad_bytes = io.BytesIO(b"content\nfine\n\xff\xfe broken\n")
+    response = client.post('/api/import', data={'file': (bad_bytes, 'posts.csv')}, content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert 'line 3' in response.get_json()['error']
+
+
+def test_import_file_reads_crlf_and_multiline_fields(tmp_path):
+    path = tmp_path / 'posts.csv'
+    path.write_bytes(b'\xef\xbb\xbfcontent,likes\r\n"first\r\nline",1\r\nsecond,2\r\n')
+
+    assert CsvImporter().import_file(str(path))['imported'] == 2
+    with read_session_scope() as session:
+        assert set(session.execute(select(Post.content)).scalars()) == {'first\r\nline', 'second'}
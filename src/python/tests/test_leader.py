@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.models.post import SchedulerLease
+from database.db import session_scope
+from scheduler.leader import LeaseLock, LeaderElector
+
+
+def _expire(name):
+    """Age the lease as if its holder stopped heartbeating."""
+    with session_scope() as session:
+        session.execute(update(SchedulerLease.__table__)
+                        .where(SchedulerLease.__table__.c.name == name)
+                        .values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+
+
+def test_only_one_holder_until_the_lease_expires():
+    first, second = LeaseLock('jobs', ttl=60, holder='a'), LeaseLock('jobs', ttl=60, holder='b')
+    assert first.acquire()
+    assert not second.acquire()
+    assert first.acquire()  # Renewal
+    assert first.current_holder()[0] == 'a'
+
+    _expire('jobs')
+
+    assert second.acquire()
+    assert not first.acquire()
+    assert second.current_holder()[0] == 'b'
+
+
+def test_release_lets_another_process_take_over_at_once():
+    first, second = LeaseLock('jobs', ttl=60, holder='a'), LeaseLock('jobs', ttl=60, holder='b')
+    first.acquire()
+    first.release()
+    assert first.current_holder() is None
+    assert second.acquire()
+
+
+def test_elector_starts_and_stops_work_with_the_lease():
+    events = []
+    elector = LeaderElector(LeaseLock('jobs', ttl=60, holder='a'), interval=1,
+                            on_elected=lambda: events.append('elected'), on_deposed=lambda: events.append('deposed'))
+    elector.heartbeat()
+    elector.heartbeat()
+    assert events == ['elected']
+
+    _expire('jobs')
+    assert LeaseLock('jobs', ttl=60, holder='b').acquire()
+    elector.heartbeat()
+    assert events == ['elected', 'deposed']
+    assert not elector.is_leader
+
+
+def test_elector_resigns_when_it_fails_to_start():
+    def fail():
+        raise RuntimeError('scheduler would not start')
+
+    deposed = []
+    elector = LeaderElector(LeaseLock('jobs', ttl=60, holder='a'), interval=1,
+                            on_elected=fail, on_deposed=lambda: deposed.append(True))
+    elector.heartbeat()
+
+    assert not elector.is_leader
+    assert deposed == [True]
+    assert LeaseLock('jobs', ttl=60, holder='b').acquire()
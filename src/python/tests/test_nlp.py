@@ -0,0 +1,36 @@
+from sqlalchemy import select
+
+from app.config import TestingConfig
+from app.models.post import Keyword
+from app.services.processor import DataProcessor
+from app.utils.nlp import get_lemmatizer, lemmatize_text, lemmatize_token
+from database.db import read_session_scope
+
+
+def _keywords():
+    with read_session_scope() as session:
+        return dict(session.execute(select(Keyword.text, Keyword.frequency)).all())
+
+
+def test_lemmatizer_is_shared_and_lookups_are_memoized():
+    assert get_lemmatizer() is get_lemmatizer()
+
+    lemmatize_token.cache_clear()
+    assert lemmatize_text(['models', 'models', 'model']) == ['model', 'model', 'model']
+    info = lemmatize_token.cache_info()
+    assert (info.hits, info.misses) == (1, 2)
+
+
+def test_inflections_count_as_one_keyword(add_posts):
+    add_posts({'content': 'models beat model baselines'})
+    DataProcessor().extract_keywords()
+    assert _keywords()['model'] == 2
+
+
+def test_lemmatizing_can_be_switched_off(add_posts, monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'LEMMATIZE_KEYWORDS', False)
+    add_posts({'content': 'models beat model baselines'})
+    DataProcessor().extract_keywords()
+    keywords = _keywords()
+    assert keywords['model'] == 1
+    assert keywords['models'] == 1
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.analyzer import DataAnalyzer
+from app.utils.pagination import encode_cursor, decode_cursor
+
+NOW = datetime.utcnow().replace(microsecond=0)
+
+
+def _walk(fetch_page):
+    """Follow next_cursor from the first page to the last; returns the pages."""
+    pages, cursor = [], None
+    while True:
+        page = fetch_page(cursor)
+        pages.append(page['posts'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trips_and_is_tied_to_its_ordering():
+    cursor = encode_cursor('created_at_desc', NOW, 42)
+    assert decode_cursor(cursor, 'created_at_desc', is_datetime=True) == (NOW, 42)
+    with pytest.raises(ValueError, match='ordering'):
+        decode_cursor(cursor, 'engagement')
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor('not-a-cursor', 'engagement')
+
+
+def test_pages_cover_every_post_once_despite_ties(add_posts):
+    # Many equal scores: only the id tie-breaker keeps the pages apart
+    ids = add_posts(*[{'content': f'post {i}', 'engagement_score': float(i % 3), 'created_at': NOW - timedelta(minutes=i)}
+                      for i in range(11)])
+    analyzer = DataAnalyzer()
+
+    pages = _walk(lambda cursor: analyzer.get_top_posts_page(days=1, metric='engagement', limit=4, cursor=cursor))
+
+    assert [len(page) for page in pages] == [4, 4, 3]
+    posts = [post for page in pages for post in page]
+    assert sorted(post['id'] for post in posts) == sorted(ids)
+    assert posts == sorted(posts, key=lambda post: (post['engagement_score'], post['id']), reverse=True)
+
+
+def test_recent_pages_follow_created_at(add_posts):
+    add_posts(*[{'content': f'post {i}', 'created_at': NOW - timedelta(hours=i)} for i in range(5)])
+    analyzer = DataAnalyzer()
+
+    pages = _walk(lambda cursor: analyzer.get_top_posts_page(days=1, metric='created_at_desc', limit=2, cursor=cursor))
+
+    assert [post['content'] for page in pages for post in page] == [f'post {i}' for i in range(5)]
+
+
+def test_fields_select_only_the_requested_columns(add_posts):
+    add_posts({'content': 'x' * 300, 'engagement_score': 1.0})
+    [post] = DataAnalyzer().get_top_posts(days=1, fields='id,snippet')
+    assert set(post) == {'id', 'snippet'}
+    assert post['snippet'].endswith('...') and len(post['snippet']) < 300
+
+    with pytest.raises(ValueError, match='Unsupported fields'):
+        DataAnalyzer().get_top_posts(days=1, fields='id,password')
+
+
+def test_routes_return_the_next_cursor_in_a_header(client, add_posts):
+    add_posts(*[{'content': f'post {i}', 'engagement_score': float(i)} for i in range(3)])
+
+    first = client.get('/api/posts/top?limit=2')
+    assert [post['engagement_score'] for post in first.get_json()] == [2.0, 1.0]
+    second = client.get(f"/api/posts/top?limit=2&cursor={first.headers['X-Next-Cursor']}")
+    assert [post['engagement_score'] for post in second.get_json()] == [0.0]
+    assert 'X-Next-Cursor' not in second.headers
+
+    assert client.get('/api/posts/top?cursor=garbage').status_code == 400
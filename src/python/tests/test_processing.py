@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import select, func
+
+from app.config import TestingConfig
+from app.models.post import Post, Keyword
+from app.services.processor import DataProcessor
+from database.db import init_db, session_scope, read_session_scope
+from scheduler import tasks
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'PROCESSING_MIN_BATCH', 3)
+    monkeypatch.setattr(TestingConfig, 'PROCESSING_MAX_BATCH', 3)
+
+
+def _keyword_post_ids():
+    with read_session_scope() as session:
+        return set(session.execute(select(Keyword.post_id).distinct()).scalars())
+
+
+def test_posts_without_keywords_do_not_stall_extraction(add_posts, small_batches):
+    # More text-less posts than one batch, stored before the posts that do have keywords
+    empty_ids = add_posts(*[{'content': '!!! 123'} for _ in range(5)])
+    post_ids = add_posts(*[{'content': f'machine learning models number {i}'} for i in range(7)])
+
+    tasks.data_processing_job()
+
+    assert _keyword_post_ids() == set(post_ids)
+    assert DataProcessor().pending_counts() == {'keywords': 0, 'sentiment': 0}
+    with read_session_scope() as session:
+        unmarked = session.execute(select(func.count(Post.id)).where(Post.keywords_extracted_at.is_(None))).scalar()
+    assert unmarked == 0
+    assert not set(empty_ids) & _keyword_post_ids()
+
+
+def test_processing_stops_at_the_time_budget(add_posts, small_batches, monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'PROCESSING_MAX_SECONDS', 0)
+    add_posts(*[{'content': f'streaming data pipelines {i}'} for i in range(10)])
+
+    tasks.data_processing_job()
+
+    assert DataProcessor().pending_counts() == {'keywords': 7, 'sentiment': 7}
+
+
+def test_batch_size_follows_the_backlog():
+    config = TestingConfig()
+    assert tasks.processing_batch_size(0) == config.PROCESSING_MIN_BATCH
+    assert tasks.processing_batch_size(10 ** 9) == config.PROCESSING_MAX_BATCH
+    middle = (config.PROCESSING_MIN_BATCH + config.PROCESSING_MAX_BATCH) // 2
+    assert tasks.processing_batch_size(middle * tasks.PROCESSING_DRAIN_BATCHES) == middle
+
+
+def test_init_db_marks_posts_processed_before_the_marker_existed(add_posts):
+    [post_id] = add_posts({'content': 'older processed post'})
+    with session_scope() as session:
+        session.add(Keyword(post_id=post_id, text='older', frequency=1))
+
+    init_db()
+
+    assert DataProcessor().extract_keywords() == 0
+    with read_session_scope() as session:
+        assert session.execute(select(func.count(Keyword.id))).scalar() == 1
@@ -0,0 +1,75 @@
+import pytest
+
+from app.config import TestingConfig
+from app.utils.profiling import profiler
+from database.profiling import QueryProfile
+
+
+@pytest.fixture
+def profiling():
+    profiler.reset()
+    profiler.enable()
+    yield profiler
+    profiler.disable()
+    profiler.reset()
+
+
+@pytest.fixture
+def debug_token(monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'DEBUG_API_TOKEN', 'secret')
+    return {'X-Debug-Token': 'secret'}
+
+
+def test_profile_keeps_the_slowest_and_flags_repeats():
+    profile = QueryProfile('GET /api/summary', keep=2)
+    for seconds in (0.1, 0.5, 0.3):
+        profile.record(f'SELECT {seconds}', None, seconds)
+    for _ in range(3):
+        profile.record('SELECT * FROM posts WHERE id = ?', (1,), 0.01)
+
+    summary = profile.summary(repeat_threshold=3)
+    assert summary['queries'] == 6
+    assert [entry['statement'] for entry in summary['slowest']] == ['SELECT 0.5', 'SELECT 0.3']
+    assert summary['repeated'] == [{'statement': 'SELECT * FROM posts WHERE id = ?', 'count': 3}]
+
+
+def test_requests_report_their_sql_in_server_timing(client, profiling):
+    response = client.get('/api/posts/top')
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+    assert '"1 queries"' in response.headers['Server-Timing']
+
+
+def test_no_header_or_hooks_while_disabled(client):
+    assert not profiler.enabled
+    assert 'Server-Timing' not in client.get('/api/posts/top').headers
+
+
+def test_widget_queries_count_toward_their_request(client, profiling):
+    client.get('/api/dashboard-data')
+    [profile] = [entry for entry in profiling.recent if entry['request'].startswith('GET /api/dashboard-data')]
+    # Summary, activity, keywords, hashtags, topics, engagement and recent posts each query on the pool
+    assert profile['queries'] >= 7
+
+
+def test_debug_endpoint_needs_the_token(client, debug_token):
+    assert client.get('/api/debug/queries').status_code == 404
+    assert client.get('/api/debug/queries', headers={'X-Debug-Token': 'wrong'}).status_code == 404
+    assert client.get('/api/debug/queries', headers=debug_token).status_code == 200
+
+
+def test_debug_endpoint_toggles_profiling_and_explains_the_slowest(client, debug_token):
+    try:
+        assert client.post('/api/debug/queries', json={'enabled': True}, headers=debug_token).get_json()['enabled']
+        client.get('/api/posts/top')
+
+        report = client.get('/api/debug/queries', headers=debug_token).get_json()
+        assert report['recent'][-1]['request'] == 'GET /api/posts/top'
+        assert all(statement['plan'] for statement in report['slowest'])
+
+        assert client.post('/api/debug/queries', json={'enabled': 'yes'}, headers=debug_token).status_code == 400
+        client.delete('/api/debug/queries', headers=debug_token)
+        assert client.post('/api/debug/queries', json={'enabled': False}, headers=debug_token).get_json() == \
+            {'enabled': False, 'slowest': [], 'recent': []}
+    finally:
+        profiler.disable()
+        profiler.reset()
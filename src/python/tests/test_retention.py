@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, func
+
+from app.config import TestingConfig
+from app.models.post import Post, Keyword
+from app.services.analyzer import DataAnalyzer
+from app.services.retention import RetentionService, ArchiveStore, partition_key, partition_bounds
+from app.services.rollups import RollupService
+from app.services.timeseries import TimeSeriesEngine
+from database.db import session_scope, read_session_scope
+
+NOW = datetime.utcnow().replace(microsecond=0)
+
+
+@pytest.fixture
+def retention_days(monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'HOT_RETENTION_DAYS', 10)
+    return 10
+
+
+@pytest.fixture
+def month_of_posts(add_posts):
+    post_ids = add_posts(*[{
+        'content': f'post {i}',
+        'platform': 'twitter' if i % 3 else 'reddit',
+        'created_at': NOW - timedelta(hours=5 * i, minutes=7 * i),
+        'likes': i % 6,
+        'shares': i % 3,
+        'sentiment_score': (i % 5 - 2) / 2,
+    } for i in range(150)])
+    with session_scope() as session:
+        for i, post_id in enumerate(post_ids):
+            session.add(Keyword(post_id=post_id, text=f'word{i % 9}', frequency=1 + i % 4))
+    RollupService().rebuild()
+    return post_ids
+
+
+def _aggregates(start):
+    rollups = RollupService()
+    with read_session_scope() as session:
+        return {
+            'platforms': rollups.platform_totals(session, start),
+            'keywords': rollups.top_keywords(session, start, limit=20),
+            'daily': TimeSeriesEngine().query(session, start, NOW, 'day', metrics=('posts', 'likes'))['series'],
+        }
+
+
+def test_archiving_keeps_aggregates_of_windows_reaching_into_it(retention_days, month_of_posts):
+    # Mid-hour, mid-day start well inside the archived period
+    start = NOW - timedelta(days=20, hours=3, minutes=21)
+    before = _aggregates(start)
+    summary_before = DataAnalyzer().get_dashboard_summary(days=25)
+
+    result = RetentionService().archive_expired()
+
+    assert result['posts'] > 0
+    assert _aggregates(start) == before
+    assert DataAnalyzer().get_dashboard_summary(days=25)['total_posts'] == summary_before['total_posts']
+
+
+def test_archive_moves_only_posts_before_the_hot_boundary(retention_days, month_of_posts):
+    service = RetentionService()
+    boundary = service.hot_boundary()
+
+    service.archive_expired()
+
+    with read_session_scope() as session:
+        oldest_hot = session.execute(select(func.min(Post.created_at))).scalar()
+        hot_count = session.execute(select(func.count(Post.id))).scalar()
+    assert oldest_hot >= boundary
+    archived = sum(len(batch) for batch in service.archive.iter_batches())
+    assert archived + hot_count == len(month_of_posts)
+    assert service.archived_until() <= boundary
+
+
+def test_windows_inside_the_hot_period_still_use_raw_edges(retention_days, month_of_posts):
+    start = NOW - timedelta(days=2, minutes=31)
+    with read_session_scope() as session:
+        expected = session.execute(select(func.count(Post.id)).where(Post.created_at >= start)).scalar()
+        totals = RollupService().platform_totals(session, start)
+    assert sum(metrics['post_count'] for metrics in totals.values()) == expected
+
+
+@pytest.mark.parametrize('granularity, key', [('day', '2024-05-13'), ('week', '2024-W20'), ('month', '2024-05')])
+def test_partitions_are_pruned_by_window(tmp_path, granularity, key):
+    day = datetime(2024, 5, 13)
+    store = ArchiveStore(str(tmp_path), granularity)
+    store.write(day.date(), [{
+        'id': 1, 'platform': 'twitter', 'author': None, 'created_at': day, 'likes': 0, 'shares': 0,
+        'sentiment_score': None, 'engagement_score': 0.0, 'source_url': None, 'content_hash': None, 'content': 'x',
+    }], [], [])
+
+    assert partition_key(day.date(), granularity) == key
+    assert [partition[0] for partition in store.partitions(day, day + timedelta(days=1))] == [key]
+    assert store.partitions(day + timedelta(days=40), None) == []
+    assert [post['content'] for batch in store.iter_batches() for post in batch] == ['x']
+
+
+@pytest.mark.parametrize('key, start, end', [
+    ('2024-05-13', datetime(2024, 5, 13), datetime(2024, 5, 14)),
+    ('2024-W20', datetime(2024, 5, 13), datetime(2024, 5, 20)),
+    ('2024-05', datetime(2024, 5, 1), datetime(2024, 6, 1)),
+])
+def test_partition_bounds_cover_their_key(key, start, end):
+    assert partition_bounds(key) == (start, end)
+
+
+def test_partitions_of_an_earlier_granularity_stay_listed(tmp_path):
+    day = datetime(2024, 5, 13)
+    post = {
+        'id': 1, 'platform': 'twitter', 'author': None, 'created_at': day, 'likes': 0, 'shares': 0,
+        'sentiment_score': None, 'engagement_score': 0.0, 'source_url': None, 'content_hash': None, 'content': 'x',
+    }
+    ArchiveStore(str(tmp_path), 'day').write(day.date(), [post], [], [])
+    ArchiveStore(str(tmp_path), 'month').write((day - timedelta(days=40)).date(),
+                                               [{**post, 'id': 2, 'created_at': day - timedelta(days=40)}], [], [])
+
+    store = ArchiveStore(str(tmp_path), 'week')
+    assert [partition[0] for partition in store.partitions()] == ['2024-04', '2024-05-13']
+    assert store.newest_post_time() == day
+
+    with pytest.raises(ValueError, match='Unsupported archive partitioning'):
+        ArchiveStore(str(tmp_path), 'year')
+
+
+def test_monthly_archive_serves_exports_of_both_tiers(retention_days, month_of_posts, monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'ARCHIVE_PARTITION', 'month')
+    service = RetentionService()
+    service.archive_expired()
+
+    assert {key for key, _, _ in service.archive.partitions()} <= {f"{NOW:%Y-%m}", f"{NOW - timedelta(days=31):%Y-%m}"}
+    exported = [post['id'] for batch in service.iter_post_batches(batch_size=40) for post in batch]
+    assert sorted(exported) == sorted(month_of_posts)
+
+
+def test_daily_partitions_keep_hot_windows_out_of_the_archive(retention_days, month_of_posts):
+    service = RetentionService()
+    service.archive_expired()
+
+    assert service.archive.partitions(NOW - timedelta(days=1), None) == []
+    assert len(service.archive.partitions(NOW - timedelta(days=12), None)) == 2
@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, select, func
+
+from app.models.post import HourlyRollup
+from app.services.analyzer import DataAnalyzer
+from app.services.processor import DataProcessor
+from app.services.rollups import RollupBatch, RollupService, HOURLY_METRICS
+from database.db import init_db, session_scope, read_session_scope, read_engine
+
+NOW = datetime.utcnow().replace(microsecond=0)
+
+
+def _posts(count=60, spacing=timedelta(minutes=37)):
+    return [{
+        'content': f'post {i}',
+        'platform': 'twitter' if i % 3 else 'reddit',
+        'created_at': NOW - i * spacing,
+        'likes': i % 7,
+        'shares': i % 2,
+        'sentiment_score': (i % 5 - 2) / 2,
+    } for i in range(count)]
+
+
+def _raw_totals(posts, start):
+    totals = {}
+    for post in posts:
+        if post['created_at'] < start:
+            continue
+        metrics = totals.setdefault(post['platform'], dict.fromkeys(HOURLY_METRICS, 0))
+        metrics['post_count'] += 1
+        metrics['likes_sum'] += post['likes']
+        metrics['shares_sum'] += post['shares']
+        label = 'positive' if post['sentiment_score'] > 0.05 else 'negative' if post['sentiment_score'] < -0.05 else 'neutral'
+        metrics[f'{label}_count'] += 1
+    return totals
+
+
+def test_platform_totals_combine_rollups_and_raw_edges(add_posts):
+    posts = _posts()
+    add_posts(*posts)
+    RollupService().rebuild()
+
+    # A window starting mid-hour needs the raw edge plus whole rollup hours
+    start = NOW - timedelta(hours=20, minutes=13)
+    with read_session_scope() as session:
+        assert RollupService().platform_totals(session, start) == _raw_totals(posts, start)
+
+
+def test_incremental_batches_match_a_rebuild(add_posts):
+    posts = _posts(30)
+    add_posts(*posts)
+
+    with session_scope() as session:
+        batch = RollupBatch()
+        for post in posts:
+            batch.add_post(post['created_at'], post['platform'], post['likes'], post['shares'], post['sentiment_score'])
+        batch.apply(session)
+    with read_session_scope() as session:
+        incremental = RollupService().platform_totals(session, NOW - timedelta(days=2))
+
+    RollupService().rebuild()
+    with read_session_scope() as session:
+        assert RollupService().platform_totals(session, NOW - timedelta(days=2)) == incremental
+
+
+def test_init_db_builds_missing_rollups(add_posts):
+    add_posts(*_posts(10))
+    with read_session_scope() as session:
+        assert session.execute(select(func.count()).select_from(HourlyRollup)).scalar() == 0
+
+    init_db()
+
+    with read_session_scope() as session:
+        assert session.execute(select(func.sum(HourlyRollup.post_count))).scalar() == 10
+
+
+def test_ensure_built_leaves_existing_rollups_alone(add_posts):
+    add_posts(*_posts(10))
+    RollupService().rebuild()
+    assert RollupService().ensure_built() is None
+
+
+def _keyword_posts():
+    words = ['alpha', 'beta', 'gamma', 'delta']
+    return [{
+        'content': ' '.join(words[:1 + i % 4]),
+        'platform': 'twitter' if i % 2 else 'reddit',
+        'created_at': NOW - i * timedelta(hours=7),
+    } for i in range(30)]
+
+
+def _raw_keyword_counts(posts, start, platform=None):
+    counts = {}
+    for post in posts:
+        if post['created_at'] >= start and platform in (None, post['platform']):
+            for word in post['content'].split():
+                counts[word] = counts.get(word, 0) + 1
+    return counts
+
+
+def test_trending_keywords_combine_daily_rollups_and_the_partial_day(add_posts):
+    posts = _keyword_posts()
+    add_posts(*posts)
+    DataProcessor().extract_keywords()  # Feeds the daily rollup as it goes
+
+    start = NOW - timedelta(days=5, hours=5)
+    with read_session_scope() as session:
+        trending = RollupService().top_keywords(session, start)
+        reddit = RollupService().top_keywords(session, start, platform='reddit')
+    assert {row['text']: row['frequency'] for row in trending} == _raw_keyword_counts(posts, start)
+    assert {row['text']: row['frequency'] for row in reddit} == _raw_keyword_counts(posts, start, 'reddit')
+
+    RollupService().rebuild()
+    with read_session_scope() as session:
+        rebuilt = RollupService().top_keywords(session, start)
+    assert {row['text']: row['frequency'] for row in rebuilt} == _raw_keyword_counts(posts, start)
+
+
+def test_dashboard_summary_is_one_statement_over_rollups_and_edges(add_posts):
+    posts = _posts()
+    add_posts(*posts)
+    RollupService().rebuild()
+
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(read_engine, 'before_cursor_execute', listener)
+    try:
+        summary = DataAnalyzer().get_dashboard_summary(days=1)
+    finally:
+        event.remove(read_engine, 'before_cursor_execute', listener)
+
+    expected = _raw_totals(posts, NOW - timedelta(days=1))
+    assert len(statements) == 1
+    assert summary['total_posts'] == sum(metrics['post_count'] for metrics in expected.values())
+    assert summary['engagement']['total_likes'] == sum(metrics['likes_sum'] for metrics in expected.values())
+    assert summary['platforms'] == {platform: metrics['post_count'] for platform, metrics in expected.items()}
+    assert summary['platform_metrics']['reddit']['negative'] == expected['reddit']['negative_count']
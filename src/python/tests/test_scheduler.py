@@ -0,0 +1,48 @@
+import multiprocessing
+import runpy
+
+import pytest
+from apscheduler.executors.pool import ThreadPoolExecutor, ProcessPoolExecutor
+
+from app.services import collector as collector_module
+from scheduler import tasks
+
+
+@pytest.fixture
+def started_scheduler():
+    scheduler = tasks.init_scheduler()
+    yield scheduler
+    tasks.shutdown_scheduler()
+
+
+def test_jobs_run_once_at_a_time_on_their_executors(started_scheduler):
+    jobs = {job.id: job for job in started_scheduler.get_jobs()}
+    assert jobs['data_collection_job'].executor == 'io'
+    assert jobs['data_processing_job'].executor == 'cpu'
+    for job in jobs.values():
+        assert job.max_instances == 1
+        assert job.coalesce
+
+
+@pytest.mark.skipif('forkserver' not in multiprocessing.get_all_start_methods(), reason="needs forkserver")
+def test_processing_runs_in_worker_processes(started_scheduler):
+    assert isinstance(started_scheduler._lookup_executor('cpu'), ProcessPoolExecutor)
+
+
+def test_processing_stays_on_threads_without_forkserver(monkeypatch):
+    monkeypatch.setattr(tasks.multiprocessing, 'get_all_start_methods', lambda: ['spawn'])
+    scheduler = tasks.init_scheduler()
+    try:
+        assert isinstance(scheduler._lookup_executor('cpu'), ThreadPoolExecutor)
+    finally:
+        tasks.shutdown_scheduler()
+
+
+def test_main_module_is_inert_when_reimported_by_pool_workers(monkeypatch):
+    started = []
+    monkeypatch.setattr(collector_module.DataCollector, '__init__', lambda self: started.append(self))
+
+    namespace = runpy.run_module('app.main', run_name='__mp_main__')
+
+    assert 'app' not in namespace
+    assert started == []
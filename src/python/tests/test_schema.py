@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+from operator import attrgetter
+
+import pytest
+
+from app.models.post import Hashtag, Keyword, Post
+from app.services.analyzer import DataAnalyzer
+from app.services.rollups import RollupService
+from database.db import read_engine, session_scope
+from database.schema import capture_query_plans, find_full_scans
+
+NOW = datetime.utcnow()
+
+ANALYZER_CALLS = [
+    # Same calls as manage.py explain-queries
+    ('get_dashboard_summary', (7,)),
+    ('get_trending_topics', (7,)),
+    ('get_topics', (7,)),
+    ('get_top_posts', (7,)),
+    ('get_time_series_activity', (7,)),
+    ('get_time_series_engagement', (7,)),
+    ('get_hashtag_network', (7,)),
+    ('search_posts', ('data', 7)),
+    ('processor.get_sentiment_distribution', (7,)),
+    ('processor.get_trending_hashtags', (7,)),
+]
+
+
+@pytest.fixture
+def seeded_posts():
+    with session_scope() as session:
+        tags = [Hashtag(text='data'), Hashtag(text='ai')]
+        for i in range(20):
+            post = Post(content=f'data post {i}', platform='twitter' if i % 2 else 'reddit', likes=i, shares=i % 3,
+                        sentiment_score=(i % 5 - 2) / 2, engagement_score=float(i), created_at=NOW - timedelta(hours=9 * i))
+            post.keywords = [Keyword(text='data', frequency=1), Keyword(text=f'word{i % 4}', frequency=2)]
+            post.hashtags = tags
+            session.add(post)
+    RollupService().rebuild()
+
+
+@pytest.mark.parametrize('method, args', ANALYZER_CALLS)
+def test_analyzer_queries_use_indexes(seeded_posts, method, args):
+    plans = capture_query_plans(read_engine, attrgetter(method)(DataAnalyzer()), *args)
+
+    assert plans
+    scans = [(statement, scan) for statement, plan in plans for scan in find_full_scans(plan)]
+    assert scans == []
+
+
+def test_full_scans_are_recognized():
+    assert find_full_scans(['SCAN posts', 'SEARCH keywords USING INDEX ix_keywords_post_id (post_id=?)']) == ['SCAN posts']
+    assert find_full_scans(['SCAN posts USING COVERING INDEX ix_posts_created_at']) == []
+    assert find_full_scans(['Seq Scan on post_hashtag  (cost=0.00..35.50 rows=2550 width=8)']) == \
+        ['Seq Scan on post_hashtag  (cost=0.00..35.50 rows=2550 width=8)']
+    assert find_full_scans(['SCAN rollup_hourly']) == []
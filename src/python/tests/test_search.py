@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.models.post import Post
+from app.services.analyzer import DataAnalyzer
+from app.utils.search import build_fts_query, build_tsquery
+from database.db import session_scope
+
+NOW = datetime.utcnow()
+
+
+def _contents(posts):
+    return [post['content'] for post in posts]
+
+
+def test_queries_are_quoted_so_user_input_is_never_an_operator():
+    assert build_fts_query('data OR NOT "machine learning" stream*') == \
+        '"data" "or" "not" "machine learning" "stream"*'
+    assert build_fts_query('c++ / -') == '"c"'
+    assert build_fts_query('"" ...') == ''
+
+
+def test_tsquery_keeps_phrases_and_prefixes():
+    assert build_tsquery('"machine learning" stream*') == '(machine <-> learning) & stream:*'
+
+
+def test_search_matches_phrases_prefixes_and_stems(add_posts):
+    add_posts(
+        {'content': 'Machine learning for streaming data', 'created_at': NOW - timedelta(hours=1)},
+        {'content': 'Learning a machine from scratch', 'created_at': NOW - timedelta(hours=2)},
+        {'content': 'Weekend cooking notes', 'created_at': NOW - timedelta(hours=3)},
+    )
+    analyzer = DataAnalyzer()
+
+    assert _contents(analyzer.search_posts('"machine learning"', order='recent')) == ['Machine learning for streaming data']
+    assert _contents(analyzer.search_posts('machine learning', order='recent')) == [
+        'Machine learning for streaming data', 'Learning a machine from scratch'
+    ]
+    assert _contents(analyzer.search_posts('stream*')) == ['Machine learning for streaming data']
+    assert _contents(analyzer.search_posts('cook')) == ['Weekend cooking notes']  # Porter stemming
+    assert analyzer.search_posts('NOT') == []
+
+
+def test_index_follows_edits_and_deletes(add_posts):
+    [post_id] = add_posts({'content': 'draft about rivers'})
+    with session_scope() as session:
+        session.execute(update(Post).where(Post.id == post_id).values(content='final about mountains'))
+    analyzer = DataAnalyzer()
+    assert analyzer.search_posts('rivers') == []
+    assert _contents(analyzer.search_posts('mountains')) == ['final about mountains']
+
+    with session_scope() as session:
+        session.query(Post).filter(Post.id == post_id).delete()
+    assert analyzer.search_posts('mountains') == []
+
+
+def test_relevance_ranks_denser_matches_first(add_posts):
+    add_posts({'content': 'rust ' + 'filler words here ' * 10}, {'content': 'rust rust rust compiler'})
+    assert _contents(DataAnalyzer().search_posts('rust'))[0] == 'rust rust rust compiler'
+
+
+def test_search_route_pages_results(client, add_posts):
+    add_posts(*[{'content': f'python tip {i}', 'created_at': NOW - timedelta(minutes=i)} for i in range(3)])
+
+    first = client.get('/api/search?q=python&order=recent&limit=2&fields=content')
+    assert first.get_json() == [{'content': 'python tip 0'}, {'content': 'python tip 1'}]
+    second = client.get(f"/api/search?q=python&order=recent&limit=2&fields=content&cursor={first.headers['X-Next-Cursor']}")
+    assert second.get_json() == [{'content': 'python tip 2'}]
@@ -0,0 +1,51 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.utils import serialization
+from app.utils.serialization import dumps_bytes
+
+NOW = datetime.utcnow().replace(microsecond=0)
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_both_encoders_agree(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serialization, 'orjson', None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+
+    obj = {'created_at': datetime(2024, 5, 1, 10, 30), 'text': 'café', 'counts': {1: 2}}
+    assert json.loads(dumps_bytes(obj)) == {'created_at': '2024-05-01T10:30:00', 'text': 'café', 'counts': {'1': 2}}
+    assert dumps_bytes({'b': 1, 'a': 2}, sort_keys=True) == b'{"a":2,"b":1}'
+
+
+def test_api_responses_encode_datetimes(client, add_posts):
+    add_posts({'content': 'post', 'created_at': NOW, 'engagement_score': 1.0})
+    [post] = client.get('/api/posts/top?fields=created_at').get_json()
+    assert post['created_at'] == NOW.isoformat()
+
+
+def test_large_bodies_are_gzipped_when_accepted(client, add_posts):
+    add_posts(*[{'content': f'post number {i} ' * 5, 'engagement_score': float(i), 'created_at': NOW - timedelta(minutes=i)}
+                for i in range(40)])
+
+    plain = client.get('/api/posts/top?limit=40')
+    compressed = client.get('/api/posts/top?limit=40', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in plain.headers
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+
+
+def test_small_bodies_and_streams_are_sent_as_is(client, add_posts):
+    small = client.get('/api/posts/top', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+    add_posts(*[{'content': 'exported post ' * 20} for _ in range(20)])
+    export = client.get('/api/export?format=ndjson', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in export.headers
+    assert len(export.get_data().splitlines()) == 20
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.processor import DataProcessor
+from app.services.rollups import RollupService
+from app.services.timeseries import TimeSeriesEngine
+from database.db import read_session_scope
+
+NOW = datetime.utcnow().replace(microsecond=0)
+
+
+@pytest.fixture
+def hourly_posts(add_posts):
+    posts = [{'content': f'post {i}', 'platform': 'twitter' if i % 2 else 'reddit',
+              'created_at': NOW - timedelta(minutes=53 * i), 'likes': i % 4} for i in range(80)]
+    add_posts(*posts)
+    RollupService().rebuild()
+    return posts
+
+
+def test_daily_buckets_count_every_post_in_the_window(hourly_posts):
+    start = NOW - timedelta(days=2, minutes=17)
+    with read_session_scope() as session:
+        result = TimeSeriesEngine().query(session, start, NOW, 'day', metrics=('posts', 'likes'), by_platform=True)
+
+    for platform in ('twitter', 'reddit'):
+        in_window = [post for post in hourly_posts if post['platform'] == platform and post['created_at'] >= start]
+        assert sum(result['series'][platform]['posts']) == len(in_window)
+        assert sum(result['series'][platform]['likes']) == sum(post['likes'] for post in in_window)
+    assert result['buckets'][0] == start.replace(hour=0, minute=0, second=0)
+
+
+def test_unsupported_interval_is_rejected_by_the_engine():
+    with read_session_scope() as session, pytest.raises(ValueError):
+        TimeSeriesEngine().query(session, NOW - timedelta(days=1), NOW, 'minute')
+
+
+def test_activity_route_answers_400_for_unsupported_interval(client, hourly_posts):
+    response = client.get('/api/activity?days=2&interval=minute')
+    assert response.status_code == 400
+    assert 'interval' in response.get_json()['error']
+
+    response = client.get('/api/activity?days=2&interval=hour')
+    assert response.status_code == 200
+    assert sum(sum(count for key, count in bucket.items() if key != 'date') for bucket in response.get_json()) > 0
+
+
+def test_post_activity_rejects_unsupported_intervals(hourly_posts):
+    with pytest.raises(ValueError, match='Unsupported interval'):
+        DataProcessor().get_post_activity(2, 'minute')
@@ -0,0 +1,70 @@
+import json
+from datetime import datetime, timedelta
+
+from app.models.post import Keyword, Topic
+from app.services.analyzer import DataAnalyzer
+from app.services.topics import TopicClusterer
+from app.utils.nlp import minhash_signature, estimate_topic_similarity
+from database.db import session_scope, read_session_scope
+
+AI_WORDS = ['model', 'neural', 'training', 'gpu', 'dataset']
+FOOD_WORDS = ['pasta', 'recipe', 'tomato', 'garlic', 'basil']
+
+
+def _add_keyword_posts(add_posts, *keyword_lists):
+    """Insert one post per keyword list, with its keywords already extracted."""
+    ids = add_posts(*[{'content': ' '.join(words)} for words in keyword_lists])
+    with session_scope() as session:
+        session.add_all([Keyword(post_id=post_id, text=word, frequency=1)
+                         for post_id, words in zip(ids, keyword_lists) for word in words])
+    return ids
+
+
+def test_minhash_estimates_jaccard_similarity():
+    words = [f'word{i}' for i in range(40)]
+    half_shared = words[:20] + [f'other{i}' for i in range(20)]  # Jaccard 1/3
+
+    assert estimate_topic_similarity(minhash_signature(words, 256), minhash_signature(reversed(words), 256)) == 1.0
+    estimate = estimate_topic_similarity(minhash_signature(words, 256), minhash_signature(half_shared, 256))
+    assert abs(estimate - 1 / 3) < 0.1
+    assert minhash_signature([], 64) == []
+
+
+def test_similar_posts_share_a_topic_and_unrelated_ones_do_not(add_posts):
+    _add_keyword_posts(add_posts, AI_WORDS, AI_WORDS[:4] + ['cuda'], FOOD_WORDS, FOOD_WORDS[1:] + ['oven'])
+
+    assert TopicClusterer().cluster_new_posts() == 4
+
+    topics = DataAnalyzer().get_topics(days=1)
+    assert sorted(topic['post_count'] for topic in topics) == [2, 2]
+    topic_keywords = [set(topic['keywords']) for topic in topics]
+    assert any(keywords <= set(AI_WORDS + ['cuda']) for keywords in topic_keywords)
+    assert any(keywords <= set(FOOD_WORDS + ['oven']) for keywords in topic_keywords)
+
+
+def test_runs_only_assign_posts_without_a_topic(add_posts):
+    _add_keyword_posts(add_posts, AI_WORDS)
+    clusterer = TopicClusterer()
+    assert clusterer.cluster_new_posts() == 1
+    assert clusterer.cluster_new_posts() == 0
+
+    _add_keyword_posts(add_posts, AI_WORDS[1:])
+    assert clusterer.cluster_new_posts() == 1
+    with read_session_scope() as session:
+        assert [topic.post_count for topic in session.query(Topic).all()] == [2]
+
+
+def test_decay_retires_stale_topics_and_merges_duplicates(add_posts):
+    _add_keyword_posts(add_posts, FOOD_WORDS)
+    with session_scope() as session:
+        now = datetime.utcnow()
+        # Two copies of the same topic, and one nobody posted about for weeks
+        for keywords, updated_at in ((AI_WORDS, now), (AI_WORDS, now), (FOOD_WORDS, now - timedelta(days=30))):
+            session.add(Topic(label=keywords[0], keywords=json.dumps(dict.fromkeys(keywords, 1)),
+                              signature=json.dumps(minhash_signature(keywords)),
+                              post_count=1, weight=1.0, is_active=True, updated_at=updated_at))
+
+    assert TopicClusterer().decay_and_merge() == {'merged': 1, 'retired': 1}
+    with read_session_scope() as session:
+        active = session.query(Topic).filter(Topic.is_active.is_(True)).all()
+        assert [(topic.label, topic.post_count) for topic in active] == [('model, neural, training', 2)]